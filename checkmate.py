@@ -11,6 +11,7 @@ from kivy.uix.screenmanager import ScreenManager, Screen, SlideTransition, NoTra
 from kivy.clock import Clock
 
 from checkmate.controls.control_system import ChessControlSystem
+from checkmate.screens.piece_textures import textures
 
 from checkmate.screens.gamescreen import GameScreen
 from checkmate.screens.initscreen import InitScreen
@@ -32,6 +33,9 @@ class MainScreenManager(ScreenManager):
 # --------------------------
 class TestApp(App):
     def build(self):
+        # Load the piece, king state and arrow images (pieces in one atlas) before any screen needs them.
+        textures.load()
+
         # Create an instance of our state machine.
         self.control_system = ChessControlSystem(ui_update_callback=self.on_state_change)
         # Set engine parameters at runtime.
@@ -69,6 +73,10 @@ class TestApp(App):
         #Clock.schedule_once(lambda dt: self.control_system.start_game(), 10)
 
         return self.sm
+
+    def on_stop(self):
+        # Stockfish runs for the life of the app, shut it down with it
+        self.control_system.engine.quit()
     
     def on_state_change(self, state):
         print(f"[App] State changed: {state}")
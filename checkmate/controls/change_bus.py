@@ -0,0 +1,57 @@
+import threading
+
+# What changed, widgets subscribe to the ones they draw
+POSITION = "position"     # board, move history, captures, material
+MESSAGES = "messages"     # in game / end game text
+CLOCK = "clock"           # active player, times
+SELECTION = "selection"   # lifted piece and its legal moves
+ALL_CHANGES = frozenset((POSITION, MESSAGES, CLOCK, SELECTION))
+
+
+class ChangeBus:
+    """
+    Collects change notifications and delivers them once per frame.
+
+    notify() only records what changed, the first call in a frame schedules
+    a flush and every later one before it runs just adds its tags. The flush
+    calls each subscriber once, and only if it cares about one of the
+    changes, so a move that notifies four times still redraws the board once.
+
+    schedule(callback) should run callback on the next frame (Clock on the
+    UI), payload() is what subscribers get called with.
+    """
+    def __init__(self, schedule, payload=lambda: None, on_flush=None):
+        self.schedule = schedule
+        self.payload = payload
+        self.on_flush = on_flush
+        self.subscribers = []
+        self.pending = set()
+        self.scheduled = False
+        self.lock = threading.Lock()
+
+    def subscribe(self, callback, changes=None):
+        """changes=None is everything, for the old register_observer callers."""
+        self.subscribers.append((callback, frozenset(changes) if changes else ALL_CHANGES))
+
+    def notify(self, *changes):
+        with self.lock:
+            self.pending.update(changes or ALL_CHANGES)
+            if self.scheduled:
+                return
+            self.scheduled = True
+        self.schedule(self.flush)
+
+    def flush(self, *args):
+        with self.lock:
+            changes = self.pending
+            self.pending = set()
+            self.scheduled = False
+        if not changes:
+            return changes
+        if self.on_flush is not None:
+            self.on_flush(changes)
+        payload = self.payload()
+        for callback, wanted in list(self.subscribers):
+            if wanted & changes:
+                callback(payload)
+        return changes
@@ -11,12 +11,14 @@ from transitions.extensions import HierarchicalMachine as Machine
 import chess
 import chess.pgn
 import chess.engine
+import chess.polyglot
 import time
 import threading
 import sys
 import random
 import copy
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 
 import logging
 logging.getLogger('transitions').setLevel(logging.WARNING)
@@ -32,6 +34,14 @@ try:
     from hall_control import Hall
     from reset_control import BoardReset
     from nfc_control import NFC
+    from move_inference import MoveInference, MoveIndex
+    from engine_manager import EngineManager
+    from move_sources import MoveSources
+    from engine_cache import EngineCache
+    from turn_pipeline import TurnPipeline
+    from material_tracker import MaterialTracker
+    from occupancy import Occupancy
+    from change_bus import ChangeBus, POSITION, MESSAGES, CLOCK, SELECTION
 
     from checkmate.screens import GameScreen, MainScreen, InitScreen, GantryControlScreen
 
@@ -41,6 +51,14 @@ except:
     from checkmate.controls.hall_control import Hall
     from checkmate.controls.reset_control import BoardReset
     from checkmate.controls.nfc_control import NFC
+    from checkmate.controls.move_inference import MoveInference, MoveIndex
+    from checkmate.controls.engine_manager import EngineManager
+    from checkmate.controls.move_sources import MoveSources
+    from checkmate.controls.engine_cache import EngineCache
+    from checkmate.controls.turn_pipeline import TurnPipeline
+    from checkmate.controls.material_tracker import MaterialTracker
+    from checkmate.controls.occupancy import Occupancy
+    from checkmate.controls.change_bus import ChangeBus, POSITION, MESSAGES, CLOCK, SELECTION
 
 
     from checkmate.screens.gamescreen import GameScreen
@@ -153,6 +171,8 @@ class ChessControlSystem:
         self.title_font = 120
 
         self.board = chess.Board()  # Integrated chess board.
+        # Moves are pushed through this so material and captures stay current
+        self.material_tracker = MaterialTracker(self.board)
         self.running = True
         if running_on_pi:
             self.engine_path = "./bin/stockfish"
@@ -162,9 +182,24 @@ class ChessControlSystem:
             self.engine_path = "./bin/stockfish-macos-m1-apple-silicon"
         else:
             print("Need to download windows stockfish")
-            self.engine = None
-        
-        self.engine = None
+            self.engine_path = None
+
+        # Opening book and endgame tablebases are optional, the engine is asked when they have nothing
+        self.book_path = "./bin/book.bin"
+        self.tablebase_path = "./bin/syzygy"
+
+        # Stockfish is started once here and kept for every game
+        # Searched moves are kept between games, keyed by position, Elo and time limit
+        self.engine_cache_path = "./engine_cache.sqlite"
+        self.engine = EngineManager(self.engine_path, sources=MoveSources(self.book_path, self.tablebase_path),
+                                    cache=EngineCache(self.engine_cache_path))
+        self.engine.start()
+        self.engine_search = None
+        # One long lived thread plays engine moves on the gantry
+        self.board_worker = ThreadPoolExecutor(max_workers=1)
+        # Gantry, rocker and next turn prep for each board move run side by side
+        self.turn_pipeline = TurnPipeline()
+        self.expected_occupancy = None
 
         self.use_switch = False
 
@@ -263,9 +298,10 @@ class ChessControlSystem:
         self.gantry.home()
         print("Gantry initialized: homing")
         self.move_history = []
-        self.captured_pieces = []
         self.SQUARES = chess.SQUARES
-        self.observers = []
+        # Notifications are tagged and delivered at most once a frame
+        self.changes = ChangeBus(lambda flush: Clock.schedule_once(flush, 0), payload=lambda: self.board,
+                                 on_flush=lambda changes: self.update_ui())
         self.game_state = "UNFINISHED"
         print("trying to init hall")
         try:
@@ -275,8 +311,16 @@ class ChessControlSystem:
         print("Hall Initialized")
 
 
-        self.reset_control = BoardReset(self.board, self.gantry, self.hall)
+        self.reset_control = BoardReset(self.board, self.gantry, self.hall, self.material_tracker)
 
+        # Works the player's move out from the hall frames, including captures,
+        # castling and en passant. Set False for the old two-square polling.
+        self.use_move_inference = True
+        self.move_inference = MoveInference(on_move=self.on_move_inferred, on_illegal=self.on_illegal_move_inferred,
+                                            on_lift=self.on_piece_lifted, on_reset=self.on_pieces_returned)
+        # Legal moves per position by Zobrist hash, the next position gets built while the gantry moves
+        self.move_index = MoveIndex()
+        self.move_index.prefetch(self.board)
 
         self.first_change = None
         self.second_change = None
@@ -314,9 +358,9 @@ class ChessControlSystem:
             time.sleep(0.1)
 
     def kill_engine(self):
-        if self.engine:
-            self.engine.quit()
-            self.engine = None
+        # The engine stays running between games, just stop it thinking
+        self.engine.cancel(self.engine_search)
+        self.engine_search = None
 
 
     def update_ui(self):
@@ -333,16 +377,16 @@ class ChessControlSystem:
     def is_local_mode(self):
         return self.parameters['local_mode']
     
-    def register_observer(self, callback):
-        """Register a callback that will be called when the board changes."""
-        self.observers.append(callback)
+    def register_observer(self, callback, changes=None):
+        """
+        Register a callback that will be called with the board when one of
+        changes (POSITION, MESSAGES, CLOCK, SELECTION) happens, None for all.
+        """
+        self.changes.subscribe(callback, changes)
     
-    def notify_observers(self):
-        self.update_ui()
-        """Call all registered observer callbacks with the updated board."""
-        for callback in self.observers:
-            Clock.schedule_once(lambda dt, cb=callback: cb(self.board), 0)
-            #callback(self.board)
+    def notify_observers(self, *changes):
+        """Tag what changed, observers and the screen update once on the next frame."""
+        self.changes.notify(*changes)
 
     # def start_game(self):
     #     self.to_gamescreen()
@@ -351,9 +395,9 @@ class ChessControlSystem:
     def early_exit(self):
 
         self.endgame_message = "Game Abandoned"
-        if self.engine:
-            self.engine.quit()
-            self.engine = None
+        self.stop_move_inference()
+        self.engine.cancel(self.engine_search)
+        self.engine_search = None
 
 
 
@@ -418,19 +462,6 @@ class ChessControlSystem:
 
         move = chess.Move.from_uci(move_str)
 
-        if self.board.is_capture(move):
-
-            if self.board.is_en_passant(move):
-                captured_square = chess.square(chess.square_file(move.to_square), chess.square_rank(move.from_square))
-                captured_piece = self.board.piece_at(captured_square)
-            else:
-                captured_piece = self.board.piece_at(move.to_square)
-                
-            # For a normal capture, the captured piece is on the destination square.
-            if captured_piece:
-                self.captured_pieces.append(captured_piece.symbol())
-                # Note: You might need special handling for en passant captures.
-        
         self.move_history.append(move.uci())
     
         if self.is_move_checkmate(self.board, move):
@@ -471,8 +502,8 @@ class ChessControlSystem:
         self.legal_moves = None
         print("pushing move:")
 
-        self.board.push(move)
-        self.notify_observers()
+        self.material_tracker.push(self.board, move)
+        self.notify_observers(POSITION, MESSAGES)
 
         if not self.use_switch:
             self.rocker.toggle()
@@ -547,13 +578,21 @@ class ChessControlSystem:
                 (offset*dx_sign, offset*dy_sign)   # Final approach to target position
             ]
 
-        cmds = self.gantry.movement_to_gcode(path)
+        # Route back around whatever else is on the board, the board hasn't
+        # changed so its occupancy is still right apart from the two squares
+        move = chess.Move.from_uci(move_str)
+        occupied = self.board.occupied & ~chess.BB_SQUARES[move.from_square] & ~chess.BB_SQUARES[move.to_square]
+        planned = self.gantry.planner.plan_path(end_coords, init_coords, occupied)
+        if planned is not None:
+            path = planned
+
+        cmds = self.gantry.movement_to_gcode(path, occupied)
         self.gantry.send_commands(cmds)
 
 
         if self.use_switch:
             self.rocker.toggle()
-        self.notify_observers()
+        self.notify_observers(POSITION, MESSAGES)
 
 
         self.on_player_turn()
@@ -561,31 +600,17 @@ class ChessControlSystem:
 
     def process_board_move(self, move, is_white):
 
-        captured_symbol = None
-        # move = chess.Move.from_uci(move_str)
-        if self.board.is_capture(move):
-
-            if self.board.is_en_passant(move):
-                captured_square = chess.square(chess.square_file(move.to_square), chess.square_rank(move.from_square))
-                captured_piece = self.board.piece_at(captured_square)
-            else:
-                captured_piece = self.board.piece_at(move.to_square)
-
-            # For a normal capture, the captured piece is on the destination square.
-            # captured_piece = self.board.piece_at(move.to_square)
-            if captured_piece:
-                self.captured_pieces.append(captured_piece.symbol())
-                captured_symbol = captured_piece.symbol()
-
-                # Note: You might need special handling for en passant captures.
-
-        self.gantry.interpret_chess_move(f"{move}", self.board.is_capture(move), self.board.is_castling(move), self.board.is_en_passant(move), is_white, captured_symbol)
+        # The gantry needs to know what it is taking off, the tracker records it on the push
+        captured_symbol = self.material_tracker.captured_symbol(self.board, move)
 
-        
+        is_capture = self.board.is_capture(move)
+        is_castling = self.board.is_castling(move)
+        is_en_passant = self.board.is_en_passant(move)
         self.move_history.append(move.uci())
     
         if self.is_move_checkmate(self.board, move):
             self.checkmate = True
+            gives_check = False
             if self.board.turn == chess.WHITE:
                 self.piece_images['k'] = 'assets/black_king_mate.png'
                 self.game_winner = 'White'
@@ -594,22 +619,19 @@ class ChessControlSystem:
                 self.game_winner = 'Black'
             
         elif self.board.gives_check(move):
+            gives_check = True
             if self.board.turn == chess.WHITE:
                 self.piece_images['k'] = 'assets/black_king_check.png'
             else:
                 self.piece_images['K'] = 'assets/white_king_check.png'
 
-            self.rocker.toggle()
-            #time.sleep(0.3)
-
-            self.rocker.toggle()
-
             # Make some indication
 
             self.check = f"{self.board.turn}"
             self.checkmate = False
 
         else:
+            gives_check = False
             if self.board.turn == chess.WHITE:
                 self.piece_images['k'] = 'assets/black_king.png'
             else:
@@ -619,13 +641,19 @@ class ChessControlSystem:
 
             self.checkmate = False
 
+        # Gantry, rocker and the next turn's prep all run at once
+        next_board = self.board.copy(stack=False)
+        next_board.push(move)
+        stages = self.start_board_move_stages(move, is_capture, is_castling, is_en_passant, is_white,
+                                              captured_symbol, gives_check, next_board)
+
         self.legal_moves = None
         print("pushing move:")
 
-        self.board.push(move)
-        self.notify_observers()
+        self.material_tracker.push(self.board, move)
+        self.notify_observers(POSITION, MESSAGES)
 
-        self.rocker.toggle()
+        self.turn_pipeline.join(stages)
 
         # self.notify_observers()
 
@@ -637,6 +665,34 @@ class ChessControlSystem:
         # self.process_legal_player_move(f"{move}")
 
 
+    def start_board_move_stages(self, move, is_capture, is_castling, is_en_passant, is_white, captured_symbol, gives_check, next_board):
+        """Start the independent parts of a board move on the turn pipeline, returns their futures."""
+        pipeline = self.turn_pipeline
+        # The rocker runs on its own worker, queue it and carry on
+        self.rock_after_board_move(gives_check)
+        return {
+            "motion": pipeline.submit("motion", self.gantry.interpret_chess_move, f"{move}", is_capture, is_castling,
+                                      is_en_passant, is_white, captured_symbol, occupied=self.board.occupied),
+            "precompute": pipeline.submit("precompute", self.precompute_next_turn, next_board),
+        }
+
+    def rock_after_board_move(self, gives_check):
+        """Queue the rocker moves for a board move, returns the Future for the last one."""
+        toggles = [self.rocker.toggle() for _ in range(3 if gives_check else 1)]
+        # Nobody waits on these, so report failures from the rocker worker
+        for future in toggles:
+            future.add_done_callback(self.report_rocker_error)
+        return toggles[-1]
+
+    def report_rocker_error(self, future):
+        if not future.cancelled() and future.exception() is not None:
+            print(f"[Rocker] Move failed: {future.exception()}")
+
+    def precompute_next_turn(self, board):
+        """Everything the player's turn needs for board, worked out while the gantry moves."""
+        self.move_index.get(board)
+        self.expected_occupancy = Occupancy.from_board(board)
+
     # def on_player_first_turn(self):  
     #     print("[State] Entering Player Turn")
     #     self.ingame_message = "Waiting for Player..."
@@ -803,8 +859,12 @@ class ChessControlSystem:
 
     def first_piece_detection_poll(self):
         self.ingame_message = "Waiting for piece to move..."
+        if self.use_move_inference:
+            self.start_move_inference()
+            return
+
         # Capture the initial board state
-        self.initial_board = copy.deepcopy(self.hall.sense_layer.get_squares_game())
+        self._last_frame_time, self.initial_board = self.hall.sampler.latest()
         print("Initial board state captured")
         
         # Reset detection variables
@@ -817,7 +877,12 @@ class ChessControlSystem:
 
     def safe_poll_first(self, callback):
         try:
-            new_board = self.hall.sense_layer.get_squares_game()
+            # The sampler thread does the scanning, only look at frames we haven't seen
+            frame_time, new_board = self.hall.sampler.latest()
+            if frame_time == self._last_frame_time:
+                Clock.schedule_once(lambda dt: self.safe_poll_first(callback), 0.02)
+                return
+            self._last_frame_time = frame_time
             current_change = self.hall.compare_boards(new_board, self.initial_board)
             
             # Implement simple debouncing logic
@@ -849,7 +914,7 @@ class ChessControlSystem:
     def on_first_piece_found(self, selected_piece):
         print(f"First piece confirmed: {selected_piece}")
         self.ingame_message = f"Piece lifted from {selected_piece}"
-        self.notify_observers()
+        self.notify_observers(SELECTION, MESSAGES)
         # Immediate transition to second piece detection
         Clock.schedule_once(lambda dt: self.go_to_second_piece_detection(), 0.02)  # Reduced from 0.1 to 0.02
 
@@ -858,7 +923,7 @@ class ChessControlSystem:
         self.ingame_message = "Place piece on destination square..."
         
         # Update reference board for second detection
-        self.initial_board = copy.deepcopy(self.hall.sense_layer.get_squares_game())
+        self._last_frame_time, self.initial_board = self.hall.sampler.latest()
         
         # Reset detection variables
         self.selected_move = None
@@ -869,7 +934,11 @@ class ChessControlSystem:
 
     def safe_poll_second(self, callback):
         try:
-            new_board = self.hall.sense_layer.get_squares_game()
+            frame_time, new_board = self.hall.sampler.latest()
+            if frame_time == self._last_frame_time:
+                Clock.schedule_once(lambda dt: self.safe_poll_second(callback), 0.02)
+                return
+            self._last_frame_time = frame_time
             current_change = self.hall.compare_boards(new_board, self.initial_board)
             
             # Implement simple debouncing logic
@@ -919,19 +988,71 @@ class ChessControlSystem:
             self.ingame_message = f"Error: {str(e)[:30]}..."
             Clock.schedule_once(lambda dt: self.go_to_first_piece_detection(), 0.5)  # Reduced from 1.0 to 0.5
 
+    def start_move_inference(self):
+        self.selected_piece = None
+        _, reference = self.hall.sampler.latest()
+        if self.expected_occupancy is not None and reference != self.expected_occupancy:
+            print(f"[Hall] Board differs from the game on {(reference ^ self.expected_occupancy).square_names()}")
+        self.move_inference.reset(self.board, reference, self.move_index.get(self.board).signatures)
+        # Every frame, not just changes, so the inference can time out ambiguous moves
+        self.hall.sampler.subscribe(self.on_hall_frame, changes_only=False)
+        print("Initial board state captured")
+
+    def stop_move_inference(self):
+        self.move_inference.stop()
+        if getattr(self, "hall", None):
+            self.hall.sampler.unsubscribe(self.on_hall_frame)
+
+    def on_hall_frame(self, timestamp, occupancy, previous):
+        # Runs on the hall sampler thread, the callbacks below hop back onto the Clock
+        self.move_inference.feed(timestamp, occupancy)
+
+    def on_piece_lifted(self, square):
+        print(f"First piece lifted: {square}")
+        self.selected_piece = square
+        self.ingame_message = f"Piece lifted from {square}"
+        self.notify_observers(SELECTION, MESSAGES)
+
+    def on_pieces_returned(self):
+        print("Piece returned to original square")
+        self.selected_piece = None
+        self.ingame_message = "Piece returned to original position"
+        self.notify_observers(SELECTION, MESSAGES)
+
+    def on_move_inferred(self, move):
+        self.stop_move_inference()
+        print(f"Move inferred: {move.uci()}")
+        self.selected_piece = chess.square_name(move.from_square)
+        self.ingame_message = f"Move detected: {move.uci()}"
+        Clock.schedule_once(lambda dt: self.process_detected_move(move.uci()))
+
+    def on_illegal_move_inferred(self, from_square, to_square):
+        self.stop_move_inference()
+        print(f"Illegal move detected: {from_square}{to_square}")
+        self.selected_piece = from_square
+        self.ingame_message = f"Move detected: {from_square}{to_square}"
+        Clock.schedule_once(lambda dt: self.process_detected_move(from_square + to_square))
+
+    def process_detected_move(self, move_str):
+        try:
+            self.process_move_from_str(move_str)
+        except Exception as e:
+            print(f"Error processing move: {e}")
+            self.ingame_message = f"Error: {str(e)[:30]}..."
+            Clock.schedule_once(lambda dt: self.go_to_first_piece_detection(), 0.5)
+
     def go_to_second_piece_detection(self):
         # Call the second piece detection function.
         self.second_piece_detection_poll()
 
     def process_move_from_str(self, move_str):
         print('Switch passed (or not used), processing move')
-        move = chess.Move.from_uci(move_str)
-        legal_moves = [m for m in self.board.legal_moves 
-                    if m.from_square == chess.parse_square(self.selected_piece)]
-        print("Legal moves:", legal_moves)
-        if move in legal_moves:
+        move = self.move_index.find(self.board, move_str)
+        if move is not None and self.selected_piece and move.from_square != chess.parse_square(self.selected_piece):
+            move = None
+        if move is not None:
             print("Legal move, executing it")
-            self.process_legal_player_move(move_str)
+            self.process_legal_player_move(move.uci())
         else:
             print("Illegal move, executing fallback")
             self.process_illegal_player_move(move_str)
@@ -945,46 +1066,38 @@ class ChessControlSystem:
     def on_board_turn(self):
         print("[State] Engine Turn")
         self.update_ui()
-        # Process the engine move asynchronously.
-        self.engine_thread = threading.Thread(target=self.compute_engine_move, daemon=True).start()
-        #self.compute_engine_move()
+        # The search runs on the engine thread and calls back when it's done
+        self.compute_engine_move()
 
     def compute_engine_move(self):
         self.ingame_message = "Engine Thinking.."
-        time.sleep(0.2)  # Simulate engine thinking time.
         self.update_ui()
 
-        if self.engine:
-            try:
-                result = self.engine.play(self.board, chess.engine.Limit(time=self.parameters['engine_time_limit']))
-                move = result.move
-                print(f"[Engine] Engine move: {move}")
-
-                self.ingame_message = "Executing Board Move"
-
-
-                if self.board.turn == chess.WHITE:
-                    is_white = True
-                else: 
-                    is_white = False
-
-
-                self.process_board_move(move, is_white)
-
-
-                # self.notify_observers()
-            except Exception as e:
-                print("[Engine] Error computing engine move:", e)
-            # finally:
-            #     print("[Engine] Shutting down engine...")
-            #     self.engine.quit()
-            #     self.engine = None
-        else:
+        key = chess.polyglot.zobrist_hash(self.board)
+        self.engine_search = self.engine.search(self.board, on_result=lambda move: self.on_engine_move(move, key))
+        if self.engine_search is None:
             legal_moves = list(self.board.legal_moves)
             if legal_moves:
                 move = legal_moves[0]
                 print(f"[Engine] Fallback move: {move}")
-                self.board.push(move)
+                self.material_tracker.push(self.board, move)
+
+    def on_engine_move(self, move, key):
+        # Runs on the engine thread, the gantry work goes to the board worker
+        self.engine_search = None
+        if move is None or key != chess.polyglot.zobrist_hash(self.board):
+            print("[Engine] Discarding stale engine move:", move)
+            return
+        print(f"[Engine] Engine move: {move}")
+        self.board_worker.submit(self.play_engine_move, move)
+
+    def play_engine_move(self, move):
+        try:
+            self.ingame_message = "Executing Board Move"
+            is_white = self.board.turn == chess.WHITE
+            self.process_board_move(move, is_white)
+        except Exception as e:
+            print("[Engine] Error playing engine move:", e)
         # Transition back to player's turn.
 
         # self.rocker.toggle()
@@ -995,12 +1108,9 @@ class ChessControlSystem:
     def end_game_processes(self):
         self.running = False
         self.victory_lap()
-        # Ensure that if an engine is still running, we shut it down.
-        if self.engine:
-            print("[Engine] Shutting down engine on game over...")
-            self.engine.quit()
-            # self.engine_thread.join()
-            self.engine = None
+        # The engine is kept for the next game, just stop it thinking
+        self.engine.cancel(self.engine_search)
+        self.engine_search = None
 
     # Example backend methods:
     def init_gantry(self):
@@ -1030,7 +1140,7 @@ class ChessControlSystem:
         self.legal_moves = None
         self.game_winner = None
 
-        self.captured_pieces = []
+        self.material_tracker.reset(self.board)
         self.move_history = []
 
         self.piece_images['k'] = 'assets/black_king.png'
@@ -1061,17 +1171,10 @@ class ChessControlSystem:
 
             print(f"Engine: {self.engine_path}")
 
-            if self.engine_path:
-                try:
-                    print(f"Trying to use engine: {self.engine}")
-                    self.engine = chess.engine.SimpleEngine.popen_uci(self.engine_path)
-                    self.engine.configure({"UCI_LimitStrength": True, "UCI_Elo": self.parameters['elo']})
-                    print(f"[Engine] Initialized engine at Elo {self.parameters['elo']}")
-                except Exception as e:
-                    print("[Engine] Error initializing engine:", e)
-                    self.engine = None
-            else:
-                self.engine = None
+            try:
+                self.engine.configure(elo=self.parameters['elo'], time_limit=self.parameters['engine_time_limit'])
+            except Exception as e:
+                print("[Engine] Error configuring engine:", e)
 
 
             pass
@@ -1115,6 +1218,11 @@ class ChessControlSystem:
         # Transition back to gameplay after setup.
         self.to_gameplay()
 
+    @property
+    def captured_pieces(self):
+        """Captured symbols in capture order, kept by the material tracker."""
+        return self.material_tracker.captured
+
     def reset_board(self):
         self.reset_control.full_reset(self.captured_pieces)
         self.done_reset()
@@ -1151,31 +1259,17 @@ class ChessControlSystem:
 # else:
 #     captured_piece = self.board.piece_at(move.to_square)
 
-        captured_symbol = None
-        # move = chess.Move.from_uci(move_str)
-        if self.board.is_capture(move):
-
-
-            if self.board.is_en_passant(move):
-                captured_square = chess.square(chess.square_file(move.to_square), chess.square_rank(move.from_square))
-                captured_piece = self.board.piece_at(captured_square)
-            else:
-                captured_piece = self.board.piece_at(move.to_square)
-
-            if captured_piece:
-                self.captured_pieces.append(captured_piece.symbol())
-                captured_symbol = captured_piece.symbol()
-
-                # Note: You might need special handling for en passant captures.
+        captured_symbol = self.material_tracker.captured_symbol(self.board, move)
         # self.notify_observers()
 
-        self.gantry.interpret_chess_move(f"{move}", self.board.is_capture(move), self.board.is_castling(move), self.board.is_en_passant(move), is_white, captured_symbol)
-
-        
+        is_capture = self.board.is_capture(move)
+        is_castling = self.board.is_castling(move)
+        is_en_passant = self.board.is_en_passant(move)
         self.move_history.append(move.uci())
     
         if self.is_move_checkmate(self.board, move):
             self.checkmate = True
+            gives_check = False
             if self.board.turn == chess.WHITE:
                 self.piece_images['k'] = 'assets/black_king_mate.png'
                 self.game_winner = 'White'
@@ -1184,20 +1278,19 @@ class ChessControlSystem:
                 self.game_winner = 'Black'
             
         elif self.board.gives_check(move):
+            gives_check = True
             if self.board.turn == chess.WHITE:
                 self.piece_images['k'] = 'assets/black_king_check.png'
             else:
                 self.piece_images['K'] = 'assets/white_king_check.png'
+
             # Make some indication
 
             self.check = f"{self.board.turn}"
             self.checkmate = False
 
-            self.rocker.toggle()
-            #time.sleep(0.3)
-            self.rocker.toggle()
-
         else:
+            gives_check = False
             if self.board.turn == chess.WHITE:
                 self.piece_images['k'] = 'assets/black_king.png'
             else:
@@ -1207,13 +1300,19 @@ class ChessControlSystem:
 
             self.checkmate = False
 
+        # Gantry, rocker and the next turn's prep all run at once
+        next_board = self.board.copy(stack=False)
+        next_board.push(move)
+        stages = self.start_board_move_stages(move, is_capture, is_castling, is_en_passant, is_white,
+                                              captured_symbol, gives_check, next_board)
+
         # self.legal_moves = None
         # print("pushing move:")
 
-        self.board.push(move)
-        self.notify_observers()
+        self.material_tracker.push(self.board, move)
+        self.notify_observers(POSITION, MESSAGES)
 
-        self.rocker.toggle()
+        self.turn_pipeline.join(stages)
 
         if self.checkmate:
             self.end_game()
@@ -1226,7 +1325,7 @@ class ChessControlSystem:
         self.demo_progress = 0
         self.game_winner = None
         self.board.reset()
-        self.captured_pieces = []
+        self.material_tracker.reset(self.board)
         self.move_history = []
 
         self.gantry.nextdead_white = (0, 435)
@@ -1262,7 +1361,7 @@ class ChessControlSystem:
     def toggle_clock(self):
         self.clock_logic.toggle_active_player()
 
-        self.notify_observers()
+        self.notify_observers(CLOCK)
 
 
     #################################################################################################################
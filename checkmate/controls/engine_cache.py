@@ -0,0 +1,132 @@
+import os
+import time
+import sqlite3
+import threading
+
+import chess
+import chess.polyglot
+
+
+class EngineCache:
+    """
+    Engine moves remembered across games in a small SQLite file.
+
+    Keyed by (Zobrist hash, Elo, time limit) so a different strength or move
+    time searches again. Holds at most max_entries rows; the least recently
+    used ones are dropped when it grows past that. Anything that goes wrong
+    with the file just turns the cache off, the engine still works without it.
+    """
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS moves (
+            key INTEGER NOT NULL,
+            elo INTEGER NOT NULL,
+            time_ms INTEGER NOT NULL,
+            move TEXT NOT NULL,
+            score INTEGER,
+            used REAL NOT NULL,
+            PRIMARY KEY (key, elo, time_ms)
+        )
+    """
+
+    def __init__(self, path, max_entries=20000):
+        self.path = path
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.db = None
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+
+        if not path:
+            return
+        try:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self.db = sqlite3.connect(path, check_same_thread=False)
+            self.db.execute("PRAGMA journal_mode=WAL")
+            self.db.execute("PRAGMA synchronous=NORMAL")
+            self.db.execute(self.SCHEMA)
+            self.db.execute("CREATE INDEX IF NOT EXISTS moves_used ON moves (used)")
+            self.db.commit()
+            print(f"[EngineCache] Opened {path} ({len(self)} moves)")
+        except (sqlite3.Error, OSError) as e:
+            print(f"[EngineCache] Could not open {path}: {e}")
+            self.db = None
+
+    @staticmethod
+    def key(board, elo, time_limit):
+        # SQLite integers are signed 64 bit
+        zobrist = chess.polyglot.zobrist_hash(board)
+        if zobrist >= 1 << 63:
+            zobrist -= 1 << 64
+        return zobrist, int(elo or 0), int(round(time_limit * 1000))
+
+    def get(self, board, elo, time_limit):
+        """The cached (move, score) for this position and strength, None on a miss."""
+        if self.db is None:
+            return None
+        key = self.key(board, elo, time_limit)
+        with self.lock:
+            try:
+                row = self.db.execute(
+                    "SELECT move, score FROM moves WHERE key=? AND elo=? AND time_ms=?", key).fetchone()
+                if row is not None:
+                    self.db.execute("UPDATE moves SET used=? WHERE key=? AND elo=? AND time_ms=?", (time.time(),) + key)
+                    self.db.commit()
+            except sqlite3.Error as e:
+                print("[EngineCache] Lookup failed:", e)
+                return None
+
+        if row is not None:
+            move = chess.Move.from_uci(row[0])
+            # A hash collision would give a move from some other position
+            if move in board.legal_moves:
+                self.hits += 1
+                return move, row[1]
+        self.misses += 1
+        return None
+
+    def put(self, board, elo, time_limit, move, score=None):
+        if self.db is None or move is None:
+            return
+        key = self.key(board, elo, time_limit)
+        with self.lock:
+            try:
+                self.db.execute("INSERT OR REPLACE INTO moves VALUES (?, ?, ?, ?, ?, ?)",
+                                key + (move.uci(), score, time.time()))
+                self._puts += 1
+                # Checking the size every put would cost a count each time
+                if self._puts % 100 == 0:
+                    self._evict()
+                self.db.commit()
+            except sqlite3.Error as e:
+                print("[EngineCache] Store failed:", e)
+
+    def _evict(self):
+        excess = self.db.execute("SELECT COUNT(*) FROM moves").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.db.execute("DELETE FROM moves WHERE rowid IN (SELECT rowid FROM moves ORDER BY used LIMIT ?)", (excess,))
+
+    def trim(self):
+        """Drop least recently used moves down to max_entries now."""
+        if self.db is None:
+            return
+        with self.lock:
+            self._evict()
+            self.db.commit()
+
+    def __len__(self):
+        if self.db is None:
+            return 0
+        with self.lock:
+            return self.db.execute("SELECT COUNT(*) FROM moves").fetchone()[0]
+
+    def close(self):
+        if self.db is None:
+            return
+        with self.lock:
+            self._evict()
+            self.db.commit()
+            self.db.close()
+            self.db = None
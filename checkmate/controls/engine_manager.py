@@ -0,0 +1,313 @@
+import asyncio
+import threading
+import concurrent.futures
+
+import chess
+import chess.engine
+import chess.polyglot
+
+
+class EngineManager:
+    """
+    One Stockfish process for the whole time the app is running, driven from
+    a single asyncio event loop thread.
+
+    start() launches the engine on that loop so the hash table is allocated
+    while the UI loads, configure() sets the strength for each game, and
+    search() runs a move search as an analysis that can be stopped early,
+    given more time or cancelled outright. Results come back through a
+    callback (on the engine thread) and a concurrent Future.
+
+    After each engine move it ponders on the reply it expects from the
+    player; if the player makes that move the next search carries on from
+    the pondered one instead of starting again from scratch.
+
+    sources (a MoveSources) is checked before the engine, so book and
+    tablebase moves come back without a search, even with no engine at all.
+    cache (an EngineCache) remembers searched moves across games and is
+    checked next.
+    """
+    def __init__(self, engine_path, options=None, ponder=True, sources=None, cache=None):
+        self.engine_path = engine_path
+        self.sources = sources
+        self.cache = cache
+        self.options = options or {}
+        self.ponder_enabled = ponder
+
+        self.loop = None
+        self.loop_thread = None
+        self.protocol = None
+        self.ready = threading.Event()
+        # Only one engine command at a time, created on the loop
+        self.command_lock = None
+        self.deadline_moved = None
+
+        self.elo = None
+        self.time_limit = 0.1
+        self.game = None
+
+        # The search currently running, for stop()/extend()
+        self.current = None
+        self.deadline = None
+
+        # Background search on the position after the predicted reply
+        self.ponder_key = None
+        self.ponder_search = None
+        self.ponder_started = None
+
+    # Event loop
+    def start(self):
+        """Start the engine thread and launch the engine on it, returns straight away."""
+        if self.loop_thread is not None or self.ready.is_set():
+            return
+        if not self.engine_path:
+            print("[Engine] No engine path, using the fallback moves")
+            self.ready.set()
+            return
+        self.loop = asyncio.new_event_loop()
+        self.loop_thread = threading.Thread(target=self._run_loop, daemon=True)
+        self.loop_thread.start()
+        self.submit(self._launch())
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    def submit(self, coro):
+        """Run a coroutine on the engine loop, returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop)
+
+    async def _launch(self):
+        self.command_lock = asyncio.Lock()
+        self.deadline_moved = asyncio.Event()
+        try:
+            _, protocol = await chess.engine.popen_uci(self.engine_path)
+            if self.options:
+                await protocol.configure(self.options)
+            # Make the engine allocate its hash now, not on the first move
+            await protocol.ping()
+            self.protocol = protocol
+            print(f"[Engine] Started {self.engine_path}")
+        except Exception as e:
+            print("[Engine] Error starting engine:", e)
+            self.protocol = None
+        finally:
+            self.ready.set()
+
+    def wait_ready(self, timeout=None):
+        """Block until the engine has started (or failed to). Returns True if it's usable."""
+        self.start()
+        self.ready.wait(timeout)
+        return self.protocol is not None
+
+    # Game setup
+    def configure(self, elo=None, time_limit=None):
+        """Set up a new game: strength and move time, and drop anything left from the last game."""
+        if time_limit is not None:
+            self.time_limit = time_limit
+        if not self.wait_ready():
+            # Still used to pick book and tablebase moves
+            self.elo = elo
+            return False
+        self.submit(self._configure(elo)).result()
+        print(f"[Engine] Configured at Elo {self.elo}, {self.time_limit}s per move")
+        return True
+
+    async def _configure(self, elo):
+        await self._stop_pondering()
+        async with self.command_lock:
+            if elo is not None and elo != self.elo:
+                await self.protocol.configure({"UCI_LimitStrength": True, "UCI_Elo": elo})
+                self.elo = elo
+            # A new game object makes python-chess send ucinewgame on the next search
+            self.game = object()
+
+    # Searching
+    def search(self, board, on_result=None, time_limit=None):
+        """
+        Start a search for the best move on board. Returns a Future for the
+        move, or None if there is no engine. on_result(move) is called on the
+        engine thread when the search finishes, not if it is cancelled.
+        Book, tablebase and cached moves skip the search.
+        """
+        board = board.copy()
+        move = self.sources.lookup(board, self.elo) if self.sources else None
+        if move is not None:
+            return self._known_move(move, on_result)
+
+        budget = self.time_limit if time_limit is None else time_limit
+        cached = self.cache.get(board, self.elo, budget) if self.cache is not None else None
+        if cached is not None:
+            print(f"[Engine] Cached move: {cached[0]}")
+            return self._known_move(cached[0], on_result)
+
+        if not self.wait_ready():
+            return None
+        return self.submit(self._search(board, budget, on_result))
+
+    def _known_move(self, move, on_result):
+        """A book, tablebase or cached move, delivered the same way as a search result."""
+        if self.loop is not None and self.protocol is not None:
+            return self.submit(self._deliver(move, on_result))
+        future = concurrent.futures.Future()
+        future.set_result(move)
+        if on_result:
+            on_result(move)
+        return future
+
+    async def _deliver(self, move, on_result):
+        # The position has moved on from whatever was being pondered
+        await self._stop_pondering()
+        if on_result:
+            on_result(move)
+        return move
+
+    def play(self, board, time_limit=None):
+        """Blocking search, returns the move."""
+        future = self.search(board, time_limit=time_limit)
+        return future.result() if future is not None else None
+
+    async def _search(self, board, budget, on_result):
+        async with self.command_lock:
+            analysis, started = self._take_ponder(board)
+            if analysis is None:
+                await self._stop_pondering()
+                analysis = await self.protocol.analysis(board, game=self.game)
+                started = self.loop.time()
+
+            self.current = analysis
+            self.deadline = started + budget
+            # Finishes early on its own for mates and forced moves
+            finished = asyncio.ensure_future(analysis.wait())
+            try:
+                while not finished.done():
+                    remaining = self.deadline - self.loop.time()
+                    if remaining <= 0:
+                        break
+                    self.deadline_moved.clear()
+                    moved = asyncio.ensure_future(self.deadline_moved.wait())
+                    try:
+                        await asyncio.wait({finished, moved}, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                    finally:
+                        moved.cancel()
+                analysis.stop()
+                best = await analysis.wait()
+            except asyncio.CancelledError:
+                analysis.stop()
+                print("[Engine] Search cancelled")
+                raise
+            finally:
+                self.current = None
+                self.deadline = None
+
+            move = best.move if best is not None else None
+            if self.cache is not None and move is not None:
+                score = analysis.info.get("score")
+                score = score.relative.score(mate_score=100000) if score is not None else None
+                self.cache.put(board, self.elo, budget, move, score)
+            if move is not None and best.ponder is not None:
+                await self._start_pondering(board, move, best.ponder)
+
+        if on_result:
+            on_result(move)
+        return move
+
+    def stop(self):
+        """Finish the running search now with the best move found so far."""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._set_deadline, 0)
+
+    def extend(self, seconds):
+        """Give the running search more time."""
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._set_deadline, seconds, True)
+
+    def _set_deadline(self, seconds, relative=False):
+        if self.deadline is None:
+            return
+        if relative:
+            self.deadline += seconds
+        else:
+            self.deadline = self.loop.time() + seconds
+        self.deadline_moved.set()
+
+    def cancel(self, future=None):
+        """Throw away a search and any pondering without a result. Doesn't block."""
+        if future is not None:
+            future.cancel()
+        if self.loop is not None and self.protocol is not None:
+            self.submit(self._stop_pondering())
+
+    # Pondering
+    def _take_ponder(self, board):
+        """If the ponder search was on this position, hand it over to the real search."""
+        analysis = self.ponder_search
+        if analysis is None or self.ponder_key != chess.polyglot.zobrist_hash(board):
+            return None, None
+        print("[Engine] Ponder hit")
+        started = self.ponder_started
+        self.ponder_search = None
+        self.ponder_key = None
+        return analysis, started
+
+    async def _start_pondering(self, board, move, predicted):
+        if not self.ponder_enabled:
+            return
+        ponder_board = board.copy()
+        ponder_board.push(move)
+        if predicted not in ponder_board.legal_moves:
+            return
+        ponder_board.push(predicted)
+        if ponder_board.is_game_over():
+            return
+        try:
+            self.ponder_search = await self.protocol.analysis(ponder_board, game=self.game)
+        except chess.engine.EngineError as e:
+            print("[Engine] Could not start pondering:", e)
+            self.ponder_search = None
+            return
+        self.ponder_key = chess.polyglot.zobrist_hash(ponder_board)
+        self.ponder_started = self.loop.time()
+
+    async def _stop_pondering(self):
+        analysis = self.ponder_search
+        self.ponder_search = None
+        self.ponder_key = None
+        if analysis is None:
+            return
+        analysis.stop()
+        try:
+            await analysis.wait()
+        except chess.engine.EngineError:
+            pass
+
+    def stop_pondering(self):
+        if self.loop is not None and self.protocol is not None:
+            self.submit(self._stop_pondering()).result()
+
+    # Shutdown
+    def quit(self):
+        """Shut the engine down, only when the app closes."""
+        if self.sources:
+            self.sources.close()
+        if self.cache is not None:
+            self.cache.close()
+        if self.loop is None:
+            return
+        self.ready.wait(5)
+        if self.protocol is not None:
+            try:
+                self.submit(self._quit()).result(5)
+            except Exception as e:
+                print("[Engine] Error shutting down engine:", e)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.loop_thread.join(5)
+        self.loop = None
+        print("[Engine] Engine shut down")
+
+    async def _quit(self):
+        await self._stop_pondering()
+        if self.current is not None:
+            self.current.stop()
+        await self.protocol.quit()
+        self.protocol = None
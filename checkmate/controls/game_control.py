@@ -7,6 +7,11 @@ import sys
 import random
 from transitions import Machine
 
+try:
+    from move_sources import MoveSources
+except:
+    from checkmate.controls.move_sources import MoveSources
+
 if sys.platform.startswith("linux"):
     running_on_pi = True
     
@@ -138,6 +143,8 @@ class ChessBackend(threading.Thread):
         self.engine_time_limit = engine_time_limit
         self.difficulty_level = difficulty_level  # 1 (easiest) to 10 (hardest)
         self.engine = None
+        # Book and tablebase moves are tried before the engine
+        self.move_sources = MoveSources("./bin/book.bin", "./bin/syzygy")
 
         self.first_move = True
         self.game_history = []
@@ -187,8 +194,10 @@ class ChessBackend(threading.Thread):
         with self.board_lock:
             if self.board.turn == self.engine_color or self.bot_mode:
                 try:
-                    result = self.engine.play(self.board, chess.engine.Limit(time=self.engine_time_limit))
-                    move = result.move
+                    move = self.move_sources.lookup(self.board, self.elo)
+                    if move is None:
+                        result = self.engine.play(self.board, chess.engine.Limit(time=self.engine_time_limit))
+                        move = result.move
                     print(f"Engine computed move: {move}")
                     self.move_history.append(move.uci())
 
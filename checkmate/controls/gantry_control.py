@@ -4,12 +4,439 @@ import serial
 import time
 import threading
 import sys
+import queue
+import collections
+import contextlib
+from concurrent.futures import Future
 
 # from transitions import Machine
-from kivy.clock import Clock
+
+try:
+    from move_plans import MovePlanTable, MovePlan, PATH, DEADZONE, square_to_coord
+    from path_planner import PathPlanner, simplify_path
+except:
+    from checkmate.controls.move_plans import MovePlanTable, MovePlan, PATH, DEADZONE, square_to_coord
+    from checkmate.controls.path_planner import PathPlanner, simplify_path
 
 STEP_MM = 25
 
+GRBL_RX_BUFFER_SIZE = 128   # bytes in GRBL's serial receive buffer
+IDLE_SETTLE_TIME = 0.1      # GRBL may still report Idle right after the last "ok"
+STATUS_POLL_RATE = 10       # Hz, '?' reports requested by the reader thread (GRBL is happy up to ~20)
+STATUS_TIMEOUT = 0.5
+
+# Single byte commands GRBL picks out of the stream immediately; they never
+# occupy the RX buffer and never get an "ok".
+REALTIME_COMMANDS = ("?", "!", "~", "\x18")
+
+
+class GrblError(Exception):
+    pass
+
+
+class GrblStatus:
+    """A parsed status report, e.g. <Idle|MPos:0.000,0.000,0.000|FS:0,0>"""
+    def __init__(self, raw):
+        self.raw = raw
+        self.timestamp = time.time()
+        fields = raw.strip("<>").split("|")
+        # Sub-states like Hold:0 / Door:1 keep only the main state
+        self.state = fields[0].split(":")[0]
+        self.mpos = None
+        self.wpos = None
+        self.fields = {}
+        for field in fields[1:]:
+            if ":" not in field:
+                continue
+            key, value = field.split(":", 1)
+            self.fields[key] = value
+            if key in ("MPos", "WPos"):
+                try:
+                    coords = tuple(float(c) for c in value.split(","))
+                except ValueError:
+                    continue
+                if key == "MPos":
+                    self.mpos = coords
+                else:
+                    self.wpos = coords
+
+    @property
+    def position(self):
+        return self.mpos if self.mpos is not None else self.wpos
+
+    def __repr__(self):
+        return f"GrblStatus({self.raw})"
+
+
+class GrblEvent:
+    """One line received from GRBL, tagged with what kind of line it is."""
+    OK = "ok"
+    ERROR = "error"
+    ALARM = "alarm"
+    STATUS = "status"
+    MESSAGE = "message"
+    OTHER = "other"
+
+    def __init__(self, kind, raw, code=None, status=None):
+        self.kind = kind
+        self.raw = raw
+        self.code = code
+        self.status = status
+
+    @classmethod
+    def parse(cls, line):
+        if line == "ok":
+            return cls(cls.OK, line)
+        if line.startswith("error:"):
+            return cls(cls.ERROR, line, code=line.split(":", 1)[1])
+        if line.startswith("ALARM:"):
+            return cls(cls.ALARM, line, code=line.split(":", 1)[1])
+        if line.startswith("<") and line.endswith(">"):
+            return cls(cls.STATUS, line, status=GrblStatus(line))
+        if line.startswith("["):
+            return cls(cls.MESSAGE, line)
+        return cls(cls.OTHER, line)
+
+    def __repr__(self):
+        return f"GrblEvent({self.kind}, {self.raw})"
+
+
+class GrblReader:
+    """
+    The only thing allowed to read from the GRBL serial port.
+
+    Every line is parsed into a GrblEvent and routed:
+      ok / error / ALARM  -> self.responses, consumed in order by the streamer
+      status reports      -> self.status (latest report) and any watch() futures
+      everything          -> listeners registered with subscribe()
+    so nobody has to flush the input to get rid of replies meant for someone else.
+
+    The reader also sends '?' itself at poll_rate Hz, so the machine state and
+    position are always cached and nobody else needs to busy-poll for them.
+    """
+    def __init__(self, ser, serial_lock, poll_rate=STATUS_POLL_RATE):
+        self.ser = ser
+        self.serial_lock = serial_lock
+        self.responses = queue.Queue()
+        self.listeners = []
+        self.watchers = []
+        self.lock = threading.Lock()
+
+        self.status = None      # latest GrblStatus
+        self.settings = {}      # $N=value lines, e.g. {110: 15000.0} after a "$$"
+        self.alarm = None       # last ALARM event, cleared once GRBL leaves the Alarm state
+        self.wco = None         # work coordinate offset, only reported every few status reports
+        self.poll_interval = 0
+        self.next_poll = 0
+        self.set_poll_rate(poll_rate)
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def set_poll_rate(self, rate):
+        """Status reports per second, 0 stops the automatic polling."""
+        self.poll_interval = 1.0 / rate if rate else 0
+
+    def subscribe(self, callback, kinds=None):
+        """callback(event) runs on the reader thread for every event (or only the given kinds)."""
+        with self.lock:
+            self.listeners.append((callback, kinds))
+
+    def unsubscribe(self, callback):
+        with self.lock:
+            self.listeners = [(cb, kinds) for cb, kinds in self.listeners if cb != callback]
+
+    def watch(self, predicate):
+        """
+        Future resolved with the first status report for which predicate(status)
+        is true, including the one currently cached.
+        """
+        future = Future()
+        with self.lock:
+            if self.status is not None and predicate(self.status):
+                future.set_result(self.status)
+                return future
+            self.watchers.append((predicate, future))
+        return future
+
+    def query_status(self, since=None):
+        """
+        Future for the next status report newer than `since` (default: now).
+        Sends a '?' straight away instead of waiting for the next poll.
+        """
+        since = time.time() if since is None else since
+        future = self.watch(lambda status: status.timestamp >= since)
+        if not future.done():
+            self.request_status()
+        return future
+
+    def request_status(self):
+        with self.serial_lock:
+            self.ser.write(b"?")
+
+    def stop(self):
+        self.running = False
+
+    def _run(self):
+        while self.running:
+            now = time.time()
+            if self.poll_interval and now >= self.next_poll:
+                self.next_poll = now + self.poll_interval
+                self.request_status()
+            try:
+                line = self.ser.readline().decode(errors="ignore").strip()
+            except Exception as e:
+                print(f"[GRBL] Serial read failed: {e}")
+                time.sleep(0.5)
+                continue
+            if line:
+                self._dispatch(GrblEvent.parse(line))
+
+    def _dispatch(self, event):
+        if event.kind in (GrblEvent.OK, GrblEvent.ERROR, GrblEvent.ALARM):
+            self.responses.put(event)
+        if event.kind in (GrblEvent.ALARM, GrblEvent.MESSAGE):
+            print(f"[GRBL] {event.raw}")
+
+        ready = []
+        with self.lock:
+            if event.kind == GrblEvent.OTHER and event.raw.startswith("$") and "=" in event.raw:
+                number, value = event.raw[1:].split("=", 1)
+                try:
+                    self.settings[int(number)] = float(value)
+                except ValueError:
+                    pass
+            elif event.kind == GrblEvent.ALARM:
+                self.alarm = event
+            elif event.kind == GrblEvent.STATUS:
+                status = event.status
+                if "WCO" in status.fields:
+                    try:
+                        self.wco = tuple(float(c) for c in status.fields["WCO"].split(","))
+                    except ValueError:
+                        pass
+                if status.wpos is None and status.mpos is not None and self.wco is not None:
+                    status.wpos = tuple(m - o for m, o in zip(status.mpos, self.wco))
+                if status.state != "Alarm":
+                    self.alarm = None
+                self.status = status
+
+                waiting = []
+                for predicate, future in self.watchers:
+                    if future.cancelled():
+                        continue
+                    if predicate(status):
+                        ready.append(future)
+                    else:
+                        waiting.append((predicate, future))
+                self.watchers = waiting
+            listeners = list(self.listeners)
+
+        for future in ready:
+            if future.set_running_or_notify_cancel():
+                future.set_result(event.status)
+        for callback, kinds in listeners:
+            if kinds is None or event.kind in kinds:
+                try:
+                    callback(event)
+                except Exception as e:
+                    print(f"[GRBL] Listener failed: {e}")
+
+
+class StreamJob:
+    """A batch of G-code lines handed to the streamer, completed as one future."""
+    def __init__(self, lines, on_ack=None):
+        self.lines_left = len(lines)
+        self.errors = []
+        self.future = Future()
+        self.on_ack = on_ack
+
+
+class GrblStreamer:
+    """
+    Streams G-code to GRBL using the character-counting protocol.
+
+    GRBL answers every line with "ok" (or "error:N") once the line has been
+    pulled out of its 128 byte RX buffer. Remembering the length of every line
+    still waiting for its answer lets us keep that buffer, and so the planner,
+    full instead of doing a write/"ok" round trip per line. Jobs queued back to
+    back (e.g. capture to deadzone, then the main move) stream without a gap.
+
+    A job's future resolves once all of its lines are acknowledged and GRBL
+    reports Idle, i.e. the motion has actually finished. The answers come from
+    the GrblReader, the streamer itself never reads the port.
+    """
+    def __init__(self, ser, serial_lock, reader, rx_buffer_size=GRBL_RX_BUFFER_SIZE):
+        self.ser = ser
+        self.serial_lock = serial_lock
+        self.reader = reader
+        self.rx_buffer_size = rx_buffer_size
+
+        self.pending = queue.Queue()            # (line, job) not yet written
+        self.in_flight = collections.deque()    # (size, job, sync) written, waiting for "ok"
+        self.buffered = 0                       # bytes currently sitting in GRBL's RX buffer
+        self.awaiting_idle = []                 # fully acknowledged jobs waiting for Idle
+        self.last_ack_time = 0
+        self._next = None
+
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def submit(self, lines, on_ack=None):
+        """
+        Queue a list of G-code lines and return a future for their completion.
+        on_ack is called (on the streamer thread) once GRBL has answered every
+        line of this job, without waiting for Idle, so jobs further back in
+        the stream can be tracked one by one.
+        """
+        lines = [line.strip() for line in lines if line.strip()]
+        job = StreamJob(lines, on_ack)
+        if not lines:
+            if on_ack is not None:
+                on_ack()
+            job.future.set_result(True)
+            return job.future
+        for line in lines:
+            self.pending.put((line, job))
+        return job.future
+
+    def busy(self):
+        return self._next is not None or not self.pending.empty() or bool(self.in_flight) or bool(self.awaiting_idle)
+
+    def stop(self):
+        self.running = False
+        self.pending.put(None)
+
+    def is_sync_line(self, line):
+        # '$' settings write EEPROM, GRBL asks for these to be sent one at a time.
+        return line.startswith("$") and not line.startswith("$J=")
+
+    def _run(self):
+        while self.running:
+            self._fill_buffer()
+            if self.in_flight:
+                self._handle_response()
+            elif self.awaiting_idle:
+                self._poll_idle()
+            elif self._next is None:
+                # Nothing to do, block until the next line arrives.
+                item = self.pending.get()
+                if item is None:
+                    break
+                self._next = item
+
+    def _fill_buffer(self):
+        while True:
+            if self._next is None:
+                try:
+                    self._next = self.pending.get_nowait()
+                except queue.Empty:
+                    return
+                if self._next is None:
+                    self.running = False
+                    return
+
+            line, job = self._next
+            size = len(line) + 1
+            sync = self.is_sync_line(line)
+            if not self.in_flight:
+                # Nothing of ours is waiting for an answer, so anything queued
+                # is left over (late oks after an alarm, an unsolicited ALARM)
+                self._discard_responses()
+            if self.in_flight:
+                if sync or self.in_flight[-1][2]:
+                    return
+                if self.buffered + size > self.rx_buffer_size:
+                    return
+
+            with self.serial_lock:
+                self.ser.write(str.encode(line + "\n"))
+            self.in_flight.append((size, job, sync))
+            self.buffered += size
+            self._next = None
+
+    def _handle_response(self):
+        try:
+            event = self.reader.responses.get(timeout=0.1)
+        except queue.Empty:
+            return
+
+        if event.kind == GrblEvent.ALARM:
+            self._fail_all(GrblError(event.raw))
+            return
+
+        size, job, _ = self.in_flight.popleft()
+        self.buffered -= size
+        self.last_ack_time = time.time()
+        if event.kind == GrblEvent.ERROR:
+            print(f"[GRBL] {event.raw}")
+            job.errors.append(event.raw)
+        job.lines_left -= 1
+        if job.lines_left == 0:
+            self.awaiting_idle.append(job)
+            if job.on_ack is not None:
+                try:
+                    job.on_ack()
+                except Exception as e:
+                    print(f"[GRBL] Ack callback failed: {e}")
+
+    def _poll_idle(self):
+        # Only trust reports taken after GRBL had a moment to start the motion
+        # it just acknowledged, otherwise the last Idle before the move counts.
+        since = self.last_ack_time + IDLE_SETTLE_TIME
+        future = self.reader.watch(lambda status: status.timestamp >= since and status.state in ("Idle", "Alarm"))
+        if not self.reader.poll_interval:
+            time.sleep(max(0, since - time.time()))
+            self.reader.request_status()
+        try:
+            status = future.result(STATUS_TIMEOUT)
+        except Exception:
+            # Still moving (or no report in time), check for new lines first
+            future.cancel()
+            return
+
+        if status.state == "Idle":
+            jobs, self.awaiting_idle = self.awaiting_idle, []
+            for job in jobs:
+                if job.errors:
+                    job.future.set_exception(GrblError(", ".join(job.errors)))
+                else:
+                    job.future.set_result(True)
+        else:
+            self._fail_all(GrblError(status.raw))
+
+    def _discard_responses(self):
+        while True:
+            try:
+                event = self.reader.responses.get_nowait()
+            except queue.Empty:
+                return
+            print(f"[GRBL] Dropped stale response: {event.raw}")
+
+    def _fail_all(self, error):
+        jobs = [job for _, job, _ in self.in_flight] + self.awaiting_idle
+        if self._next is not None:
+            jobs.append(self._next[1])
+            self._next = None
+        while True:
+            try:
+                item = self.pending.get_nowait()
+            except queue.Empty:
+                break
+            if item is not None:
+                jobs.append(item[1])
+        self.in_flight.clear()
+        self.buffered = 0
+        self.awaiting_idle = []
+        # GRBL can still answer lines it had buffered, they belong to the failed jobs
+        self._discard_responses()
+        for job in jobs:
+            if not job.future.done():
+                job.future.set_exception(error)
+
+
 class GantryControl:
         def __init__(self, **kwargs):
             #self.hall = SenseLayer()
@@ -26,6 +453,11 @@ class GantryControl:
             self.white_captured = []
             self.black_captured = []
 
+            # Precompiled gantry paths for every move, see move_plans.py
+            self.move_plans = MovePlanTable()
+            # A* around the other pieces for quiet moves, see path_planner.py
+            self.planner = PathPlanner()
+
             self.jog_step = 4
             self.overshoot = 4
             self.magnet_state =  "MOVE MODE"
@@ -41,12 +473,28 @@ class GantryControl:
                                         "g1": (0, 2),  "g2": (2, 2), "g3": (4, 2), "g4": (6, 2), "g5": (8, 2), "g6": (10, 2), "g7": (12, 2), "g8": (14, 2),
                                         "h1": (0, 0),  "h2": (2, 0), "h3": (4, 0), "h4": (6, 0), "h5": (8, 0), "h6": (10, 0), "h7": (12, 0), "h8": (14, 0)}
             
-            self.ser = serial.Serial("/dev/ttyACM0", 115200)
+            # Stream G-code with character counting instead of stop-and-wait.
+            # With streaming off each line still waits for its "ok" first.
+            self.streaming = True
+            self.status_poll_rate = STATUS_POLL_RATE
+            self.reader = None
+            self.streamer = None
+            self.last_motion_future = None
+            self.last_path_time = 0.0
+            self.last_move_time = 0.0
+            self._batch = threading.local()
+
+            self.ser = serial.Serial("/dev/ttyACM0", 115200, timeout=0.1)
             self.send("\r\n\r")
             time.sleep(2)
             self.ser.flushInput()  
             self.position = None
 
+            # From here on the reader thread owns every read from the port
+            self.reader = GrblReader(self.ser, self.serial_lock, self.status_poll_rate)
+            rx_buffer_size = GRBL_RX_BUFFER_SIZE if self.streaming else 1
+            self.streamer = GrblStreamer(self.ser, self.serial_lock, self.reader, rx_buffer_size)
+
 
         def home(self):
             self.send("$H")
@@ -56,56 +504,130 @@ class GantryControl:
             self.set_acceleration(700)
 
         def send(self, command):
-            with self.serial_lock:
-                self.ser.write(str.encode(command + "\n"))
+            if command in REALTIME_COMMANDS:
+                with self.serial_lock:
+                    self.ser.write(str.encode(command))
+            elif self.streamer:
+                # Count every line so acknowledgements stay in step with the streamer.
+                return self.streamer.submit([command])
+            else:
+                # Only before the reader is up, e.g. waking GRBL in __init__
+                with self.serial_lock:
+                    self.ser.write(str.encode(command + "\n"))
         
         def set_velocity(self, velocity):
             self.send(f"$110={velocity}")
             self.send(f"$111={velocity}")
+            self.planner.set_limits(max_rate=velocity / 60)
         
         def set_acceleration(self, acceleration):
             self.send(f"$120={acceleration}")
             self.send(f"$121={acceleration}")
+            self.planner.set_limits(acceleration=acceleration)
+
+        def read_settings(self, timeout=STATUS_TIMEOUT):
+            """
+            Ask GRBL for its settings ($$) and plan with its real max rates
+            ($110/$111, mm/min) and accelerations ($120/$121, mm/s^2).
+            The slower axis of each pair limits diagonal moves.
+            """
+            try:
+                self.send("$$").result(timeout)
+            except Exception as e:
+                print(f"[GRBL] Could not read settings: {e}")
+                return dict(self.reader.settings)
+            settings = dict(self.reader.settings)
+            if 110 in settings and 111 in settings:
+                self.planner.set_limits(max_rate=min(settings[110], settings[111]) / 60)
+            if 120 in settings and 121 in settings:
+                self.planner.set_limits(acceleration=min(settings[120], settings[121]))
+            return settings
+
+        def estimate_path_time(self, path):
+            """Seconds the gantry should take for a [absolute start, relative moves...] path."""
+            return self.planner.estimate(path, self.overshoot)
         
+        def get_status(self, fresh=False, timeout=STATUS_TIMEOUT):
+            """
+            Latest cached GrblStatus. With fresh=True ask GRBL for a new report
+            instead. Returns None if there is nothing to report.
+            """
+            if fresh or self.reader.status is None:
+                try:
+                    return self.reader.query_status().result(timeout)
+                except Exception:
+                    return None
+            return self.reader.status
+
+        def set_status_rate(self, rate):
+            """How often (Hz) the reader asks GRBL for a status report."""
+            self.status_poll_rate = rate
+            self.reader.set_poll_rate(rate)
+
+        def subscribe_status(self, callback):
+            """callback(status) for every status report, runs on the reader thread."""
+            def on_event(event):
+                callback(event.status)
+            callback._grbl_listener = on_event
+            self.reader.subscribe(on_event, kinds=(GrblEvent.STATUS,))
+
+        def unsubscribe_status(self, callback):
+            listener = getattr(callback, "_grbl_listener", None)
+            if listener:
+                self.reader.unsubscribe(listener)
+
+        def _wait(self, predicate, timeout):
+            future = self.reader.watch(predicate)
+            try:
+                return future.result(timeout)
+            except Exception:
+                future.cancel()
+                return None
+
+        def wait_for_idle(self, timeout=None):
+            """Block until all queued motion is done and GRBL reports Idle."""
+            if self.last_motion_future is not None:
+                try:
+                    self.last_motion_future.result(timeout)
+                except Exception:
+                    pass
+            since = time.time()
+            return self._wait(lambda status: status.timestamp >= since and status.state == "Idle", timeout)
+
+        def wait_for_position(self, x, y, tolerance=0.5, timeout=None):
+            """Block until the work position is within tolerance (mm) of (x, y)."""
+            def reached(status):
+                pos = status.wpos if status.wpos is not None else status.position
+                return pos is not None and abs(pos[0] - x) <= tolerance and abs(pos[1] - y) <= tolerance
+            return self._wait(reached, timeout)
+
+        def wait_for_alarm(self, timeout=None):
+            """Block until GRBL raises an alarm, returns the status or None on timeout."""
+            return self._wait(lambda status: status.state == "Alarm" or self.reader.alarm is not None, timeout)
+
         def get_position(self, max_attempts=10, delay=0.1):
             for _ in range(max_attempts):
-                self.send("?")
-                response = self.serial.readline().decode().strip()
-                
-                if 'MPos:' in response:
-                    pos_part = response.split('MPos:')[1].split('|')[0]
-                    coords = pos_part.split(',')
-                elif 'WPos:' in response:
-                    pos_part = response.split('WPos:')[1].split('|')[0]
-                    coords = pos_part.split(',')
-                else:
-                    continue 
+                status = self.get_status()
+                if status is None or status.position is None:
+                    time.sleep(delay)
+                    continue
                     
-                x = int(float(coords[0]) + 475)
-                y = int(float(coords[1]) + 486)
+                x = int(status.position[0] + 475)
+                y = int(status.position[1] + 486)
                 
                 return x, y   
             return None, None  
 
         def is_idle(self):
-            self.send("?")
-            response = self.ser.readline().decode().strip()
-
-            if "Idle" in response:
-                return True
-            else:
+            if self.streamer.busy():
                 return False
 
+            status = self.get_status()
+            return status is not None and status.state == "Idle"
+
         def move(self, x, y):
             ''' Absolute positioning'''
-            self.send(f"G90 X{x} Y{y}")
-            time.sleep(0.05) 
-
-            self.ser.flushInput()
-            while True:
-                if self.is_idle():
-                    self.ser.flushInput()
-                    break
+            self.send_commands([f"G90 X{x} Y{y}"], wait=True)
     
         def send_jog_command(self, dx, dy):
             """
@@ -119,7 +641,7 @@ class GantryControl:
                 cmd += f"Y{dy * step}"
             self.send(cmd)
 
-        def send_coordinates_command(self, location):
+        def send_coordinates_command(self, location, wait=True):
             """
             Construct and send the jog command based on dx, dy, and the current jog step size.
             Figure out the gcode move command
@@ -134,15 +656,7 @@ class GantryControl:
                 cmd += f"X{x}"
             if y:
                 cmd += f"Y{y}"
-            self.send(f"G90X{x}Y{y}")
-
-            while True:
-                self.ser.write(b'?')
-                status = self.ser.readline().decode().strip()
-                #print(f"Status: {status}")
-                if '<Idle' in status:
-                    break
-                time.sleep(0.5)
+            return self.send_commands([f"G90X{x}Y{y}"], wait=wait)
 
         def toggle_magnet(self):
             self.send("M8")
@@ -212,857 +726,47 @@ class GantryControl:
             y = (ord('h') - ord(file)) * 2
             return (x, y)
         
-        def interpret_chess_move(self, move_str, is_capture, is_castling, is_en_passant, is_white, symbol):
+        def interpret_chess_move(self, move_str, is_capture, is_castling, is_en_passant, is_white, symbol, wait=True, occupied=None):
             """
-            Given a move string (e.g. "e2e4") and a step_value (in mm),
-            returns the relative displacement as a tuple (dx_mm, dy_mm).
+            Plan and execute a chess move on the gantry.
+
+            Every segment of the move (rook then king for castling, captured piece
+            to the deadzone then the capturing piece) is streamed back to back, so
+            the planner stays full for the whole move. With wait=False this returns
+            straight away; self.last_motion_future completes when the gantry stops.
+
+            Given the occupied bitboard from before the move, a quiet move is
+            routed around the pieces actually on the board instead of taking
+            the fixed path from the table.
             """
             if len(move_str) < 4:
                 raise ValueError("Move string must be at least 4 characters (e.g. 'e2e4').")
-            
-            print(f"Interpreting move: {move_str}")
-
-            print(f"Capture state: {is_capture}")
-
-            
-            start_square = move_str[:2]
-            end_square = move_str[2:4]
-
-            #print(f"Move again: {start_square}, {end_square}")
-            
-            start_coord = self.square_to_coord(start_square)
-            end_coord = self.square_to_coord(end_square)
-
-            start_coord = (start_coord[0]*STEP_MM, start_coord[1]*STEP_MM)
-            end_coord = (end_coord[0]*STEP_MM, end_coord[1]*STEP_MM)
-
-            # Compute the difference in "steps"
-            dx = end_coord[0] - start_coord[0]
-            dy = end_coord[1] - start_coord[1]
-
-            #print(dx)
-            #print(dy)
-
-            offset = STEP_MM
-
-            print(f"Start square: {start_coord}, end square: {end_coord}")
-            ###### Need to check if king ##### otherwise this will always trigger 
-            if is_castling:
-                print("in castle")
-
-                #All notes in perspective of white
-
-                # White king to the left
-                if end_square == 'c1':
-                    # Rook path
-                    path = [(0, 14*offset), (0, -6*offset)]
-                    movements = self.parse_path_to_movement(path)
-                    commands = self.movement_to_gcode(movements)
-                    #print(f"Rook comamnds: {commands}")
-                    self.send_commands(commands)
-
-                    # King_path
-                    path = [(start_coord), (offset, offset), (0, 2*offset), (-offset, offset)]
-
-
-                    movements = self.parse_path_to_movement(path)
-                    commands = self.movement_to_gcode(movements)
-                    #print(f"Rook comamnds: {commands}")
-                    self.send_commands(commands)
-                    return path
-                    
-
-                
-                # White king to the right
-                elif end_square == 'g1':
-
-                    # Rook path
-                    path = [(0, 0), (0, 4*offset)]
-                    movements = self.parse_path_to_movement(path)
-                    commands = self.movement_to_gcode(movements)
-                    #print(f"rook comamnds: {commands}")
-                    self.send_commands(commands)
-
-                    # King_path
-                    path = [(start_coord), (offset, -offset), (0, -2*offset), (-offset, -offset)]
-
-                    movements = self.parse_path_to_movement(path)
-                    commands = self.movement_to_gcode(movements)
-                    #print(f"king comamnds: {commands}")
-                    self.send_commands(commands)
-                    return path
-                    
-                 # black king to the left
-                if end_square == 'c8':
-                    # Rook path
-                    path = [(14*offset, 14*offset), (0, -6*offset)]
-                    movements = self.parse_path_to_movement(path)
-                    commands = self.movement_to_gcode(movements)
-                    #print(f"Rook comamnds: {commands}")
-                    self.send_commands(commands)
-
-                    # King_path
-                    path = [(start_coord), (-offset, offset), (0, 2*offset), (offset, offset)]
-
-                    movements = self.parse_path_to_movement(path)
-                    commands = self.movement_to_gcode(movements)
-                    #print(f"king comamnds: {commands}")
-                    self.send_commands(commands)
-                    return path
-
-                # White king to the right
-                elif end_square == 'g8':
-
-                    # Rook path
-                    path = [(14*offset, 0), (0, 4*offset)]
-                    movements = self.parse_path_to_movement(path)
-                    commands = self.movement_to_gcode(movements)
-                    print(f"Rook comamnds: {commands}")
-                    self.send_commands(commands)
-
-                    # King_path
-                    path = [(start_coord), (-offset, -offset), (0, -2*offset), (offset, -offset)]
-                    movements = self.parse_path_to_movement(path)
-                    commands = self.movement_to_gcode(movements)
-                    print(f"king comamnds: {commands}")
-                    self.send_commands(commands)
-                    return path
-
-
-                # For castling, need to move rook to new position, then slide king around it vertically. 
-                # Need to know colour, , which rook is being moved
-                
-    
-                
-            
-            else: 
-                print('Not a castle')
-
-                # Computational method for determineing if it is a knight.
-                if min(abs(dx), abs(dy)) == 0 or abs(dx) == abs(dy):
-                    print("Not a knight")
-
-                    path = [(start_coord[0], start_coord[1]), (dx, dy)]   
-                else:
-                    print("Probably a horse")
-                    angled_movement = (self.sign(dx) * offset, self.sign(dy)*offset)
-                    #print(angled_movement)
-
-                    # inital offset is (sign(dx) * dx, sing(dy)*dy)
-                    if abs(dx) > abs(dy):
-                        path = [start_coord, angled_movement, (2*self.sign(dx)*offset, 0), angled_movement]
-                    else:
-                        path = [start_coord, angled_movement, (0, 2*self.sign(dy)*offset), angled_movement]
-                 
-
-            
-            if is_capture:
-                print('Is capture')
-
-                dx_sign = self.sign(dx)
-                dy_sign = self.sign(dy)
-
-
-                if is_en_passant:
-                    print("Is en passant")
-
-                    commands = self.movement_to_gcode(path)
-                    self.send_commands(commands)
 
+            print(f"Interpreting move: {move_str}, capture: {is_capture}")
 
-                    # moved captured piece off square
-                    path = [(end_coord[0]- 2*offset*dx_sign, end_coord[1]), (offset*dx_sign, offset)]
+            # All the planning was done when the table was built, only the
+            # deadzone slot depends on the game so far.
+            plan = self.move_plans.lookup(move_str, is_capture, is_castling, is_en_passant)
 
-                    commands = self.movement_to_gcode(path)
-                    self.send_commands(commands)
-
-                    dead_coordinates = (end_coord[0]-offset*dx_sign, end_coord[1]+offset)
-                    self.to_deadzone(dead_coordinates, is_white, symbol)
-                    return (path)
-
-
-                # Need to make literal edge case
-
-                elif end_square[1] == '8' or end_square[1] == '1' or end_square[0] == 'h':
-                    print("Is edge case")
-                    #edged
-                    
-                    
-                    if end_square == 'h1':
-
-                        if dx_sign == 0 and dy_sign == -1:
-                            #straight right
-
-                            # Take away 25mm from last movement, so piece is on the edge
-                            end_x, end_y = path[-1]
-                            new_end_x =  end_x - self.sign(end_x)*offset
-                            new_end_y = end_y - self.sign(end_y)*offset
-                            path[-1] = (new_end_x, new_end_y)
-
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            #move piece off center in +x direction 
-                            path = [end_coord, (offset, 0)]
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            # put capturing piece in square
-                            path = [(end_coord[0], end_coord[1]+offset), (0, -offset)]
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-
-                            # take capturing piece to deadzone
-                            dead_coordinates = (end_coord[0] + offset, end_coord[1])
-                            self.to_deadzone(dead_coordinates, is_white, symbol)
-                            return (path)
-
-                        elif dx_sign == -1 and dy_sign == 0:
-                            #straight in
-                            # Take away 50mm, then angle and dive in
-                            end_x, end_y = path[-1]
-                            new_end_x =  end_x - self.sign(end_x)*2*offset
-                            new_end_y = end_y - self.sign(end_y)*2*offset
-                            path[-1] = (new_end_x, new_end_y)
-                            path.append((-offset, offset))
-                            path.append((-offset, 0))
-
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            #move piece off center in +x direction 
-                            path = [end_coord, (offset, 0)]
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            # put capturing piece in square
-                            path = [(end_coord[0], end_coord[1]+offset), (0, -offset)]
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            # take capturing piece to deadzone
-                            dead_coordinates = (end_coord[0] + offset, end_coord[1])
-                            self.to_deadzone(dead_coordinates, is_white, symbol)
-                            return (path)
-
-
-                        elif dx_sign == -1 and dy_sign == -1:
-                            #angled close right 
-                            end_x, end_y = path[-1]
-                            new_end_x =  end_x - self.sign(end_x)*offset
-                            new_end_y = end_y - self.sign(end_y)*offset
-                            path[-1] = (new_end_x, new_end_y)
-                            path.append((-offset, 0))
-
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            #move piece off center in +x direction 
-                            path = [end_coord, (offset, 0)]
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            # put capturing piece in square
-                            path = [(end_coord[0], end_coord[1]+offset), (0, -offset)]
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            # take capturing piece to deadzone
-                            dead_coordinates = (end_coord[0] + offset, end_coord[1])
-                            self.to_deadzone(dead_coordinates, is_white, symbol)
-                            return (path)
-
-
-                    elif end_square == 'h8':
-
-                        if dx_sign == 1 and dy_sign == -1:
-                            #angled far right
-                            end_x, end_y = path[-1]
-                            new_end_x =  end_x - self.sign(end_x)*offset
-                            new_end_y = end_y - self.sign(end_y)*offset
-                            path[-1] = (new_end_x, new_end_y)
-                            path.append((offset, 0))
-
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            #move piece off center in -x direction 
-                            path = [end_coord, (-offset, 0)]
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            # put capturing piece in square
-                            path = [(end_coord[0], end_coord[1]+offset), (0, -offset)]
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            # take capturing piece to deadzone
-                            dead_coordinates = (end_coord[0] - offset, end_coord[1])
-                            self.to_deadzone(dead_coordinates, is_white, symbol)
-                            return (path)
-
-                        elif dx_sign == 0 and dy_sign == -1:
-                            # Take away 25mm from last movement, so piece is on the edge
-                            end_x, end_y = path[-1]
-                            new_end_x =  end_x - self.sign(end_x)*offset
-                            new_end_y = end_y - self.sign(end_y)*offset
-                            path[-1] = (new_end_x, new_end_y)
-
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            #move piece off center in -x direction 
-                            path = [end_coord, (-offset, 0)]
-
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            # put capturing piece in square
-                            path = [(end_coord[0], end_coord[1]+offset), (0, -offset)]
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            # take capturing piece to deadzone
-                            dead_coordinates = (end_coord[0] - offset, end_coord[1])
-                            self.to_deadzone(dead_coordinates, is_white, symbol)
-                            return (path)
-                        
-                        elif dx_sign == 1 and dy_sign == 0:
-                             # Take away 50mm, then angle and dive in
-                            end_x, end_y = path[-1]
-                            new_end_x =  end_x - self.sign(end_x)*2*offset
-                            new_end_y = end_y - self.sign(end_y)*2*offset
-                            path[-1] = (new_end_x, new_end_y)
-                            path.append((offset, offset))
-                            path.append((offset, 0))
-
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            #move piece off center in -x direction 
-                            path = [end_coord, (-offset, 0)]
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            # put capturing piece in square
-                            path = [(end_coord[0], end_coord[1]+offset), (0, -offset)]
-                            commands = self.movement_to_gcode(path)
-                            self.send_commands(commands)
-
-                            # take capturing piece to deadzone
-                            dead_coordinates = (end_coord[0] - offset, end_coord[1])
-                            self.to_deadzone(dead_coordinates, is_white, symbol)
-                            return (path)
-
-                    
+            if occupied is not None and not (is_capture or is_castling or is_en_passant):
+                path = self.planner.plan_path(square_to_coord(move_str[:2]), square_to_coord(move_str[2:4]), occupied)
+                if path is not None:
+                    plan = MovePlan(((PATH, tuple(path)),), tuple(path))
 
+            # Expected duration of the whole move, for anything scheduling around it
+            self.last_move_time = 0.0
+            with self.batch_motion():
+                for kind, value in plan.segments:
+                    if kind == DEADZONE:
+                        self.to_deadzone(value, is_white, symbol)
                     else:
-                        if end_square[1] == '1':
-                            print("rank1")
-                            if dx_sign == 0 and dy_sign == 1:
-                                #Straight left
-
-                                end_x, end_y = path[-1]
-                                new_end_x =  end_x - self.sign(end_x)*offset
-                                new_end_y = end_y - self.sign(end_y)*offset
-                                path[-1] = (new_end_x, new_end_y)
-
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-                                
-                                #move piece off center in
-                                path = [end_coord, (offset, 0)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # put capturing piece in square
-                                path = [(end_coord[0], end_coord[1]-offset), (0, offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # take capturing piece to deadzone
-                                dead_coordinates = (end_coord[0] + offset, end_coord[1])
-                                self.to_deadzone(dead_coordinates, is_white, symbol)
-                                return (path)
-
-                            elif dx_sign == -1 and dy_sign == 1:
-                            #     # angled close left
-                                
-                                end_x, end_y = path[-1]
-                                new_end_x =  end_x - self.sign(end_x)*offset
-                                new_end_y = end_y - self.sign(end_y)*offset
-                                path[-1] = (new_end_x, new_end_y)
-
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-                                
-                                #move piece off center in
-                                path = [end_coord, (offset, offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # put capturing piece in square
-                                path = [(end_coord[0]+offset, end_coord[1]-offset), (-offset, offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # take capturing piece to deadzone
-                                dead_coordinates = (end_coord[0] + offset, end_coord[1] + offset)
-                                self.to_deadzone(dead_coordinates, is_white, symbol)
-                                return (path)
-
-                            elif dx_sign == -1 and dy_sign == 0:
-                                #straight in
-                                end_x, end_y = path[-1]
-                                new_end_x =  end_x - self.sign(end_x)*2*offset
-                                new_end_y = end_y - self.sign(end_y)*2*offset
-                                path[-1] = (new_end_x, new_end_y)
-                                path.append((-offset, -offset))
-
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-                                
-                                #move piece off center in
-                                path = [end_coord, (offset, offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # put capturing piece in square
-                                path = [(end_coord[0]+offset, end_coord[1]-offset), (-offset, offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # take capturing piece to deadzone
-                                dead_coordinates = (end_coord[0] + offset, end_coord[1]+offset)
-                                self.to_deadzone(dead_coordinates, is_white, symbol)
-                                return (path)
-
-                            elif dx_sign == -1 and dy_sign == -1:
-                                #angled close right
-                                end_x, end_y = path[-1]
-                                new_end_x =  end_x - self.sign(end_x)*offset
-                                new_end_y = end_y - self.sign(end_y)*offset
-                                path[-1] = (new_end_x, new_end_y)
-
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                #move piece off center in
-                                path = [end_coord, (offset, -offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # put capturing piece in square
-                                path = [(end_coord[0]+offset, end_coord[1]+offset), (-offset, -offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # take capturing piece to deadzone
-                                dead_coordinates = (end_coord[0] + offset, end_coord[1] - offset)
-                                self.to_deadzone(dead_coordinates, is_white, symbol)
-                                return (path)
-
-                            elif dx_sign == 0 and dy_sign == -1:
-                                # straight right
-                                end_x, end_y = path[-1]
-                                new_end_x =  end_x - self.sign(end_x)*offset
-                                new_end_y = end_y - self.sign(end_y)*offset
-                                path[-1] = (new_end_x, new_end_y)
-
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-                                
-                                #move piece off center in
-                                path = [end_coord, (offset, 0)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # put capturing piece in square
-                                path = [(end_coord[0], end_coord[1]+offset), (0, -offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # take capturing piece to deadzone
-                                dead_coordinates = (end_coord[0] + offset, end_coord[1])
-                                self.to_deadzone(dead_coordinates, is_white, symbol)
-                                return (path)
-
-
-                        
-                        elif end_square[1] == '8':
-                            if dx_sign == 0 and dy_sign == 1:
-                                #Straight left
-
-                                end_x, end_y = path[-1]
-                                new_end_x =  end_x - self.sign(end_x)*offset
-                                new_end_y = end_y - self.sign(end_y)*offset
-                                path[-1] = (new_end_x, new_end_y)
-
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-                                
-                                #move piece off center in
-                                path = [end_coord, (-offset, 0)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # put capturing piece in square
-                                path = [(end_coord[0], end_coord[1]-offset), (0, offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # take capturing piece to deadzone
-                                dead_coordinates = (end_coord[0] - offset, end_coord[1])
-                                self.to_deadzone(dead_coordinates, is_white, symbol)
-                                return (path)
-
-                            elif dx_sign == 1 and dy_sign == 1:
-                            #     # angled far left
-                                
-                                end_x, end_y = path[-1]
-                                new_end_x =  end_x - self.sign(end_x)*offset
-                                new_end_y = end_y - self.sign(end_y)*offset
-                                path[-1] = (new_end_x, new_end_y)
-
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-                                
-                                #move piece off center in
-                                path = [end_coord, (-offset, offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # put capturing piece in square
-                                path = [(end_coord[0]-offset, end_coord[1]-offset), (offset, offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # take capturing piece to deadzone
-                                dead_coordinates = (end_coord[0] - offset, end_coord[1] + offset)
-                                self.to_deadzone(dead_coordinates, is_white, symbol)
-                                return (path)
-
-                            elif dx_sign == 1 and dy_sign == 0:
-                                #straight in
-                                end_x, end_y = path[-1]
-                                new_end_x =  end_x - self.sign(end_x)*2*offset
-                                new_end_y = end_y - self.sign(end_y)*2*offset
-                                path[-1] = (new_end_x, new_end_y)
-                                path.append((offset, -offset))
-
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-                                
-                                #move piece off center in
-                                path = [end_coord, (-offset, offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # put capturing piece in square
-                                path = [(end_coord[0]-offset, end_coord[1]-offset), (offset, offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # take capturing piece to deadzone
-                                dead_coordinates = (end_coord[0] - offset, end_coord[1]+offset)
-                                self.to_deadzone(dead_coordinates, is_white, symbol)
-                                return (path)
-
-                            elif dx_sign == 1 and dy_sign == -1:
-                                #angled far right
-                                end_x, end_y = path[-1]
-                                new_end_x =  end_x - self.sign(end_x)*offset
-                                new_end_y = end_y - self.sign(end_y)*offset
-                                path[-1] = (new_end_x, new_end_y)
-
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                #move piece off center in
-                                path = [end_coord, (-offset, -offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # put capturing piece in square
-                                path = [(end_coord[0]-offset, end_coord[1]+offset), (offset, -offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # take capturing piece to deadzone
-                                dead_coordinates = (end_coord[0] - offset, end_coord[1] - offset)
-                                self.to_deadzone(dead_coordinates, is_white, symbol)
-                                return (path)
-
-                            elif dx_sign == 0 and dy_sign == -1:
-                                # straight right
-                                end_x, end_y = path[-1]
-                                new_end_x =  end_x - self.sign(end_x)*offset
-                                new_end_y = end_y - self.sign(end_y)*offset
-                                path[-1] = (new_end_x, new_end_y)
-
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-                                
-                                #move piece off center in
-                                path = [end_coord, (-offset, 0)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # put capturing piece in square
-                                path = [(end_coord[0], end_coord[1]+offset), (0, -offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # take capturing piece to deadzone
-                                dead_coordinates = (end_coord[0] - offset, end_coord[1])
-                                self.to_deadzone(dead_coordinates, is_white, symbol)
-                                return (path)
-
-                            
-                        
-                        elif end_square[0] == 'h':
-
-                            if dx_sign == 0 and dy_sign == -1:
-                                #Straight right
-
-                                end_x, end_y = path[-1]
-                                new_end_x =  end_x - self.sign(end_x)*2*offset
-                                new_end_y = end_y - self.sign(end_y)*2*offset
-                                path[-1] = (new_end_x, new_end_y)
-                                if end_coord[0] > 180: # send to outside if on black side
-                                    path.append((offset, -offset))
-                                else: # send to white side
-                                    path.append((-offset, -offset))
-
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-                                
-                                if end_coord[0] > 180:
-                                    path = [end_coord, (-offset, offset)]
-                                else:
-                                #move piece off center in
-                                    path = [end_coord, (offset, offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-
-                                # capturing piece in square
-                                if end_coord[0] > 180:
-                                    path = [(end_coord[0]+offset, end_coord[1]+offset), (-offset, -offset)]
-                                else:
-                                    path = [(end_coord[0]-offset, end_coord[1]+offset), (offset, -offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # take capturing piece to deadzone
-                                if end_coord[0] > 180:
-                                    dead_coordinates = (end_coord[0] - offset, end_coord[1]+offset)
-                                else:
-                                    dead_coordinates = (end_coord[0] + offset, end_coord[1]+offset)
-                                self.to_deadzone(dead_coordinates, is_white, symbol)
-                                return (path)
-
-                            elif dx_sign == -1 and dy_sign == -1:
-                            #     # angled close right
-                                
-                                end_x, end_y = path[-1]
-                                new_end_x =  end_x - self.sign(end_x)*offset
-                                new_end_y = end_y - self.sign(end_y)*offset
-                                path[-1] = (new_end_x, new_end_y)
-
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-                                
-                                #move piece off center in
-                                path = [end_coord, (-offset, offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # put capturing piece in square
-                                path = [(end_coord[0]+offset, end_coord[1]+offset), (-offset, -offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # take capturing piece to deadzone
-                                dead_coordinates = (end_coord[0] - offset, end_coord[1] + offset)
-                                self.to_deadzone(dead_coordinates, is_white, symbol)
-                                return (path)
-
-                            elif dx_sign == -1 and dy_sign == 0:
-                                #straight in
-                                end_x, end_y = path[-1]
-                                new_end_x =  end_x - self.sign(end_x)*offset
-                                new_end_y = end_y - self.sign(end_y)*offset
-                                path[-1] = (new_end_x, new_end_y)
-                                # path.append((offset, -offset))
-
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-                                
-                                #move piece off center in
-                                path = [end_coord, (-offset, 0)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # put capturing piece in square
-                                path = [(end_coord[0]+offset, end_coord[1]), (-offset, 0)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # take capturing piece to deadzone
-                                dead_coordinates = (end_coord[0], end_coord[1]+offset)
-                                self.to_deadzone(dead_coordinates, is_white, symbol)
-
-                                return (path)
-
-                            elif dx_sign == 1 and dy_sign == -1:
-                                #angled far right
-                                end_x, end_y = path[-1]
-                                new_end_x =  end_x - self.sign(end_x)*offset
-                                new_end_y = end_y - self.sign(end_y)*offset
-                                path[-1] = (new_end_x, new_end_y)
-
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                #move piece off center in
-                                path = [end_coord, (offset, offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # put capturing piece in square
-                                path = [(end_coord[0]-offset, end_coord[1]+offset), (offset, -offset)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # take capturing piece to deadzone
-                                dead_coordinates = (end_coord[0] + offset, end_coord[1] + offset)
-                                self.to_deadzone(dead_coordinates, is_white, symbol)
-                                return (path)
-
-                            elif dx_sign == 1 and dy_sign == 0:
-                                # straight out
-                                end_x, end_y = path[-1]
-                                new_end_x =  end_x - self.sign(end_x)*offset
-                                new_end_y = end_y - self.sign(end_y)*offset
-                                path[-1] = (new_end_x, new_end_y)
-
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-                                
-                                #move piece off center in
-                                path = [end_coord, (offset, 0)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # put capturing piece in square
-                                path = [(end_coord[0]-offset, end_coord[1]), (offset, 0)]
-                                commands = self.movement_to_gcode(path)
-                                self.send_commands(commands)
-
-                                # take capturing piece to deadzone
-                                dead_coordinates = (end_coord[0]+offset, end_coord[1])
-                                self.to_deadzone(dead_coordinates, is_white, symbol)
-                                return (path)
-
-
-                else:
-                    # Take away 25mm from last movement, so piece is on the edge
-                    end_x, end_y = path[-1]
-                    new_end_x =  end_x - self.sign(end_x)*offset if not end_x == 0 else 0
-                    new_end_y = end_y - self.sign(end_y)*offset if not end_y == 0 else 0
-                    path[-1] = (new_end_x, new_end_y)
-                    print(f"Path for moving to piece to capture: {path}")
-                    movements = self.parse_path_to_movement(path)
-                    commands = self.movement_to_gcode(movements)
-                    print(f"Moving to capture piece: {commands}")
-                    self.send_commands(commands)
-
-                    
-                    if self.sign(dx) == 0:
-                        # case where straight off would impede other piece
-
-                        if end_coord[0] > 180: # send towards white
-                            captured_new_x = -offset
-                            captured_new_y = 0
-
-                        else: # send towards black
-                            captured_new_x = offset
-                            captured_new_y = 0
-
-                    else:
-
-                        #move piece off center in opposite direction
-                        captured_new_x = self.sign(end_x)*offset if not end_x == 0 else 0
-                        captured_new_y = self.sign(end_y)*offset if not end_y == 0 else 0
-                    
-                    path = [end_coord, (captured_new_x, captured_new_y)]
-
-                    print(f"Path for moving captured piece off square: {path}")
-
-
-                    #movements = self.parse_path_to_movement(path)
-                    commands = self.movement_to_gcode(path)
-                    print(f"Moving piece off center: : {commands}")
-                    self.send_commands(commands)      
-                    print(f"moving piece off center: {path}")
-                    
-
+                        commands = self.movement_to_gcode(list(value))
+                        self.send_commands(commands)
+                    self.last_move_time += self.last_path_time
 
-                    #Move capturing piece back to center
-
-                    path = [(end_coord[0] -self.sign(end_x)*offset, end_coord[1] -self.sign(end_y)*offset), (self.sign(end_x)*offset, self.sign(end_y)*offset)]
-
-                    print(f"Path for moving piece back to center: {path}")
-
-                    movements = self.parse_path_to_movement(path)
-                    commands = self.movement_to_gcode(movements)
-                    print(f"Moving piece to center comamnds: {commands}")
-                    self.send_commands(commands)
-
-
-                    dead_coordinates = (end_coord[0] + captured_new_x, end_coord[1] + captured_new_y)
-
-                    self.to_deadzone(dead_coordinates, is_white, symbol)
-
-                    return (path)
-                # dead_x = self.deadzone_origin[0] - dead_coordinates[0]
-                # dead_y = self.deadzone_origin[1] - dead_coordinates[1]
-
-                # dz_x, dz_y = self.deadzone_origin
-
-                # path = [dead_coordinates, (0, offset*16 - dead_coordinates[1]), (dead_x, 0), (0, dz_y-offset*16)]
-
-                # print(f"moving to deadzone: {path}")
-
-
-                    # movements = self.parse_path_to_movement(path)
-                    # commands = self.movement_to_gcode(movements)
-                    # print(f" moving to deadzone: {commands}")
-                    # self.send_commands(commands)
-
-
-
-                
-
-                # if dz_x == 350:
-                #     dz_x = -50
-                #     dz_y = 400
-
-                # self.deadzone_origin = (dz_x + 2*offset, dz_y)
-
-
-
-            print(f"Interpreted move: {move_str} as dx={dx}, dy={dy} as {path}")
-
-            movements = self.parse_path_to_movement(path)
-            commands = self.movement_to_gcode(movements)
-            print(f"Last move: {commands}")
-            self.send_commands(commands)
-
-            
-            return (path)
+            if wait:
+                self.wait_for_motion()
+            return list(plan.path)
         
 
 
@@ -1182,7 +886,8 @@ class GantryControl:
                 return points
             
             if points[1][0] % 25 == 0 or points[1][1] % 25 ==0:
-                return points
+                # Already a path in mm, [start, relative moves...]
+                return simplify_path(points)
             else:
                 points = [(x * STEP_MM, y * STEP_MM) for (x, y) in points]
 
@@ -1233,30 +938,44 @@ class GantryControl:
             final_points = [base] + cumulative[1:]
             return final_points
 
-        def send_commands(self, cmd_list):
+        @contextlib.contextmanager
+        def batch_motion(self):
+            """
+            Inside this block send_commands queues without waiting, so consecutive
+            paths stream as one continuous program.
+            """
+            self._batch.depth = getattr(self._batch, "depth", 0) + 1
+            try:
+                yield
+            finally:
+                self._batch.depth -= 1
+
+        def wait_for_motion(self, timeout=None):
+            """Block until everything streamed so far has been executed."""
+            if self.last_motion_future is not None:
+                self.last_motion_future.result(timeout)
+
+        def send_commands(self, cmd_list, wait=None, on_ack=None):
+            """
+            Send a list of G-code lines. Returns a future that completes once
+            GRBL has executed them and gone Idle; wait defaults to blocking
+            unless called inside batch_motion(). on_ack is passed on to the
+            streamer, see GrblStreamer.submit().
+            """
+            if wait is None:
+                wait = getattr(self._batch, "depth", 0) == 0
+
             if self.simulate:
                 time.sleep(2)
                 print(f"Sent commands")
+                if on_ack is not None:
+                    on_ack()
             else:
-                print("[S] sending commands")
-                for cmd in cmd_list:
-                    self.finished = False
-                    full_cmd = cmd + "\n"
-                    self.send(full_cmd)
-                    # Wait for GRBL response ("ok")
-                    response = self.ser.readline().decode().strip()
-                    while response != "ok":
-                        response = self.ser.readline().decode().strip()
-                time.sleep(0.1)
-
-                while not self.finished:
-                    self.ser.write(b'?')
-                    status = self.ser.readline().decode().strip()
-
-                    if '<Idle' in status:
-                        self.finished = True
-                        self.ser.flushInput()
-                print("[S] sent commands")
+                future = self.streamer.submit(cmd_list, on_ack)
+                self.last_motion_future = future
+                if wait:
+                    future.result()
+                return future
 
         
 
@@ -1304,11 +1023,16 @@ class GantryControl:
 
 
 
-        def movement_to_gcode(self, move_list):
+        def movement_to_gcode(self, move_list, occupied=None):
             """
             Given a list of moves (e.g., ["e2e4", "g8h6"]), converts them to relative
             displacement commands in G-code format.
+
+            The path is merged first and, given the occupied bitboard, pulled
+            tight with diagonal moves wherever that's quicker; the expected
+            time ends up in self.last_path_time.
             """
+            move_list, self.last_path_time = self.planner.optimise(move_list, occupied, overshoot=self.overshoot)
 
             print(f"move list: {move_list}")
             if self.magnet_state == "MAG OFF":
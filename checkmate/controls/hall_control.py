@@ -1,7 +1,12 @@
 import lgpio
 import time
 import threading
-import copy
+import collections
+
+try:
+    from occupancy import Occupancy
+except:
+    from checkmate.controls.occupancy import Occupancy
 
 
 
@@ -16,34 +21,28 @@ class Multiplexer:
     MUX_Y_3 = 21
     MUX_Y_4 = 20
 
+    # Claimed as lgpio groups, bit n of a group write/read is the n-th pin here
+    SELECT_PINS = [MUX_S0, MUX_S1, MUX_S2, MUX_S3]
+    OUTPUT_PINS = [MUX_Y_1, MUX_Y_2, MUX_Y_3, MUX_Y_4]
+
     def __init__(self):
         self.handle = lgpio.gpiochip_open(0)
         self.init()
 
     def init(self):
-        # Set up control pins as outputs
-        for pin in [self.MUX_S0, self.MUX_S1, self.MUX_S2, self.MUX_S3]:
-            lgpio.gpio_claim_output(self.handle, pin)
-            lgpio.gpio_write(self.handle, pin, 0)
-        
-        # Set up output pins as inputs with pull-down resistors
-        for pin in [self.MUX_Y_1, self.MUX_Y_2, self.MUX_Y_3, self.MUX_Y_4]:
-            lgpio.gpio_claim_input(self.handle, pin, lgpio.SET_PULL_DOWN)
+        # Control pins as one output group, all low
+        lgpio.group_claim_output(self.handle, self.SELECT_PINS, [0, 0, 0, 0])
+
+        # Output pins as one input group with pull-down resistors
+        lgpio.group_claim_input(self.handle, self.OUTPUT_PINS, lgpio.SET_PULL_DOWN)
 
     def set_pins(self, nibble):
- 
-        lgpio.gpio_write(self.handle, self.MUX_S0, (nibble >> 0) & 0x1)
-        lgpio.gpio_write(self.handle, self.MUX_S1, (nibble >> 1) & 0x1)
-        lgpio.gpio_write(self.handle, self.MUX_S2, (nibble >> 2) & 0x1)
-        lgpio.gpio_write(self.handle, self.MUX_S3, (nibble >> 3) & 0x1)
+        # One call sets all four select lines
+        lgpio.group_write(self.handle, self.MUX_S0, nibble & 0xF)
 
     def get_output(self):
-        output = 0
-        if lgpio.gpio_read(self.handle, self.MUX_Y_1): output |= (1 << 0)
-        if lgpio.gpio_read(self.handle, self.MUX_Y_2): output |= (1 << 1)
-        if lgpio.gpio_read(self.handle, self.MUX_Y_3): output |= (1 << 2)
-        if lgpio.gpio_read(self.handle, self.MUX_Y_4): output |= (1 << 3)
-        return output
+        # One call reads all four mux outputs, Y1 in bit 0
+        return lgpio.group_read(self.handle, self.MUX_Y_1) & 0xF
 
     def cleanup(self):
         lgpio.gpiochip_close(self.handle)
@@ -74,63 +73,58 @@ class SenseLayer:
     square_mapping = {f"{file}{rank}": (ord(file) - ord('a'), int(rank) - 1)
                       for file in "abcdefgh" for rank in "12345678"}
 
+    # Scan order: address i is selected with its Gray code for more reliable multiplexing
+    GRAY_CODES = [i ^ (i >> 1) for i in range(16)]
+
+    # DECODE[i][nibble] is the occupancy bitboard for what the four sensors on
+    # address i read. Bit rank*8 + file (python-chess square numbering) is set
+    # when a piece is there; the sensors pull low when they see a magnet.
+    DECODE = [
+        [sum(1 << (rank * 8 + file)
+             for j, (rank, file) in enumerate(mapping) if not (nibble >> j) & 1)
+         for nibble in range(16)]
+        for mapping in hall_to_board_mapping
+    ]
+
     def __init__(self):
         self.rows = 8
         self.cols = 8
         self.mux = Multiplexer()
+        # The sampler thread and direct callers share the mux select lines
+        self.scan_lock = threading.Lock()
+
+    def scan_bits(self):
+        """
+        Scan the entire board and return a 64-bit occupancy bitboard
+        (bit = chess square index, 1 = piece detected). One group write and
+        one group read per mux address.
+        """
+        bits = 0
+        with self.scan_lock:
+            for i, gray in enumerate(self.GRAY_CODES):
+                self.mux.set_pins(gray)
+                time.sleep(0.0005)  # Short delay for multiplexer settling
+                bits |= self.DECODE[i][self.mux.get_output()]
+        return bits
+
+    def get_occupancy(self):
+        """Scan the board, returns an Occupancy."""
+        return Occupancy(self.scan_bits())
 
     def get_squares(self):
         """
         Scan the entire board and return a 2D array of sensor values.
         1 = piece detected, 0 = no piece
         """
-        # Create an 8x8 board initialized to all zeros
-        board = [[0 for _ in range(self.cols)] for _ in range(self.rows)]
-
-        # Scan through all multiplexer combinations
-        for i in range(16):
-            # Convert i to Gray code for more reliable multiplexing
-            current_gray = i ^ (i >> 1)
-            self.mux.set_pins(current_gray)
-            time.sleep(0.0005)  # Short delay for multiplexer settling
-
-            # Read the outputs
-            outputs = self.mux.get_output()
-
-            # Update board array based on sensor readings
-            for j in range(4):
-                col = self.hall_to_board_mapping[i][j][0]
-                row = self.hall_to_board_mapping[i][j][1]
-                
-                # Invert the logic: 0 means a piece is present
-                board[row][col] = 0 if ((outputs >> j) & 1) else 1
-
-        return board
+        return self.get_occupancy().columns()
     
     def get_squares_gantry(self):
-        board = self.get_squares()
-
-        # transposed_np = board.T
-        # print("Transposed Matrix (NumPy):")
-        # print(transposed_np)
-
-        # # Rotate the original matrix 90° counterclockwise using np.rot90
-        # rotated_ccw_np = np.rot90(board, k=1)  # k=1 rotates by 90° CCW
-        # # print("\nRotated 90° Counterclockwise (NumPy):")
-        # print(rotated_ccw_np)
-
-        transposed_board = list(map(list, zip(*board)))
-        # transposed_board = board
-        #board_t = [[transposed_board[j][i] for j in range(len(transposed_board))] for i in range(len(transposed_board[0])-1,-1,-1)]
-        # final_board = list(map(list, zip(*board_t)))
-
-        return transposed_board
+        # Same as transposing get_squares(), straight from the bitboard
+        return self.get_occupancy().rows()
     
     def get_squares_game(self):
-        board = self.get_squares()
-        transposed_board = list(map(list, zip(*board)))
-
-        return transposed_board
+        # Same as transposing get_squares(), straight from the bitboard
+        return self.get_occupancy().rows()
 
     def get_square_from_notation(self, square):
         """
@@ -141,10 +135,8 @@ class SenseLayer:
         if square not in self.square_mapping:
             return False
         
-        board = self.get_squares()
-            
         x, y = self.square_mapping[square]
-        return board[y][x]
+        return self.get_occupancy()[x * 8 + y]
         
     def cleanup(self):
         """Clean up GPIO resources"""
@@ -191,14 +183,105 @@ class SenseLayer:
             layer.cleanup()
 
 
+class HallSampler:
+    """
+    Scans the board on its own thread at a steady rate.
+
+    Every scan is kept as a (timestamp, Occupancy) frame in a ring buffer of
+    the last `history` frames, so readers never have to wait for the mux. A
+    deque with maxlen is safe to append to and read from without a lock. When
+    the occupancy changes (or on every frame, if asked), subscribers get
+    callback(timestamp, occupancy, previous) on the sampler thread; anything touching Kivy has to hop back
+    onto the Clock.
+    """
+    def __init__(self, sense_layer, rate=50, history=64):
+        self.sense_layer = sense_layer
+        self.interval = 1.0 / rate
+        self.frames = collections.deque(maxlen=history)
+        self.subscribers = ()
+        self.sub_lock = threading.Lock()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.thread and self.thread.is_alive():
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread:
+            self.thread.join(timeout=1.0)
+
+    def set_rate(self, rate):
+        self.interval = 1.0 / rate
+
+    def subscribe(self, callback, changes_only=True):
+        """callback(timestamp, occupancy, previous) on changes, or on every frame."""
+        with self.sub_lock:
+            self.subscribers = self.subscribers + ((callback, changes_only),)
+
+    def unsubscribe(self, callback):
+        with self.sub_lock:
+            self.subscribers = tuple(sub for sub in self.subscribers if sub[0] != callback)
+
+    def latest(self):
+        """Most recent (timestamp, Occupancy), scanning once if nothing has been sampled yet."""
+        try:
+            return self.frames[-1]
+        except IndexError:
+            frame = (time.time(), self.sense_layer.get_occupancy())
+            self.frames.append(frame)
+            return frame
+
+    def frames_since(self, timestamp):
+        """All buffered frames newer than timestamp, oldest first."""
+        return [frame for frame in list(self.frames) if frame[0] > timestamp]
+
+    def _run(self):
+        next_time = time.monotonic()
+        previous = None
+        while self.running:
+            try:
+                occupancy = self.sense_layer.get_occupancy()
+            except Exception as e:
+                print(f"[Hall] Scan failed: {e}")
+                time.sleep(0.1)
+                continue
+            timestamp = time.time()
+            self.frames.append((timestamp, occupancy))
+
+            changed = previous is not None and occupancy != previous
+            for callback, changes_only in self.subscribers:
+                if changes_only and not changed:
+                    continue
+                try:
+                    callback(timestamp, occupancy, previous)
+                except Exception as e:
+                    print(f"[Hall] Subscriber failed: {e}")
+            previous = occupancy
+
+            # Fixed rate rather than fixed sleep, so frames are evenly spaced
+            next_time += self.interval
+            delay = next_time - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_time = time.monotonic()
+
+
 class Hall:
     # Constants for state machine
     WAITING_FOR_FIRST_CHANGE = 0
     WAITING_FOR_SECOND_CHANGE = 1
     MOVE_DETECTED = 2
     
-    def __init__(self):
+    def __init__(self, sample_rate=50):
         self.sense_layer = SenseLayer()
+        self.sampler = HallSampler(self.sense_layer, rate=sample_rate)
+        self.sampler.start()
         self.lock = threading.Lock()
         self.reference_board = None
         self.current_board = None
@@ -218,15 +301,13 @@ class Hall:
         return f"{file}{rank}"
 
     def compare_boards(self, current_board, reference_board):
-        changes = []
-        
-        for row in range(8):
-            for col in range(8):
-                if reference_board[row][col] != current_board[row][col]:
-                    change = self.board_to_chess_notation(row, col)
-                    changes.append(change)
-        
-        return changes[0] if len(changes) == 1 else None
+        """The single square that changed between two boards, None if none or several did."""
+        if not isinstance(current_board, Occupancy):
+            current_board = Occupancy.from_rows(current_board)
+        if not isinstance(reference_board, Occupancy):
+            reference_board = Occupancy.from_rows(reference_board)
+
+        return current_board.changed_square(reference_board)
 
     def start_polling(self, callback=None, poll_interval=0.05):
         """Start polling the board for changes with the specified polling interval"""
@@ -236,7 +317,7 @@ class Hall:
         self.poll_interval = poll_interval
         self.running = True
         self.move_detected_event.clear()
-        self.reference_board = self.sense_layer.get_squares_game()
+        self.reference_board = self.latest_occupancy()
         self.state = self.WAITING_FOR_FIRST_CHANGE
         self.first_change = None
         self.second_change = None
@@ -261,7 +342,7 @@ class Hall:
         
         while self.running:
             with self.lock:
-                current_board = self.sense_layer.get_squares_game()
+                current_board = self.latest_occupancy()
                 
                 if self.state == self.WAITING_FOR_FIRST_CHANGE:
                     changes = self.compare_boards(current_board, self.reference_board)
@@ -330,12 +411,17 @@ class Hall:
             return f"{self.first_change}{self.second_change}"
         return None
 
+    def latest_occupancy(self):
+        """Latest Occupancy from the sampler thread, no scan on the caller's thread."""
+        return self.sampler.latest()[1]
+
     def get_current_board_state(self):
         """Get the current state of the board"""
-        with self.lock:
-            return copy.deepcopy(self.sense_layer.get_squares_game())
+        # Occupancy is immutable, no need to copy it
+        return self.latest_occupancy()
             
     def cleanup(self):
         """Clean up resources"""
         self.stop_polling()
+        self.sampler.stop()
         self.sense_layer.cleanup()
\ No newline at end of file
@@ -0,0 +1,109 @@
+import chess
+
+# Standard piece values, the king doesn't count
+PIECE_VALUES = {
+    chess.PAWN: 1,
+    chess.KNIGHT: 3,
+    chess.BISHOP: 3,
+    chess.ROOK: 5,
+    chess.QUEEN: 9,
+}
+
+
+def material(board):
+    """(white, black) material from the bitboards, no piece_map walk."""
+    white = 0
+    black = 0
+    for piece_type, value in PIECE_VALUES.items():
+        pieces = board.pieces_mask(piece_type, chess.WHITE)
+        white += value * chess.popcount(pieces)
+        pieces = board.pieces_mask(piece_type, chess.BLACK)
+        black += value * chess.popcount(pieces)
+    return white, black
+
+
+class MaterialTracker:
+    """
+    Material, piece counts and captured pieces, kept up to date move by move.
+
+    Moves go through push()/pop() here instead of straight onto the board,
+    each one only adjusts the totals for what it took or promoted and keeps
+    enough to undo that on a takeback. The UI and the reset read the totals
+    without looking at the board.
+    """
+    def __init__(self, board=None):
+        self.reset(board)
+
+    def reset(self, board=None):
+        """Start again from board (the start position by default), nothing captured yet."""
+        board = board if board is not None else chess.Board()
+        self.counts = {}
+        for color in chess.COLORS:
+            for piece_type in chess.PIECE_TYPES:
+                piece = chess.Piece(piece_type, color)
+                self.counts[piece.symbol()] = chess.popcount(board.pieces_mask(piece_type, color))
+        self.white, self.black = material(board)
+        # In capture order, the deadzone slots are filled the same way
+        self.captured = []
+        # Split by colour for the captured pieces widget
+        self.white_captures = []
+        self.black_captures = []
+        self.history = []
+
+    @staticmethod
+    def captured_piece(board, move):
+        """The piece move takes on board, None if it isn't a capture."""
+        if board.is_en_passant(move):
+            return board.piece_at(chess.square(chess.square_file(move.to_square), chess.square_rank(move.from_square)))
+        if board.is_castling(move):
+            return None
+        return board.piece_at(move.to_square)
+
+    def captured_symbol(self, board, move):
+        piece = self.captured_piece(board, move)
+        return piece.symbol() if piece else None
+
+    def push(self, board, move):
+        """Push move onto board and update the totals, returns the captured symbol or None."""
+        captured = self.captured_piece(board, move)
+        promotion = chess.Piece(move.promotion, board.turn) if move.promotion else None
+        board.push(move)
+        self.history.append((captured, promotion))
+        self.apply(captured, promotion, 1)
+        return captured.symbol() if captured else None
+
+    def pop(self, board):
+        """Take the last move back off board, returns it."""
+        move = board.pop()
+        if self.history:
+            captured, promotion = self.history.pop()
+            self.apply(captured, promotion, -1)
+        return move
+
+    def apply(self, captured, promotion, sign):
+        if captured is not None:
+            self.counts[captured.symbol()] -= sign
+            self.add_material(captured.color, -sign * PIECE_VALUES.get(captured.piece_type, 0))
+            side = self.white_captures if captured.color == chess.WHITE else self.black_captures
+            if sign > 0:
+                self.captured.append(captured.symbol())
+                side.append(captured.symbol())
+            else:
+                self.captured.pop()
+                side.pop()
+        if promotion is not None:
+            pawn = chess.Piece(chess.PAWN, promotion.color).symbol()
+            self.counts[pawn] -= sign
+            self.counts[promotion.symbol()] += sign
+            self.add_material(promotion.color, sign * (PIECE_VALUES[promotion.piece_type] - PIECE_VALUES[chess.PAWN]))
+
+    def add_material(self, color, value):
+        if color == chess.WHITE:
+            self.white += value
+        else:
+            self.black += value
+
+    @property
+    def balance(self):
+        """Positive when white is ahead."""
+        return self.white - self.black
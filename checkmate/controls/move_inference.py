@@ -0,0 +1,308 @@
+import time
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+import chess
+import chess.polyglot
+
+try:
+    from occupancy import Occupancy, square_index
+except:
+    from checkmate.controls.occupancy import Occupancy, square_index
+
+
+class MoveSignature:
+    """
+    What a legal move looks like to the hall sensors.
+
+    delta    - squares whose occupancy differs once the move is made
+    required - squares that must have been seen empty at some point even
+               though they end up occupied: the target of a capture, which
+               only goes empty while the captured piece is swapped out
+    allowed  - every square the player may touch while making the move
+    """
+    __slots__ = ("move", "delta", "required", "allowed")
+
+    def __init__(self, move, delta, required, allowed):
+        self.move = move
+        self.delta = delta
+        self.required = required
+        self.allowed = allowed
+
+    @classmethod
+    def from_board(cls, board, move):
+        before = board.occupied
+        board.push(move)
+        after = board.occupied
+        board.pop()
+
+        delta = before ^ after
+        to_bb = chess.BB_SQUARES[move.to_square]
+        if board.is_capture(move) and not board.is_en_passant(move):
+            required = to_bb
+        else:
+            required = 0
+        return cls(move, delta, required, delta | to_bb)
+
+    def __repr__(self):
+        return f"MoveSignature({self.move.uci()})"
+
+
+def move_signatures(board):
+    """Signatures for every legal move, promotions only as queen (the rest look identical)."""
+    signatures = []
+    for move in board.legal_moves:
+        if move.promotion and move.promotion != chess.QUEEN:
+            continue
+        signatures.append(MoveSignature.from_board(board, move))
+    return signatures
+
+
+class PositionMoves:
+    """
+    The legal moves of one position, indexed by what they look like and by uci.
+
+    by_delta   - occupancy xor mask after the move -> moves (a capture only clears its from square)
+    by_squares - from | to square mask -> moves, for a sensed lift and place
+    by_uci     - uci string -> move
+    """
+    __slots__ = ("signatures", "by_delta", "by_squares", "by_uci")
+
+    def __init__(self, board):
+        self.signatures = move_signatures(board)
+        self.by_delta = {}
+        self.by_squares = {}
+        for sig in self.signatures:
+            self.by_delta.setdefault(sig.delta, []).append(sig.move)
+            squares = chess.BB_SQUARES[sig.move.from_square] | chess.BB_SQUARES[sig.move.to_square]
+            self.by_squares.setdefault(squares, []).append(sig.move)
+        self.by_uci = {move.uci(): move for move in board.legal_moves}
+
+    def find(self, move_str):
+        """The legal move for a uci string, None if it isn't legal. Promotions default to queen."""
+        move = self.by_uci.get(move_str)
+        if move is None and len(move_str) == 4:
+            move = self.by_uci.get(move_str + "q")
+        return move
+
+    def moves_for_delta(self, delta):
+        return self.by_delta.get(int(delta), [])
+
+    def moves_for_squares(self, from_square, to_square):
+        """Moves between two squares (names or indices), either way round."""
+        squares = chess.BB_SQUARES[square_index(from_square)] | chess.BB_SQUARES[square_index(to_square)]
+        return self.by_squares.get(squares, [])
+
+
+class MoveIndex:
+    """
+    PositionMoves per position, keyed by Zobrist hash and kept for the last
+    `size` positions.
+
+    prefetch() builds the entry for a position on a worker thread, so the next
+    player turn can be indexed while the engine thinks or the gantry moves.
+    """
+    def __init__(self, size=64):
+        self.size = size
+        self.entries = collections.OrderedDict()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.executor = ThreadPoolExecutor(max_workers=1)
+
+    @staticmethod
+    def key(board):
+        return chess.polyglot.zobrist_hash(board)
+
+    def get(self, board):
+        """PositionMoves for board, built now if it isn't cached or being built."""
+        key = self.key(board)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                return entry
+            future = self.pending.get(key)
+
+        if future is not None:
+            return future.result()
+        return self._build(key, board.copy(stack=False))
+
+    def prefetch(self, board):
+        """Start indexing board in the background. Takes a copy, board can keep changing."""
+        key = self.key(board)
+        with self.lock:
+            if key in self.entries or key in self.pending:
+                return
+            future = self.executor.submit(self._build, key, board.copy(stack=False))
+            self.pending[key] = future
+        return future
+
+    def find(self, board, move_str):
+        return self.get(board).find(move_str)
+
+    def moves_for_delta(self, board, delta):
+        return self.get(board).moves_for_delta(delta)
+
+    def moves_for_squares(self, board, from_square, to_square):
+        return self.get(board).moves_for_squares(from_square, to_square)
+
+    def _build(self, key, board):
+        entry = PositionMoves(board)
+        with self.lock:
+            self.entries[key] = entry
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+            self.pending.pop(key, None)
+        return entry
+
+
+class SquareDebouncer:
+    """
+    Per-square debouncing with hysteresis on occupancy frames.
+
+    A square only changes state after reading the new value for several
+    frames in a row. Lifting needs fewer frames than placing so a hand moving
+    over the board doesn't register as a piece set down.
+    """
+    def __init__(self, initial, lift_frames=2, place_frames=3):
+        self.stable = int(initial)
+        self.lift_frames = lift_frames
+        self.place_frames = place_frames
+        self.counts = {}
+
+    def feed(self, occupancy):
+        """Feed a raw frame, returns the debounced occupancy mask."""
+        raw = int(occupancy)
+        diff = raw ^ self.stable
+        if not diff:
+            self.counts.clear()
+            return self.stable
+
+        counts = {}
+        mask = diff
+        while mask:
+            low = mask & -mask
+            square = low.bit_length() - 1
+            mask ^= low
+
+            count = self.counts.get(square, 0) + 1
+            needed = self.place_frames if raw & low else self.lift_frames
+            if count >= needed:
+                self.stable ^= low
+            else:
+                counts[square] = count
+        # Squares that bounced back lose their count
+        self.counts = counts
+        return self.stable
+
+
+class MoveInference:
+    """
+    Works out which legal move the player made from a stream of hall frames.
+
+    Each frame goes through the debouncer. The stable occupancy is compared
+    to the reference taken when the turn started, and the result is matched
+    against the signature of every legal move. A move is reported as soon as
+    it is the only one that fits, so captures, castling and en passant are
+    recognised without waiting for a fixed number of readings.
+
+    Callbacks (run on whichever thread calls feed()):
+      on_move(move)              - move is a chess.Move
+      on_illegal(from_sq, to_sq) - a piece was put down somewhere illegal, squares by name
+      on_lift(square)            - first square picked up this turn, by name
+      on_reset()                 - everything was put back where it started
+    """
+    def __init__(self, on_move=None, on_illegal=None, on_lift=None, on_reset=None,
+                 lift_frames=2, place_frames=3, ambiguity_timeout=1.0, illegal_timeout=1.0):
+        self.on_move = on_move
+        self.on_illegal = on_illegal
+        self.on_lift = on_lift
+        self.on_reset = on_reset
+        self.lift_frames = lift_frames
+        self.place_frames = place_frames
+        # Rook first castling looks like a plain rook move until the king goes
+        self.ambiguity_timeout = ambiguity_timeout
+        self.illegal_timeout = illegal_timeout
+
+        self.signatures = []
+        self.active = False
+
+    def reset(self, board, reference, signatures=None):
+        """Start watching for a move from board, with reference the occupancy as the turn starts."""
+        self.signatures = signatures if signatures is not None else move_signatures(board)
+        self.reference = int(reference)
+        self.debouncer = SquareDebouncer(reference, self.lift_frames, self.place_frames)
+        self.touched = 0
+        self.last_change = time.time()
+        self.last_stable = self.reference
+        self.active = True
+
+    def stop(self):
+        self.active = False
+
+    def feed(self, timestamp, occupancy):
+        """Feed one frame. Returns the chess.Move once one is recognised, otherwise None."""
+        if not self.active:
+            return None
+
+        stable = self.debouncer.feed(occupancy)
+        if stable != self.last_stable:
+            self.last_change = timestamp
+            self.last_stable = stable
+
+        delta = stable ^ self.reference
+        lifted = self.reference & ~stable
+
+        if lifted & ~self.touched and not self.touched and self.on_lift:
+            self.on_lift(chess.square_name(chess.lsb(lifted)))
+        self.touched |= lifted
+
+        if not delta:
+            if self.touched:
+                # Everything is back where it was, start over
+                self.touched = 0
+                if self.on_reset:
+                    self.on_reset()
+            return None
+
+        exact, partial = self.match(delta, self.touched)
+        settled = timestamp - self.last_change
+
+        if len(exact) == 1 and (not partial or settled >= self.ambiguity_timeout):
+            move = exact[0].move
+            self.active = False
+            if self.on_move:
+                self.on_move(move)
+            return move
+
+        if not exact and not partial and settled >= self.illegal_timeout:
+            gone = self.reference & ~stable
+            # Where it went: an empty square, or one lifted and filled again (an illegal capture)
+            landed = (stable & ~self.reference) or (self.touched & stable)
+            if landed:
+                # Pieces still in the hand aren't a move yet
+                from_square = chess.lsb(gone) if gone else chess.lsb(landed)
+                to_square = chess.lsb(landed & ~chess.BB_SQUARES[from_square] or landed)
+                self.active = False
+                if self.on_illegal:
+                    self.on_illegal(chess.square_name(from_square), chess.square_name(to_square))
+        return None
+
+    def match(self, delta, touched):
+        """
+        Signatures that match exactly, and ones still consistent with what has
+        been touched so far but not finished.
+        """
+        exact = []
+        partial = []
+        seen = touched | delta
+        for sig in self.signatures:
+            if seen & ~sig.allowed:
+                continue
+            if delta == sig.delta and not sig.required & ~touched:
+                exact.append(sig)
+            else:
+                partial.append(sig)
+        return exact, partial
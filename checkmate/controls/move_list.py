@@ -0,0 +1,77 @@
+import chess
+
+
+class MoveList:
+    """
+    The game's moves as SAN, worked out once per ply.
+
+    sync() is called with the live board after every change. Usually a move
+    has just been pushed, so only the new plies get their SAN from a replay
+    board that follows the game. A takeback or new game winds the replay
+    back to where the two still agree. Rows are move pairs ("1. e4 e5").
+    """
+    def __init__(self):
+        self.moves = []
+        self.san = []
+        self.replay = None
+        self.root_fen = None
+        # 1 when the game started with black to move, so black opens row 0
+        self.offset = 0
+        self.first_move_number = 1
+
+    def sync(self, board):
+        """Catch up with board.move_stack, returns the first ply that changed or None."""
+        stack = board.move_stack
+        root = board.root()
+        if self.replay is None or root.fen() != self.root_fen:
+            self.reset(root)
+            changed = True
+        else:
+            changed = False
+        moves = len(self.moves)
+
+        if len(stack) >= moves and stack[:moves] == self.moves:
+            # Only new moves on the end
+            same = moves
+        else:
+            same = 0
+            while same < min(len(stack), moves) and stack[same] == self.moves[same]:
+                same += 1
+            for _ in range(moves - same):
+                self.replay.pop()
+            del self.moves[same:]
+            del self.san[same:]
+            changed = True
+
+        for move in stack[same:]:
+            self.san.append(self.replay.san(move))
+            self.replay.push(move)
+            self.moves.append(move)
+            changed = True
+        return same if changed else None
+
+    def reset(self, root):
+        self.replay = root
+        self.root_fen = root.fen()
+        self.moves = []
+        self.san = []
+        self.offset = 0 if root.turn == chess.WHITE else 1
+        self.first_move_number = root.fullmove_number
+
+    def row_of(self, ply):
+        return (ply + self.offset) // 2
+
+    def row_count(self):
+        return self.row_of(len(self.san) - 1) + 1 if self.san else 0
+
+    def row_text(self, row):
+        number = self.first_move_number + row
+        white = row * 2 - self.offset
+        if white < 0:
+            return f"{number}... {self.san[0]}"
+        if white + 1 < len(self.san):
+            return f"{number}. {self.san[white]} {self.san[white + 1]}"
+        return f"{number}. {self.san[white]}"
+
+    def rows(self, start=0):
+        return [self.row_text(row) for row in range(start, self.row_count())]
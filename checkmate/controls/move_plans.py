@@ -0,0 +1,272 @@
+import os
+import pickle
+import collections
+
+STEP_MM = 25
+
+FILES = "abcdefgh"
+RANKS = "12345678"
+
+# Segment kinds stored in a plan
+PATH = "path"           # value: absolute start point followed by relative moves (mm)
+DEADZONE = "deadzone"   # value: (x, y) the captured piece is picked up from
+
+MovePlan = collections.namedtuple("MovePlan", ["segments", "path"])
+
+
+def sign(num):
+    """Helper function: returns the sign of num."""
+    if num > 0:
+        return 1
+    elif num < 0:
+        return -1
+    else:
+        return 0
+
+
+def square_to_coord(square):
+    """
+    Chess square (e.g. "e2") to gantry coordinates in mm.
+    h1 is (0, 0), x goes up the ranks and y goes from the h to the a file.
+    """
+    x = (int(square[1]) - 1) * 2 * STEP_MM
+    y = (ord('h') - ord(square[0].lower())) * 2 * STEP_MM
+    return (x, y)
+
+
+o = STEP_MM
+
+# Castling, all in the board frame: rook first, then the king slides around it.
+CASTLING = {
+    'c1': ([(0, 14*o), (0, -6*o)], [(o, o), (0, 2*o), (-o, o)]),
+    'g1': ([(0, 0), (0, 4*o)], [(o, -o), (0, -2*o), (-o, -o)]),
+    'c8': ([(14*o, 14*o), (0, -6*o)], [(-o, o), (0, 2*o), (o, o)]),
+    'g8': ([(14*o, 0), (0, 4*o)], [(-o, -o), (0, -2*o), (o, -o)]),
+}
+
+# Captures on the edge of the board, where the captured piece can't simply be
+# pushed out past the capturing one. Keyed by (edge, dx sign, dy sign):
+#   trim   - how many half squares to stop short of the target
+#   extra  - moves appended after that to finish the approach
+#   nudge  - where the captured piece is pushed off its square
+#   back   - offset the capturing piece is pulled back into the square from
+#   dead   - offset the captured piece is picked up from for the deadzone
+EdgeCapture = collections.namedtuple("EdgeCapture", ["trim", "extra", "nudge", "back", "dead"])
+
+_H_FILE = {
+    (-1, -1): EdgeCapture(1, [], (-o, o), (o, o), (-o, o)),
+    (-1, 0): EdgeCapture(1, [], (-o, 0), (o, 0), (0, o)),
+    (1, -1): EdgeCapture(1, [], (o, o), (-o, o), (o, o)),
+    (1, 0): EdgeCapture(1, [], (o, 0), (-o, 0), (o, 0)),
+}
+
+EDGE_CAPTURES = {
+    ('h1', 0, -1): EdgeCapture(1, [], (o, 0), (0, o), (o, 0)),
+    ('h1', -1, 0): EdgeCapture(2, [(-o, o), (-o, 0)], (o, 0), (0, o), (o, 0)),
+    ('h1', -1, -1): EdgeCapture(1, [(-o, 0)], (o, 0), (0, o), (o, 0)),
+
+    ('h8', 1, -1): EdgeCapture(1, [(o, 0)], (-o, 0), (0, o), (-o, 0)),
+    ('h8', 0, -1): EdgeCapture(1, [], (-o, 0), (0, o), (-o, 0)),
+    ('h8', 1, 0): EdgeCapture(2, [(o, o), (o, 0)], (-o, 0), (0, o), (-o, 0)),
+
+    ('1', 0, 1): EdgeCapture(1, [], (o, 0), (0, -o), (o, 0)),
+    ('1', -1, 1): EdgeCapture(1, [], (o, o), (o, -o), (o, o)),
+    ('1', -1, 0): EdgeCapture(2, [(-o, -o)], (o, o), (o, -o), (o, o)),
+    ('1', -1, -1): EdgeCapture(1, [], (o, -o), (o, o), (o, -o)),
+    ('1', 0, -1): EdgeCapture(1, [], (o, 0), (0, o), (o, 0)),
+
+    ('8', 0, 1): EdgeCapture(1, [], (-o, 0), (0, -o), (-o, 0)),
+    ('8', 1, 1): EdgeCapture(1, [], (-o, o), (-o, -o), (-o, o)),
+    ('8', 1, 0): EdgeCapture(2, [(o, -o)], (-o, o), (-o, -o), (-o, o)),
+    ('8', 1, -1): EdgeCapture(1, [], (-o, -o), (-o, o), (-o, -o)),
+    ('8', 0, -1): EdgeCapture(1, [], (-o, 0), (0, o), (-o, 0)),
+
+    # Straight along the h file the captured piece goes towards the nearer home rank
+    ('h-white', 0, -1): EdgeCapture(2, [(-o, -o)], (o, o), (-o, o), (o, o)),
+    ('h-black', 0, -1): EdgeCapture(2, [(o, -o)], (-o, o), (o, o), (-o, o)),
+}
+for (dxs, dys), rule in _H_FILE.items():
+    EDGE_CAPTURES[('h-white', dxs, dys)] = rule
+    EDGE_CAPTURES[('h-black', dxs, dys)] = rule
+
+del o
+
+
+def edge_of(end_square, end_coord):
+    """Which edge rule set applies to a capture on end_square, None if it isn't an edge square."""
+    if end_square in ('h1', 'h8'):
+        return end_square
+    if end_square[1] in ('1', '8'):
+        return end_square[1]
+    if end_square[0] == 'h':
+        return 'h-black' if end_coord[0] > 180 else 'h-white'
+    return None
+
+
+def trim(move, halves):
+    """Shorten a relative move by a number of half squares along each axis it moves on."""
+    return (move[0] - sign(move[0])*halves*STEP_MM, move[1] - sign(move[1])*halves*STEP_MM)
+
+
+def compile_move(move_str, is_capture, is_castling, is_en_passant):
+    """
+    Work out every gantry path needed to play a move.
+
+    Returns a MovePlan whose segments are, in order, (PATH, points) for the
+    gantry to follow and (DEADZONE, (x, y)) where a captured piece has to be
+    taken from to the next free deadzone slot. The side to move only decides
+    which deadzone, so that is filled in when the plan is played.
+    """
+    if len(move_str) < 4:
+        raise ValueError("Move string must be at least 4 characters (e.g. 'e2e4').")
+
+    offset = STEP_MM
+    start_square = move_str[:2]
+    end_square = move_str[2:4]
+    start_coord = square_to_coord(start_square)
+    end_coord = square_to_coord(end_square)
+
+    dx = end_coord[0] - start_coord[0]
+    dy = end_coord[1] - start_coord[1]
+
+    if is_castling:
+        if end_square not in CASTLING:
+            raise ValueError(f"Not a castling move: {move_str}")
+        rook_path, king_moves = CASTLING[end_square]
+        path = [start_coord] + king_moves
+        return MovePlan(((PATH, tuple(rook_path)), (PATH, tuple(path))), tuple(path))
+
+    if min(abs(dx), abs(dy)) == 0 or abs(dx) == abs(dy):
+        path = [start_coord, (dx, dy)]
+    else:
+        # Knights go between the pieces: half a square diagonally, along, then diagonally again
+        angled_movement = (sign(dx) * offset, sign(dy) * offset)
+        if abs(dx) > abs(dy):
+            path = [start_coord, angled_movement, (2*sign(dx)*offset, 0), angled_movement]
+        else:
+            path = [start_coord, angled_movement, (0, 2*sign(dy)*offset), angled_movement]
+
+    if not is_capture:
+        return MovePlan(((PATH, tuple(path)),), tuple(path))
+
+    dx_sign = sign(dx)
+    dy_sign = sign(dy)
+
+    if is_en_passant:
+        # Play the move, then slide the passed pawn off its square
+        nudge = [(end_coord[0] - 2*offset*dx_sign, end_coord[1]), (offset*dx_sign, offset)]
+        dead_coordinates = (end_coord[0] - offset*dx_sign, end_coord[1] + offset)
+        segments = ((PATH, tuple(path)), (PATH, tuple(nudge)), (DEADZONE, dead_coordinates))
+        return MovePlan(segments, tuple(nudge))
+
+    edge = edge_of(end_square, end_coord)
+    if edge is not None:
+        rule = EDGE_CAPTURES.get((edge, dx_sign, dy_sign))
+        if rule is None:
+            # No way to get the captured piece out from this direction, plain move
+            return MovePlan(((PATH, tuple(path)),), tuple(path))
+
+        approach = path[:-1] + [trim(path[-1], rule.trim)] + rule.extra
+        nudge = [end_coord, rule.nudge]
+        back = [(end_coord[0] + rule.back[0], end_coord[1] + rule.back[1]), (-rule.back[0], -rule.back[1])]
+        dead_coordinates = (end_coord[0] + rule.dead[0], end_coord[1] + rule.dead[1])
+
+    else:
+        # Stop half a square short, push the captured piece on in the direction
+        # of travel, then step into the square.
+        end_x, end_y = path[-1]
+        approach = path[:-1] + [trim(path[-1], 1)]
+
+        if dx_sign == 0:
+            # Straight along a rank the push would hit the next piece, go sideways instead
+            captured_new = (-offset, 0) if end_coord[0] > 180 else (offset, 0)
+        else:
+            captured_new = (sign(end_x)*offset, sign(end_y)*offset)
+
+        nudge = [end_coord, captured_new]
+        back = [(end_coord[0] - sign(end_x)*offset, end_coord[1] - sign(end_y)*offset), (sign(end_x)*offset, sign(end_y)*offset)]
+        dead_coordinates = (end_coord[0] + captured_new[0], end_coord[1] + captured_new[1])
+
+    segments = ((PATH, tuple(approach)), (PATH, tuple(nudge)), (PATH, tuple(back)), (DEADZONE, dead_coordinates))
+    return MovePlan(segments, tuple(back))
+
+
+class MovePlanTable:
+    """
+    Every move plan the gantry can be asked for, compiled once.
+
+    Keys are (from+to squares, is_capture, is_castling, is_en_passant); the
+    colour only picks the deadzone so it isn't part of the key. The table can
+    be pickled to cache_path so the Pi doesn't have to rebuild it each start.
+    """
+    VERSION = 1
+
+    def __init__(self, cache_path=None):
+        self.cache_path = cache_path
+        self.plans = {}
+
+        if cache_path and self.load(cache_path):
+            return
+        self.build()
+        if cache_path:
+            self.save(cache_path)
+
+    @staticmethod
+    def key(move_str, is_capture, is_castling, is_en_passant):
+        return (move_str[:4], bool(is_capture), bool(is_castling), bool(is_en_passant))
+
+    @staticmethod
+    def enumerate_moves():
+        """All (move, is_capture, is_castling, is_en_passant) combinations worth storing."""
+        squares = [f + r for r in RANKS for f in FILES]
+        for start in squares:
+            for end in squares:
+                if start == end:
+                    continue
+                yield start + end, False, False, False
+                yield start + end, True, False, False
+
+        for move in ("e1c1", "e1g1", "e8c8", "e8g8"):
+            yield move, False, True, False
+
+        for i, f in enumerate(FILES):
+            for df in (-1, 1):
+                if 0 <= i + df < 8:
+                    yield f"{f}5{FILES[i + df]}6", True, False, True
+                    yield f"{f}4{FILES[i + df]}3", True, False, True
+
+    def build(self):
+        self.plans = {}
+        for args in self.enumerate_moves():
+            self.plans[self.key(*args)] = compile_move(*args)
+        print(f"[MovePlans] Compiled {len(self.plans)} move plans")
+
+    def lookup(self, move_str, is_capture, is_castling, is_en_passant):
+        key = self.key(move_str, is_capture, is_castling, is_en_passant)
+        plan = self.plans.get(key)
+        if plan is None:
+            # Unusual flag combination, compile it now and keep it
+            plan = compile_move(*key)
+            self.plans[key] = plan
+        return plan
+
+    def save(self, path):
+        try:
+            with open(path, "wb") as f:
+                pickle.dump((self.VERSION, self.plans), f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            print(f"[MovePlans] Could not save {path}: {e}")
+
+    def load(self, path):
+        if not os.path.exists(path):
+            return False
+        try:
+            with open(path, "rb") as f:
+                version, plans = pickle.load(f)
+        except Exception as e:
+            print(f"[MovePlans] Could not load {path}: {e}")
+            return False
+        if version != self.VERSION:
+            return False
+        self.plans = plans
+        return True
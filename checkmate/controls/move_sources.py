@@ -0,0 +1,147 @@
+import os
+import random
+
+import chess
+import chess.polyglot
+import chess.syzygy
+
+
+def clamp(value, low, high):
+    return max(low, min(high, value))
+
+
+class EloPolicy:
+    """
+    How a given Elo uses the book and tablebases, so limited strength still
+    plays like a person rather than perfect theory then a weak engine.
+
+    book_plies      - leaves the book after this many plies (weaker players earlier)
+    book_sharpness  - exponent on the book weights: 0 picks any book move evenly,
+                      1 follows the weights, higher sticks to the main lines
+    tablebase_skip  - chance of ignoring the tablebase and letting the engine play
+    tablebase_exact - take the fastest win, otherwise any move that keeps the result
+    """
+    def __init__(self, elo):
+        elo = elo or 1500
+        self.elo = elo
+        self.book_plies = int(clamp(elo / 80, 6, 40))
+        self.book_sharpness = clamp((elo - 800) / 600, 0.0, 2.0)
+        self.tablebase_skip = clamp((1600 - elo) / 1200, 0.0, 0.5)
+        self.tablebase_exact = elo >= 2000
+
+
+class OpeningBook:
+    """A Polyglot .bin opening book, disabled if the file isn't there."""
+    def __init__(self, path):
+        self.path = path
+        self.reader = None
+        if path and os.path.exists(path):
+            try:
+                self.reader = chess.polyglot.open_reader(path)
+                print(f"[Book] Opened {path}")
+            except OSError as e:
+                print(f"[Book] Could not open {path}: {e}")
+        elif path:
+            print(f"[Book] No opening book at {path}")
+
+    def choose(self, board, policy, rng):
+        if self.reader is None or board.ply() >= policy.book_plies:
+            return None
+        entries = list(self.reader.find_all(board))
+        if not entries:
+            return None
+        weights = [entry.weight ** policy.book_sharpness for entry in entries]
+        if not any(weights):
+            return rng.choice(entries).move
+        return rng.choices(entries, weights=weights)[0].move
+
+    def close(self):
+        if self.reader is not None:
+            self.reader.close()
+            self.reader = None
+
+
+class Tablebase:
+    """Syzygy tablebases from a directory, disabled if there aren't any."""
+    def __init__(self, path):
+        self.path = path
+        self.tablebase = None
+        self.max_pieces = 0
+        if path and os.path.isdir(path):
+            try:
+                self.tablebase = chess.syzygy.open_tablebase(path)
+                # Tables are named like KQvK.rtbw, the longest name is the most pieces
+                names = [os.path.splitext(name)[0] for name in os.listdir(path) if name.endswith(".rtbw")]
+                self.max_pieces = max((len(name) - 1 for name in names), default=0)
+                print(f"[Tablebase] Opened {path}, up to {self.max_pieces} pieces")
+            except OSError as e:
+                print(f"[Tablebase] Could not open {path}: {e}")
+                self.tablebase = None
+        elif path:
+            print(f"[Tablebase] No tablebases at {path}")
+
+    def choose(self, board, policy, rng):
+        if self.tablebase is None or chess.popcount(board.occupied) > self.max_pieces:
+            return None
+        if board.castling_rights:
+            return None
+
+        scored = []
+        try:
+            for move in board.legal_moves:
+                board.push(move)
+                try:
+                    if board.is_checkmate():
+                        return move
+                    # Both from the opponent's side, so lower is better for us
+                    wdl = self.tablebase.probe_wdl(board)
+                    dtz = self.tablebase.probe_dtz(board)
+                finally:
+                    board.pop()
+                scored.append((wdl, dtz, move))
+        except (KeyError, chess.syzygy.MissingTableError):
+            return None
+        if not scored:
+            return None
+
+        best_wdl = min(wdl for wdl, _, _ in scored)
+        keeps_result = [(dtz, move) for wdl, dtz, move in scored if wdl == best_wdl]
+        if not policy.tablebase_exact:
+            return rng.choice(keeps_result)[1]
+        # Winning: opponent's dtz is negative, closest to 0 mates fastest.
+        # Losing: opponent's dtz is positive, largest holds out longest.
+        return max(keeps_result, key=lambda item: item[0])[1]
+
+    def close(self):
+        if self.tablebase is not None:
+            self.tablebase.close()
+            self.tablebase = None
+
+
+class MoveSources:
+    """
+    Book and tablebase moves looked up before asking the engine. Both are
+    optional; lookup() returns None whenever the engine should search.
+    """
+    def __init__(self, book_path=None, tablebase_path=None, seed=None):
+        self.book = OpeningBook(book_path)
+        self.tablebase = Tablebase(tablebase_path)
+        self.rng = random.Random(seed)
+
+    def lookup(self, board, elo=None):
+        policy = EloPolicy(elo)
+        move = self.book.choose(board, policy, self.rng)
+        if move is not None:
+            print(f"[Book] {move}")
+            return move
+
+        if self.rng.random() < policy.tablebase_skip:
+            return None
+        move = self.tablebase.choose(board, policy, self.rng)
+        if move is not None:
+            print(f"[Tablebase] {move}")
+        return move
+
+    def close(self):
+        self.book.close()
+        self.tablebase.close()
@@ -0,0 +1,149 @@
+import chess
+
+FILES = "abcdefgh"
+RANKS = "12345678"
+
+FULL_MASK = (1 << 64) - 1
+
+
+def square_index(square):
+    """Square as a python-chess index, accepts an index or a name like 'e4'."""
+    if isinstance(square, str):
+        return chess.parse_square(square.lower())
+    return square
+
+
+class Occupancy:
+    """
+    Which squares have a piece on them, as seen by the hall sensors.
+
+    Stored as a single 64-bit int using python-chess square numbering
+    (a1 = 0, h1 = 7, a8 = 56), so it converts to/from chess.SquareSet for free.
+    Immutable: occupy()/vacate() return a new Occupancy, which means it can be
+    passed around and kept as a reference board without copying.
+
+    Squares can be given as indices or names:
+        occ["e4"], "e4" in occ, occ.get("e4", 0)
+    and two boards diff with xor:
+        changed = current ^ reference; len(changed), list(changed)
+    """
+    __slots__ = ("mask",)
+
+    def __init__(self, mask=0):
+        object.__setattr__(self, "mask", int(mask) & FULL_MASK)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Occupancy is immutable")
+
+    @classmethod
+    def from_rows(cls, rows):
+        """From an 8x8 list laid out as rows[rank][file] (get_squares_game layout)."""
+        mask = 0
+        for rank, row in enumerate(rows):
+            for file, value in enumerate(row):
+                if value:
+                    mask |= 1 << (rank * 8 + file)
+        return cls(mask)
+
+    @classmethod
+    def from_squares(cls, squares):
+        mask = 0
+        for square in squares:
+            mask |= 1 << square_index(square)
+        return cls(mask)
+
+    @classmethod
+    def from_board(cls, board):
+        """What the hall sensors should see for a chess.Board."""
+        return cls(board.occupied)
+
+    # Square access
+    def __contains__(self, square):
+        return bool(self.mask >> square_index(square) & 1)
+
+    def __getitem__(self, square):
+        return self.mask >> square_index(square) & 1
+
+    def get(self, square, default=None):
+        """1/0 for a square, like the old occupancy dicts."""
+        try:
+            return self[square]
+        except (ValueError, TypeError):
+            return default
+
+    def occupy(self, square):
+        return Occupancy(self.mask | 1 << square_index(square))
+
+    def vacate(self, square):
+        return Occupancy(self.mask & ~(1 << square_index(square)))
+
+    def __iter__(self):
+        """Occupied squares in ascending order."""
+        mask = self.mask
+        while mask:
+            low = mask & -mask
+            yield low.bit_length() - 1
+            mask ^= low
+
+    def square_names(self):
+        return [chess.square_name(square) for square in self]
+
+    # Set operations
+    def __xor__(self, other):
+        return Occupancy(self.mask ^ int(other))
+
+    def __and__(self, other):
+        return Occupancy(self.mask & int(other))
+
+    def __or__(self, other):
+        return Occupancy(self.mask | int(other))
+
+    def __sub__(self, other):
+        return Occupancy(self.mask & ~int(other))
+
+    def __invert__(self):
+        return Occupancy(~self.mask)
+
+    def __len__(self):
+        return bin(self.mask).count("1")
+
+    def __bool__(self):
+        return self.mask != 0
+
+    def __int__(self):
+        return self.mask
+
+    __index__ = __int__
+
+    def __eq__(self, other):
+        if isinstance(other, (Occupancy, int)):
+            return self.mask == int(other)
+        return NotImplemented
+
+    def __hash__(self):
+        return hash(self.mask)
+
+    def __repr__(self):
+        return f"Occupancy(0x{self.mask:016x})"
+
+    def __str__(self):
+        return str(chess.SquareSet(self.mask))
+
+    def squareset(self):
+        return chess.SquareSet(self.mask)
+
+    def changed_square(self, other):
+        """Name of the one square that differs from other, None if zero or several changed."""
+        diff = self.mask ^ int(other)
+        if diff and not diff & (diff - 1):
+            return chess.square_name(diff.bit_length() - 1)
+        return None
+
+    # Orientation views, built only when something asks for a list
+    def rows(self):
+        """rows[rank][file], same layout as SenseLayer.get_squares_game()."""
+        return [[self.mask >> (rank * 8 + file) & 1 for file in range(8)] for rank in range(8)]
+
+    def columns(self):
+        """columns[file][rank], same layout as SenseLayer.get_squares()."""
+        return [[self.mask >> (rank * 8 + file) & 1 for rank in range(8)] for file in range(8)]
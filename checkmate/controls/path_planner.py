@@ -0,0 +1,318 @@
+import math
+import heapq
+import collections
+import contextlib
+
+STEP_MM = 25
+
+# The half square lattice the magnet can stop on, in mm. x runs up the ranks
+# (rank 1 = 0, rank 8 = 350), y from the h file (0) to the a file (350), then
+# the corridor at 375 and the two deadzone rows.
+XS = tuple(i * STEP_MM for i in range(15))
+YS = tuple(i * STEP_MM for i in range(16)) + (410, 435)
+X_INDEX = {x: i for i, x in enumerate(XS)}
+Y_INDEX = {y: j for j, y in enumerate(YS)}
+
+# Eight directions in lattice steps
+DIRECTIONS = ((1, 0), (-1, 0), (0, 1), (0, -1), (1, 1), (1, -1), (-1, 1), (-1, -1))
+
+# Beyond the corridor is the deadzone, only crossed straight into a slot
+CORRIDOR_Y = 375
+
+# A shortcut has to stay this far from the centre of any other piece, the
+# same gap the lattice paths leave when they run between two squares
+CLEARANCE = STEP_MM
+
+# GRBL defaults from GantryControl.home(): $110/$111 = 15000 mm/min, $120/$121 = 700 mm/s^2
+MAX_RATE = 15000 / 60   # mm/s
+ACCELERATION = 700      # mm/s^2
+
+
+def heading(dx, dy):
+    """Unit direction of a move, so steps on the uneven deadzone rows only merge when really in line."""
+    length = math.hypot(dx, dy)
+    if length == 0:
+        return (0, 0)
+    return (round(dx / length, 9), round(dy / length, 9))
+
+
+def sign(num):
+    return (num > 0) - (num < 0)
+
+
+def square_coord(square):
+    """python-chess square index to gantry mm, the centre of the square."""
+    return ((square >> 3) * 2 * STEP_MM, (7 - (square & 7)) * 2 * STEP_MM)
+
+
+def segment_time(length, max_rate=MAX_RATE, acceleration=ACCELERATION):
+    """Time for one straight move from rest to rest with a trapezoidal speed profile."""
+    if length <= 0:
+        return 0.0
+    ramp = max_rate * max_rate / acceleration   # distance to speed up and slow down again
+    if length < ramp:
+        return 2 * math.sqrt(length / acceleration)
+    return length / max_rate + max_rate / acceleration
+
+
+def path_time(path, max_rate=MAX_RATE, acceleration=ACCELERATION, overshoot=0):
+    """
+    Estimated time for a path given as [absolute start, relative moves...].
+    With an overshoot the last move goes that much past and comes back, like
+    movement_to_gcode does to seat the piece.
+    """
+    moves = [(dx, dy) for dx, dy in path[1:]]
+    total = 0.0
+    if overshoot and moves:
+        dx, dy = moves.pop()
+        ox, oy = sign(dx) * overshoot, sign(dy) * overshoot
+        total += segment_time(math.hypot(dx + ox, dy + oy), max_rate, acceleration)
+        total += segment_time(math.hypot(ox, oy), max_rate, acceleration)
+    return total + sum(segment_time(math.hypot(dx, dy), max_rate, acceleration) for dx, dy in moves)
+
+
+def path_points(path):
+    """[absolute start, relative moves...] to the absolute points along it."""
+    x, y = path[0]
+    points = [(x, y)]
+    for dx, dy in path[1:]:
+        x += dx
+        y += dy
+        points.append((x, y))
+    return points
+
+
+def points_to_path(points):
+    """Absolute points back to [absolute start, relative moves...], always at least one move."""
+    path = [points[0]]
+    for (x0, y0), (x1, y1) in zip(points, points[1:]):
+        path.append((x1 - x0, y1 - y0))
+    if len(path) == 1:
+        path.append((0, 0))
+    return path
+
+
+def simplify_path(path):
+    """Drop empty moves and merge moves that carry on in the same direction."""
+    if not path or len(path) < 2:
+        return path
+    merged = []
+    for dx, dy in path[1:]:
+        if dx == 0 and dy == 0:
+            continue
+        if merged and heading(*merged[-1]) == heading(dx, dy):
+            last = merged.pop()
+            merged.append((last[0] + dx, last[1] + dy))
+        else:
+            merged.append((dx, dy))
+    return [path[0]] + (merged or [(0, 0)])
+
+
+def distance_to_segment(point, a, b):
+    px, py = point
+    ax, ay = a
+    bx, by = b
+    dx, dy = bx - ax, by - ay
+    length = dx * dx + dy * dy
+    if length == 0:
+        return math.hypot(px - ax, py - ay)
+    t = max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length))
+    return math.hypot(px - ax - t * dx, py - ay - t * dy)
+
+
+class PathPlanner:
+    """
+    A* over the 25 mm lattice for moving one piece around the others.
+
+    Square centres with a piece on them are blocked (the moving piece's own
+    square isn't), and a diagonal step can't cut the corner of a blocked
+    centre. Each step costs its length at full speed and every change of
+    direction costs the time lost slowing down and speeding up again, so
+    the search prefers a few long straight or diagonal segments over lots of
+    short ones.
+
+    Plans are cached per (start, goal, occupancy), where occupancy is a
+    python-chess style bitboard (an int or Occupancy) plus any extra blocked
+    points such as filled deadzone slots.
+    """
+    def __init__(self, max_rate=MAX_RATE, acceleration=ACCELERATION, cache_size=1024):
+        self.max_rate = max_rate
+        self.acceleration = acceleration
+        self.cache_size = cache_size
+        self.cache = collections.OrderedDict()
+
+    def set_limits(self, max_rate=None, acceleration=None):
+        """New machine limits (mm/s, mm/s^2), cached plans no longer apply."""
+        if max_rate is not None:
+            self.max_rate = max_rate
+        if acceleration is not None:
+            self.acceleration = acceleration
+        self.cache.clear()
+
+    @contextlib.contextmanager
+    def limits(self, max_rate=None, acceleration=None):
+        """Plan with other limits for a while, e.g. the gentler magnet-on drags of a reset."""
+        previous = (self.max_rate, self.acceleration)
+        self.set_limits(max_rate, acceleration)
+        try:
+            yield self
+        finally:
+            self.set_limits(*previous)
+
+    @staticmethod
+    def blocked_points(occupied, start=None, goal=None, extra=()):
+        """Lattice points a piece can't pass through, leaving out start and goal."""
+        blocked = set(extra)
+        mask = int(occupied)
+        while mask:
+            low = mask & -mask
+            blocked.add(square_coord(low.bit_length() - 1))
+            mask ^= low
+        blocked.discard(start)
+        blocked.discard(goal)
+        return frozenset(blocked)
+
+    def plan(self, start, goal, occupied=0, extra=()):
+        """
+        Waypoints from start to goal (absolute mm, start first), or None if
+        there is no way through or either end is off the lattice.
+        """
+        start = tuple(start)
+        goal = tuple(goal)
+        key = (start, goal, int(occupied), frozenset(extra))
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+
+        blocked = self.blocked_points(occupied, start, goal, extra)
+        waypoints = self._search(start, goal, blocked)
+
+        self.cache[key] = waypoints
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return waypoints
+
+    def plan_path(self, start, goal, occupied=0, extra=()):
+        """Same as plan() but as [absolute start, relative moves...], the format movement_to_gcode takes."""
+        waypoints = self.plan(start, goal, occupied, extra)
+        if waypoints is None:
+            return None
+        return points_to_path(waypoints)
+
+    def estimate(self, path, overshoot=0):
+        """Estimated seconds for a [absolute start, relative moves...] path with the current limits."""
+        return path_time(path, self.max_rate, self.acceleration, overshoot)
+
+    def shortcut(self, path, occupied=0, extra=()):
+        """
+        Pull the path tight: from each corner, go straight to the furthest later
+        corner that keeps CLEARANCE from every other piece. Turns dog-legs
+        through square corners into single diagonal moves. Nothing is cut
+        into or across the deadzone.
+        """
+        points = path_points(path)
+        if len(points) < 3:
+            return list(path)
+        blocked = self.blocked_points(occupied, points[0], points[-1], extra)
+
+        def clear(a, b):
+            if a[1] > CORRIDOR_Y or b[1] > CORRIDOR_Y:
+                return False
+            return all(distance_to_segment(point, a, b) >= CLEARANCE for point in blocked)
+
+        pulled = [points[0]]
+        i = 0
+        while i < len(points) - 1:
+            j = len(points) - 1
+            while j > i + 1 and not clear(points[i], points[j]):
+                j -= 1
+            pulled.append(points[j])
+            i = j
+        return points_to_path(pulled)
+
+    def optimise(self, path, occupied=None, extra=(), overshoot=0):
+        """
+        The quickest of the path as given, merged, and (when the occupancy is
+        known) pulled tight with diagonal shortcuts. Returns (path, seconds).
+        """
+        candidates = [list(path), simplify_path(path)]
+        if occupied is not None:
+            candidates.append(simplify_path(self.shortcut(candidates[1], occupied, extra)))
+        timed = [(self.estimate(candidate, overshoot), k) for k, candidate in enumerate(candidates)]
+        seconds, best = min(timed)
+        return candidates[best], seconds
+
+    def _search(self, start, goal, blocked):
+        if start[0] not in X_INDEX or start[1] not in Y_INDEX or goal[0] not in X_INDEX or goal[1] not in Y_INDEX:
+            return None
+        if start == goal:
+            return [start]
+
+        start_node = (X_INDEX[start[0]], Y_INDEX[start[1]])
+        goal_node = (X_INDEX[goal[0]], Y_INDEX[goal[1]])
+        turn_cost = self.max_rate / self.acceleration
+
+        def heuristic(node):
+            return math.hypot(XS[node[0]] - goal[0], YS[node[1]] - goal[1]) / self.max_rate
+
+        def free(i, j):
+            if not (0 <= i < len(XS) and 0 <= j < len(YS)):
+                return False
+            point = (XS[i], YS[j])
+            if point[1] > CORRIDOR_Y and point[0] != start[0] and point[0] != goal[0]:
+                return False
+            return point not in blocked
+
+        # States are (node, direction arrived in) so a turn can be charged for
+        best = {(start_node, None): 0.0}
+        came_from = {}
+        queue = [(heuristic(start_node), 0.0, start_node, None)]
+        while queue:
+            _, cost, node, arrived = heapq.heappop(queue)
+            if node == goal_node:
+                return self._waypoints(came_from, (node, arrived))
+            if cost > best.get((node, arrived), math.inf):
+                continue
+
+            i, j = node
+            for di, dj in DIRECTIONS:
+                ni, nj = i + di, j + dj
+                if not free(ni, nj):
+                    continue
+                # Don't clip a piece when cutting a corner
+                if di and dj and (not free(ni, j) or not free(i, nj)):
+                    continue
+                dx, dy = XS[ni] - XS[i], YS[nj] - YS[j]
+                moving = heading(dx, dy)
+                step = math.hypot(dx, dy) / self.max_rate
+                if moving != arrived:
+                    step += turn_cost
+                new_cost = cost + step
+                state = ((ni, nj), moving)
+                if new_cost < best.get(state, math.inf):
+                    best[state] = new_cost
+                    came_from[state] = (node, arrived)
+                    heapq.heappush(queue, (new_cost + heuristic((ni, nj)), new_cost, (ni, nj), moving))
+        return None
+
+    @staticmethod
+    def _waypoints(came_from, state):
+        """Walk back from the goal, keeping only the points where the direction changes."""
+        nodes = []
+        directions = []
+        while state in came_from:
+            node, direction = state
+            nodes.append(node)
+            directions.append(direction)
+            state = came_from[state]
+        nodes.append(state[0])
+        directions.append(None)
+        nodes.reverse()
+        directions.reverse()
+
+        waypoints = [(XS[nodes[0][0]], YS[nodes[0][1]])]
+        for k in range(1, len(nodes)):
+            last = k == len(nodes) - 1
+            if last or directions[k + 1] != directions[k]:
+                waypoints.append((XS[nodes[k][0]], YS[nodes[k][1]]))
+        return waypoints
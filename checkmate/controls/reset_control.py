@@ -1,12 +1,32 @@
 import math
 import time
 
+try:
+    from occupancy import Occupancy
+    from reset_executor import ResetExecutor, ResetStep, RESET_ACCELERATION, reset_limits
+    from reset_planner import ResetPlanner, PARKING_SQUARES, location_coord
+except:
+    from checkmate.controls.occupancy import Occupancy
+    from checkmate.controls.reset_executor import ResetExecutor, ResetStep, RESET_ACCELERATION, reset_limits
+    from checkmate.controls.reset_planner import ResetPlanner, PARKING_SQUARES, location_coord
 
 
-class BoardReset:
-
 
+class BoardReset:
 
+    # Deadzone slots the captured pieces fill, in order
+    white_deadzone_slots = [
+        (350,435), (350,410), (325,435), (325,410),
+        (300,435), (300,410), (275,435), (275,410),
+        (250,435), (250,410), (225,435), (225,410),
+        (200,435), (200,410), (175,435), (175,410)
+    ]
+    black_deadzone_slots = [
+        (0,435), (0,410), (25,435), (25,410),
+        (50,435), (50,410), (75,435), (75,410),
+        (100,435), (100,410), (125,435), (125,410),
+        (150,435), (150,410), (175,435), (175,410)
+    ]
 
     starting_positions = {
     "K": ["e1"],                  # White King
@@ -26,11 +46,17 @@ class BoardReset:
 
 
 
-    def __init__(self, board, gantry, hall):    
+    def __init__(self, board, gantry, hall, material_tracker=None):    
 
         self.board = board
         self.gantry = gantry
         self.hall = hall
+        # The game's captured pieces, see material_tracker.py
+        self.material_tracker = material_tracker
+        # Streams a whole reset as one program, see reset_executor.py
+        self.executor = ResetExecutor(gantry)
+        # Who goes where and in what order, see reset_planner.py
+        self.reset_planner = ResetPlanner(acceleration=RESET_ACCELERATION)
 
     def distance(self, x, y):
         """Calculate the Manhattan distance between two board coordinates."""
@@ -479,21 +505,16 @@ class BoardReset:
             elif symbol.islower(): # Black piece
                 self.gantry.black_captured.append((symbol, coords))
                 
-        # Poll hall for empty squares and create an 8x8 matrix
-        empty_squares = self.hall.sense_layer.get_squares_game()
-        print(f"[Test] Untransformed Empty squares: {empty_squares}")
-        empty_squares = [row[::-1] for row in empty_squares]
-        print(f"[Test] Transformed Empty squares: {empty_squares}")
-
-        # Invert 1s and 0s in the empty_squares matrix
-        empty_squares = [[1 - cell for cell in row] for row in empty_squares]
-        print(f"[Test] Inverted Empty squares: {empty_squares}")
+        # Poll hall for empty squares
+        occupancy = self.hall.sense_layer.get_occupancy()
+        print(f"[Test] Occupancy:\n{occupancy}")
 
         empty_targets = []
-        for i in range(len(empty_squares)):
-            for j in range(len(empty_squares[i])): 
-                if empty_squares[i][j] == 1:
-                    empty_targets.append((j*50, i*50))  
+        for rank in range(8):
+            for j in range(8):
+                # j counts files from h to a
+                if (rank * 8 + 7 - j) not in occupancy:
+                    empty_targets.append((j*50, rank*50))  
         
         print(f"[Test] Empty targets: {empty_targets}")
 
@@ -578,7 +599,8 @@ class BoardReset:
                 self.gantry.send_commands(commands)         
                 
 
-    def full_reset(self, captured_pieces):
+    def full_reset(self, captured_pieces=None):
+        captured_pieces = self.game_captures(captured_pieces)
 
     
         # piece_alternatives = {
@@ -705,16 +727,109 @@ class BoardReset:
 
         # self.captured_pieces=['P', 'P', 'N', 'B', 'p', 'p', 'n', 'b']
 
-        moves = self.simple_reset_to_home(current_fen)
+        occupancy = self.hall.sense_layer.get_occupancy()
+        steps = self.plan_reset(current_fen, captured_pieces, occupancy)
+        self.executor.run(steps, occupancy, on_progress=self.on_reset_progress)
 
-        for start_square, info in moves.items():
-            print(f"Move {info['piece']} from {start_square} to {info['final_square']} via path:")
-            print(info["path"])
+    def captured_piece_coords(self, captured_pieces):
+        """Deadzone slot of each captured piece, [(symbol, (x, y)), ...], filled in capture order."""
+        white_count = 0
+        black_count = 0
+        coords = []
+        for piece in captured_pieces:
+            if piece.isupper():
+                coords.append((piece, self.white_deadzone_slots[white_count % len(self.white_deadzone_slots)]))
+                white_count += 1
+            else:
+                coords.append((piece, self.black_deadzone_slots[black_count % len(self.black_deadzone_slots)]))
+                black_count += 1
+        return coords
 
-            cmds = self.gantry.path_to_gcode(info["path"])
-            self.gantry.send_commands(cmds)
+    def plan_reset(self, fen, captured_pieces, occupancy):
+        """
+        Every move of a full reset, board pieces and captured pieces together,
+        as ResetSteps in the order to run them. The reset planner picks who
+        goes to which home square and the order; each path is then planned
+        around the pieces where they'll be at that point.
+        """
+        on_board = self.parse_fen(fen)
+        pieces = [(piece, square) for square, piece in on_board.items()]
+        pieces += self.captured_piece_coords(captured_pieces)
+        return self.plan_moves(pieces, occupancy)
 
-        self.recover_captured_pieces(captured_pieces)
+    def plan_moves(self, pieces, occupancy, targets=None):
+        """
+        ResetSteps taking pieces ([(symbol, square or deadzone slot), ...]) to
+        targets ({symbol: [squares]}, the home squares by default), in one
+        planning pass from one occupancy reading. Pieces that have to wait for
+        each other are ordered, and cycles broken through a free middle
+        square or deadzone slot.
+        """
+        on_board = set(location for _, location in pieces if isinstance(location, str))
+        # Anything the sensors see that isn't in the game can't be moved
+        obstacles = [square for square in occupancy.square_names() if square not in on_board]
+        buffers = list(PARKING_SQUARES) + self.deadzone_buffers()
+
+        moves = self.reset_planner.plan(pieces, obstacles, targets=targets, buffers=buffers)
+        with reset_limits(self.gantry):
+            return self.plan_paths(moves, pieces, occupancy)
+
+    def plan_paths(self, moves, pieces, occupancy):
+        """Gantry path for each ResetMove, around the pieces where they are by then."""
+        deadzone = set(location for _, location in pieces if not isinstance(location, str))
+        steps = []
+        for move in moves:
+            start = location_coord(move.start)
+            dest = location_coord(move.final_square)
+            if isinstance(move.start, str):
+                occupancy = occupancy.vacate(move.start)
+            else:
+                deadzone.discard(move.start)
+            path = self.reset_path(start, dest, occupancy, deadzone)
+            print(f"Move {move.piece} from {move.start} to {move.final_square} via path: {path}")
+            steps.append(ResetStep(move.piece, move.start, move.final_square, path))
+            if isinstance(move.final_square, str):
+                occupancy = occupancy.occupy(move.final_square)
+            else:
+                deadzone.add(move.final_square)
+        return steps
+
+    def deadzone_buffers(self):
+        """
+        Deadzone slots a piece can wait in during a reset: the inner slot of
+        every column past gantry.nextdead_white/black, where nothing has been
+        captured to yet, so nothing waits behind it.
+        """
+        buffers = []
+        x, y = self.gantry.nextdead_white
+        x = x if y == 435 else x + 25
+        while x < 175:
+            buffers.append((x, 410))
+            x += 25
+        x, y = self.gantry.nextdead_black
+        x = x if y == 435 else x - 25
+        while x > 175:
+            buffers.append((x, 410))
+            x -= 25
+        return buffers
+
+    def reset_path(self, start, dest, occupancy, deadzone=()):
+        """
+        Path for one reset move, around the pieces on the board and the
+        captured pieces still in the deadzone. Falls back to the fixed shapes
+        if the planner can't find a way.
+        """
+        path = self.gantry.planner.plan_path(start, dest, int(occupancy), deadzone)
+        if path is not None:
+            return path
+        if start[1] > 375 or dest[1] > 375:
+            # Along the corridor, in and out of the deadzone straight
+            return [start, (0, 375 - start[1]), (dest[0] - start[0], 0), (0, dest[1] - 375)]
+        return self.generate_natural_path(start, dest)
+
+    def on_reset_progress(self, done, total, step):
+        """Called as each piece of a reset is put down, override or replace to show it."""
+        pass
 
         # white_moves = self.captured_piece_return(self.captured_pieces)
         # print("Assignments")
@@ -830,94 +945,37 @@ class BoardReset:
 
         It works as follows:
         1. Parses the FEN string into a mapping of square -> piece.
-        2. For each piece, checks its list of home squares (from a hard-coded dictionary)
-            by polling current occupancy (using self.hall.sense_layer.get_squares_game() and 
-            occupancy_list_to_dict).
-        3. If a candidate home square is free (occupancy == 0), it generates a natural path
-            from the current square to that home square using generate_natural_path.
-        4. It then "moves" the piece (removing it from the list) and records the move plan.
-        5. This process repeats until all pieces have been moved (or no progress can be made).
-        
-        Returns a dictionary mapping the original square of each moved piece to its move plan.
+        2. Reads the occupancy once from the hall sensors.
+        3. The reset planner matches pieces to home squares, works out which moves
+           have to wait for which and breaks any cycle by sending one piece to a
+           free buffer cell first (see plan_moves), so every piece gets home in one pass.
+        
+        Returns a dictionary mapping the original square of each moved piece to its move plan,
+        in the order to run them. A piece that waits in a buffer shows up again under the buffer.
         Each move plan is a dictionary with:
         - "piece": the piece symbol,
-        - "final_square": the chosen home square,
-        - "path": a list starting with the absolute starting coordinate, then relative moves.
+        - "final_square": the chosen home square (or buffer),
+        - "path": a list starting with the absolute starting coordinate, then relative moves,
+        - "time": the gantry's estimate in seconds for the path.
         """
-        # Define the standard home (starting) positions.
-        starting_positions = {
-            "K": ["e1"],
-            "Q": ["d1"],
-            "R": ["a1", "h1"],
-            "B": ["c1", "f1"],
-            "N": ["b1", "g1"],
-            "P": ["a2", "b2", "c2", "d2", "e2", "f2", "g2", "h2"],
-            "k": ["e8"],
-            "q": ["d8"],
-            "r": ["a8", "h8"],
-            "b": ["c8", "f8"],
-            "n": ["b8", "g8"],
-            "p": ["a7", "b7", "c7", "d7", "e7", "f7", "g7", "h7"]
-        }
-
         # Parse the FEN to get a dictionary of current positions.
         current_mapping = self.parse_fen(fen)
 
         print(current_mapping)
-        
-        # This will hold our move plans.
-        move_plans = {}
 
-        occupancy = self.occupancy_list_to_dict(self.hall.sense_layer.get_squares_game())
-
-
-        # Loop until current_mapping is empty (all pieces moved) or no progress can be made.
-        progress = True
-        while current_mapping:
-            progress = False
-            # Get current occupancy from the hall sensors.
-            print("occupancy:")
-            print(occupancy)
-            # Use a copy of the current mapping so we can modify it during iteration.
-            for square, piece in list(current_mapping.items()):
-                # If the piece is already at one of its home squares, remove it.
-                if square in starting_positions.get(piece, []):
-                    del current_mapping[square]
-                    continue
-
-                # Look for a free home square candidate.
-                candidates = starting_positions.get(piece, [])
-                candidate_found = None
-                for candidate in candidates:
-                    # Check occupancy: free if the value is 0.
-                    if occupancy.get(candidate, 0) == 0:
-                        candidate_found = candidate
-                        break
-
-                if candidate_found:
-                    # Get physical coordinates for the current square and candidate square.
-                    start_coords = self.square_to_coords_ry(square)
-                    dest_coords = self.square_to_coords_ry(candidate_found)
-                    # Generate a natural path (assumed to move through the corners of the square).
-                    path = self.generate_natural_path(start_coords, dest_coords)
-                    occupancy[square] = 0
-                    occupancy[candidate] = 1
-                    # Record the move plan.
-                    move_plans[square] = {
-                        "piece": piece,
-                        "final_square": candidate_found,
-                        "path": path
-                    }
-                    # "Move" the piece by removing it from current_mapping.
-                    del current_mapping[square]
-                    progress = True
-            # If no progress was made during this iteration, break the loop.
-            print("current mapping")
-            print(current_mapping)
-            if not progress:
-                print("No further progress can be made. The following pieces remain unmoved:", current_mapping)
-                break
+        occupancy = self.hall.sense_layer.get_occupancy()
+        print("occupancy:")
+        print(occupancy)
 
+        pieces = [(piece, square) for square, piece in current_mapping.items()]
+        move_plans = {}
+        for step in self.plan_moves(pieces, occupancy):
+            move_plans[step.start] = {
+                "piece": step.piece,
+                "final_square": step.final_square,
+                "path": step.path,
+                "time": self.gantry.estimate_path_time(step.path)
+            }
         return move_plans
     
     # def recover_captured_piece_path(self, captured_coord, piece, occupancy):
@@ -1014,37 +1072,40 @@ class BoardReset:
 
 
     
-    def recover_captured_pieces(self, captured_pieces):
+    def game_captures(self, captured_pieces=None):
+        """The captured pieces passed in, otherwise the game's from the material tracker."""
+        if captured_pieces is not None:
+            return captured_pieces
+        if self.material_tracker is not None:
+            return list(self.material_tracker.captured)
+        return []
+
+    def recover_captured_pieces(self, captured_pieces=None):
+        """Put the captured pieces back on their home squares, streamed as one program."""
+        captured_pieces = self.game_captures(captured_pieces)
+        occupancy = self.hall.sense_layer.get_occupancy()
+        return self.executor.run(self.captured_piece_steps(captured_pieces, occupancy), occupancy,
+                                 on_progress=self.on_reset_progress)
+
+    def captured_piece_steps(self, captured_pieces, occ):
         """
         Processes a list of captured pieces and assigns each one a home coordinate
         based on its color using a LIFO (stack) order (the last captured piece is processed first).
 
         It works as follows:
         1. Two candidate coordinate patterns (for white and black) are defined.
-        2. Current board occupancy is obtained from self.hall.sense_layer.get_squares_game()
-            and converted to a dictionary using occupancy_list_to_dict.
+        2. occ is the board occupancy the pieces are put back onto.
         3. The captured_pieces list is iterated in reverse order.
         4. For each captured piece, the function checks the candidate coordinates in order.
             The first candidate found with occupancy value 0 (free) is assigned.
         5. The occupancy dictionary is updated immediately so that no two pieces are assigned to the same square.
         
         Returns:
-        A dictionary mapping the assignment order (0 for the first piece processed, etc.)
-        to a dictionary with the piece symbol and its assigned coordinate.
+        A list of ResetStep, one per piece that found a free home square, in the order they should move.
         """
         # Define candidate coordinate patterns.
-        white_pattern = [
-            (350,435), (350,410), (325,435), (325,410),
-            (300,435), (300,410), (275,435), (275,410),
-            (250,435), (250,410), (225,435), (225,410),
-            (200,435), (200,410), (175,435), (175,410)
-        ]
-        black_pattern = [
-            (0,435), (0,410), (25,435), (25,410),
-            (50,435), (50,410), (75,435), (75,410),
-            (100,435), (100,410), (125,435), (125,410),
-            (150,435), (150,410), (175,435), (175,410)
-        ]
+        white_pattern = self.white_deadzone_slots
+        black_pattern = self.black_deadzone_slots
         home_squares = {
             "K": ["e1"],
             "Q": ["d1"],
@@ -1060,8 +1121,7 @@ class BoardReset:
             "p": ["a7", "b7", "c7", "d7", "e7", "f7", "g7", "h7"]
         }
         
-        # Get current occupancy.
-        occ = self.occupancy_list_to_dict(self.hall.sense_layer.get_squares_game())
+        steps = []
 
         # white_count = self.count_capital_elements(captured_pieces)
         # black_count = len(captured_pieces) - white_count
@@ -1113,12 +1173,11 @@ class BoardReset:
                 else:
                     path_end = [(0, (target_coords[1] + 25) - 375), (-25, -25)]
                 
-                # Update occupancy and move the piece
-                occ[closest_square] = 1
+                # Update occupancy and queue the piece
+                occ = occ.occupy(closest_square)
 
                 movements = self.gantry.parse_path_to_movement(path + path_end)
-                commands = self.gantry.movement_to_gcode(movements)
-                self.gantry.send_commands(commands)
+                steps.append(ResetStep(symbol, coord, closest_square, movements))
 
         for i, piece in enumerate(reversed(black_coords)):
             symbol, coord = piece
@@ -1142,12 +1201,13 @@ class BoardReset:
                 else:
                     path_end = [(0, (target_coords[1] + 25)-375), (+ 25, -25)]
                 
-                # Update occupancy and move the piece
-                occ[closest_square] = 1
+                # Update occupancy and queue the piece
+                occ = occ.occupy(closest_square)
 
                 movements = self.gantry.parse_path_to_movement(path + path_end)
-                commands = self.gantry.movement_to_gcode(movements)
-                self.gantry.send_commands(commands)
+                steps.append(ResetStep(symbol, coord, closest_square, movements))
+
+        return steps
     
     def count_capital_elements(array):
             """
@@ -1207,7 +1267,7 @@ class BoardReset:
         candidate_found = None
         # Re-read occupancy for each candidate.
         for candidate in home_squares.get(piece, []):
-            occ = self.occupancy_list_to_dict(self.hall.sense_layer.get_squares_game())
+            occ = self.hall.sense_layer.get_occupancy()
             if occ.get(candidate, 0) == 0:  # 0 indicates the square is free.
                 candidate_found = candidate
                 break
@@ -1222,7 +1282,7 @@ class BoardReset:
         # Generate a natural path from wp2 to the final coordinate.
         # We assume generate_natural_path returns a list with the first element equal to wp2,
         # then relative moves.
-        natural_segment = self.generate_natural_path(wp2, final_coord)
+        natural_segment = self.generate_natural_path(wp2, final_coord, occupancy)
         # Build the overall path:
         #   Segment 1: from captured_coord to wp1.
         delta1 = (wp1[0] - captured_coord[0], wp1[1] - captured_coord[1])
@@ -1375,7 +1435,7 @@ class BoardReset:
         black_index = 0
         
         for i, piece in enumerate(captured_pieces):
-            occupancy = self.occupancy_list_to_dict(self.hall.sense_layer.get_squares_game())
+            occupancy = self.hall.sense_layer.get_occupancy()
             if piece.isupper():
                 stored_coord = white_pattern[white_index % len(white_pattern)]
                 white_index += 1
@@ -1438,7 +1498,7 @@ class BoardReset:
 
         while candidate_y >= 0:
             # Re-fetch occupancy continuously.
-            occupancy = self.occupancy_list_to_dict(self.hall.sense_layer.get_squares_game())
+            occupancy = self.hall.sense_layer.get_occupancy()
             candidate_coord = (target_x, candidate_y)
             square_candidate = self.coords_to_square_ry(candidate_coord)
             if occupancy.get(square_candidate) == 0:
@@ -1484,17 +1544,21 @@ class BoardReset:
             return 0
 
 
-    def generate_natural_path(self, start, dest):
+    def generate_natural_path(self, start, dest, occupancy=None):
         """
         Generates a natural L-shaped path from the center of the start square to the center of the destination square.
         The piece exits its starting square through the corner in the direction of travel and enters the destination square
         through the corresponding corner.
         
         If the movement is strictly lateral or vertical, the piece will default to moving toward the board's center.
+
+        Given the occupancy, the gantry's path planner routes around the pieces instead, and the
+        L-shape is only used if it can't find a way through.
         
         Parameters:
         start: (x, y) coordinates of the center of the starting square.
         dest: (x, y) coordinates of the center of the destination square.
+        occupancy: Occupancy (or bitboard) of the squares to avoid, optional.
         
         Returns:
         A list where the first element is the absolute starting coordinate and subsequent elements are relative moves.
@@ -1502,6 +1566,10 @@ class BoardReset:
 
         print(start)
         print(dest)
+        planned = self.planned_path(start, dest, occupancy)
+        if planned is not None:
+            return planned
+
         start_x, start_y = start
         dest_x, dest_y = dest
 
@@ -1588,9 +1656,16 @@ class BoardReset:
         else:
             return self.clamp(y, 25, 325)
 
-    def generate_path(self, start, dest, offset=25):
+    def planned_path(self, start, dest, occupancy):
+        """A* path around the occupied squares from the gantry's planner, None if there's no occupancy or no way through."""
+        if occupancy is None or getattr(self.gantry, "planner", None) is None:
+            return None
+        return self.gantry.planner.plan_path(start, dest, int(occupancy))
+
+    def generate_path(self, start, dest, offset=25, occupancy=None):
         """
         Generates an L-shaped, collision-free path from start to dest.
+        With an occupancy the planner's route around the pieces is tried first.
         
         Coordinate system:
         - x: rank coordinate (0 at rank 1 up to 350 at rank 8)
@@ -1601,6 +1676,10 @@ class BoardReset:
         - Each subsequent element is a relative move (delta_x, delta_y)
             representing the movement from the previous waypoint.
         """
+        planned = self.planned_path(start, dest, occupancy)
+        if planned is not None:
+            return planned
+
         start_x, start_y = start
         dest_x, dest_y = dest
 
@@ -1691,39 +1770,26 @@ class BoardReset:
 
     def occupancy_list_to_dict(self, occ_list):
         """
-        Converts an 8x8 occupancy list into a dictionary mapping board squares
-        (e.g., "a8", "b8", …, "h1") to occupancy values (1 for occupied, 0 for empty).
-        
-        Assumes:
-        - occ_list is a list of 8 lists.
-        - The first inner list corresponds to rank 8,
-            the second to rank 7, …, and the last to rank 1.
-        - Within each inner list, the first element corresponds to file a, etc.
-        """
-        occ_dict = {}
-        for i, row in enumerate(occ_list):
-            rank = i + 1 
-            for j, val in enumerate(row):
-                file_letter = chr(ord('a') + j)
-                square = file_letter + str(rank)
-                occ_dict[square] = val
-        return occ_dict
-
-    def plan_board_reset(self, current_fen, target_fen, piece_alternatives):
+        Converts an 8x8 occupancy list (occ_list[rank][file], rank 1 first, as
+        returned by get_squares_game) into an Occupancy. Squares are looked up
+        by name the same way the old dict was, e.g. occ.get("e4") -> 1 or 0.
+        The hall layer returns an Occupancy directly via get_occupancy().
+        """
+        return Occupancy.from_rows(occ_list)
+
+    def plan_board_reset(self, current_fen, target_fen, piece_alternatives=None):
         """
         Plans moves to reset the board from a current configuration to a target configuration,
-        using an externally provided occupancy list for candidate selection.
-        
-        This version matches pieces by type and processes the moves in two passes.
-        In the first pass, all pieces except the king and queen are assigned target squares.
-        In the second pass, the king and queen are processed last to minimize conflicts.
-        If no candidate square is available for a piece, its move is delayed for later processing.
-        
-        The occupancy is obtained from the hall-effect sensors (self.hall.sense_layer.get_squares_game())
-        and converted via occupancy_list_to_dict.
+        using the occupancy from the hall-effect sensors (read once).
+
+        Pieces are matched to the target squares of their type by the reset planner, so
+        piece_alternatives (other squares a piece may take, like the other rook's corner or a
+        neighbouring pawn's square) are already covered by the matching; the argument is kept
+        for callers. Moves that have to wait for another piece to leave are ordered after it,
+        and cycles are broken through a free buffer cell, so nothing is left delayed.
         
         Returns a dictionary mapping the current square (for pieces that need to move)
-        to a move plan. Each move plan includes:
+        to a move plan, in the order to run them. Each move plan includes:
         - "piece": the piece character
         - "final_square": the target square
         - "path": a list starting with the absolute starting coordinate followed by relative moves.
@@ -1731,95 +1797,21 @@ class BoardReset:
         # Parse FEN strings.
         current_mapping = self.parse_fen(current_fen)
         target_mapping = self.parse_fen(target_fen)
-        
-        # # Build a dictionary: piece letter -> list of target squares from target configuration.
-        # target_positions = {}
-        # for square, piece in target_mapping.items():
-        #     target_positions.setdefault(piece, []).append(square)
-        
-        # Get occupancy from the hall-effect sensors and convert to dictionary.
-        target_occupancy = self.occupancy_list_to_dict(self.hall.sense_layer.get_squares_game())
-        
-        move_paths = {}
-        delayed_moves = {}  # For pieces with no available square on first try.
-
-        # Split pieces into two groups: non-king/queen and king/queen.
-        first_pass = {}
-        second_pass = {}
-        for square, piece in current_mapping.items():
-            if piece.upper() in ('K', 'Q'):
-                second_pass[square] = piece
-            else:
-                first_pass[square] = piece
-
-        def process_pieces(mapping):
-            for square, piece in mapping.items():
-                # Skip if already correctly placed.
-                if square in target_mapping and target_mapping[square] == piece:
-                    continue
-
-                # Get candidate target squares for this piece type.
-                candidates = target_positions.get(piece, [])
-                # Filter out candidates that equal the current square or are already occupied.
-                candidates = [sq for sq in candidates if sq != square and target_occupancy.get(sq, 0) == 0]
-
-                # Add alternatives from piece_alternatives if available.
-                if square in piece_alternatives:
-                    alt_candidates = [sq for sq in piece_alternatives[square] if target_occupancy.get(sq, 0) == 0]
-                    candidates.extend(alt_candidates)
-                
-                chosen = self.select_target_square(piece, candidates, target_occupancy)
-                if chosen is None:
-                    # No candidate available now; mark this move as delayed.
-                    delayed_moves[square] = piece
-                    continue
-                
-                # Mark the chosen square as occupied.
-                target_occupancy[chosen] = 1
-                start_coords = self.square_to_coords_ry(square)
-                dest_coords = self.square_to_coords_ry(chosen)
-                path = self.generate_path(start_coords, dest_coords, offset=25)
-                move_paths[square] = {
-                    "piece": piece,
-                    "final_square": chosen,
-                    "path": path
-                }
 
-        # Process non-king/queen pieces.
-        process_pieces(first_pass)
-        # Process king and queen.
-        process_pieces(second_pass)
+        targets = {}
+        for square, piece in target_mapping.items():
+            targets.setdefault(piece, []).append(square)
 
-        # Now try processing delayed moves repeatedly until no further progress is made.
-        progress = True
-        while delayed_moves and progress:
-            progress = False
-            # Make a copy of delayed_moves to iterate over.
-            for square, piece in list(delayed_moves.items()):
-                candidates = target_positions.get(piece, [])
-                candidates = [sq for sq in candidates if sq != square and target_occupancy.get(sq, 0) == 0]
-                if square in piece_alternatives:
-                    alt_candidates = [sq for sq in piece_alternatives[square] if target_occupancy.get(sq, 0) == 0]
-                    candidates.extend(alt_candidates)
-                chosen = self.select_target_square(piece, candidates, target_occupancy)
-                if chosen is not None:
-                    target_occupancy[chosen] = 1
-                    start_coords = self.square_to_coords_ry(square)
-                    dest_coords = self.square_to_coords_ry(chosen)
-                    path = self.generate_path(start_coords, dest_coords, offset=25)
-                    move_paths[square] = {
-                        "piece": piece,
-                        "final_square": chosen,
-                        "path": path
-                    }
-                    del delayed_moves[square]
-                    progress = True
-        # If some moves remain delayed, they can be handled later.
-        if delayed_moves:
-            print("The following moves remain delayed due to lack of available squares:")
-            for square, piece in delayed_moves.items():
-                print(f"Piece {piece} from {square}")
+        occupancy = self.hall.sense_layer.get_occupancy()
+        pieces = [(piece, square) for square, piece in current_mapping.items()]
 
+        move_paths = {}
+        for step in self.plan_moves(pieces, occupancy, targets):
+            move_paths[step.start] = {
+                "piece": step.piece,
+                "final_square": step.final_square,
+                "path": step.path
+            }
         return move_paths
 
     def coords_to_square_ry(self, coord):
@@ -1889,7 +1881,7 @@ class BoardReset:
         # Initial pass: Process each captured piece.
         for i, piece in enumerate(captured_pieces):
             # Continuously fetch current occupancy.
-            occupancy = self.occupancy_list_to_dict(self.hall.sense_layer.get_squares_game())
+            occupancy = self.hall.sense_layer.get_occupancy()
             if piece.isupper():
                 stored_coord = white_pattern[white_index % len(white_pattern)]
                 white_index += 1
@@ -1904,7 +1896,7 @@ class BoardReset:
                         "path": path
                     }
                     # Immediately update occupancy.
-                    occupancy[final_square] = piece
+                    occupancy = occupancy.occupy(final_square)
             else:
                 stored_coord = black_pattern[black_index % len(black_pattern)]
                 black_index += 1
@@ -1918,14 +1910,14 @@ class BoardReset:
                         "final_square": final_square,
                         "path": path
                     }
-                    occupancy[final_square] = piece
+                    occupancy = occupancy.occupy(final_square)
 
         # Reattempt delayed moves until no further progress is made.
         progress = True
         while (delayed_white or delayed_black) and progress:
             progress = False
             # Always re-fetch occupancy before each reattempt.
-            occupancy = self.occupancy_list_to_dict(self.hall.sense_layer.get_squares_game())
+            occupancy = self.hall.sense_layer.get_occupancy()
             for i, (piece, stored_coord) in list(delayed_white.items()):
                 path, final_square = self.recover_captured_piece_path(stored_coord, piece, occupancy)
                 if final_square is not None:
@@ -1936,7 +1928,7 @@ class BoardReset:
                         "path": path
                     }
                     del delayed_white[i]
-                    occupancy[final_square] = piece
+                    occupancy = occupancy.occupy(final_square)
                     progress = True
             for i, (piece, stored_coord) in list(delayed_black.items()):
                 path, final_square = self.recover_captured_piece_path(stored_coord, piece, occupancy)
@@ -1948,7 +1940,7 @@ class BoardReset:
                         "path": path
                     }
                     del delayed_black[i]
-                    occupancy[final_square] = piece
+                    occupancy = occupancy.occupy(final_square)
                     progress = True
 
         if delayed_white or delayed_black:
@@ -2010,7 +2002,7 @@ class BoardReset:
 
         while candidate_y >= 0:
             # Re-fetch occupancy continuously.
-            occupancy = self.occupancy_list_to_dict(self.hall.sense_layer.get_squares_game())
+            occupancy = self.hall.sense_layer.get_occupancy()
             candidate_coord = (target_x, candidate_y)
             square_candidate = self.coords_to_square_ry(candidate_coord)
             if occupancy.get(square_candidate) == 0:
@@ -2489,7 +2481,7 @@ class BoardReset:
         black_index = 0
         
         for i, piece in enumerate(captured_pieces):
-            occupancy = self.occupancy_list_to_dict(self.hall.sense_layer.get_squares_game())
+            occupancy = self.hall.sense_layer.get_occupancy()
             if piece.isupper():
                 stored_coord = white_pattern[white_index % len(white_pattern)]
                 white_index += 1
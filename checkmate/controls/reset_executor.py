@@ -0,0 +1,100 @@
+import collections
+import contextlib
+import threading
+import time
+
+# One piece to put back: where it is (a square name, or a deadzone coordinate
+# for captured pieces), the square it goes to and the gantry path to get there
+# as [absolute start, relative moves...].
+ResetStep = collections.namedtuple("ResetStep", ["piece", "start", "final_square", "path"])
+
+# mm/s^2 while dragging pieces around, the old reset did the same with MAG ON
+RESET_ACCELERATION = 400
+
+
+def acceleration_commands(acceleration):
+    return [f"$120={acceleration}", f"$121={acceleration}"]
+
+
+def reset_limits(gantry, acceleration=RESET_ACCELERATION):
+    """Plan with the reset acceleration on the gantry's planner, if it has one."""
+    planner = getattr(gantry, "planner", None)
+    if planner is None:
+        return contextlib.nullcontext()
+    return planner.limits(acceleration=acceleration)
+
+
+class ResetExecutor:
+    """
+    Runs a whole board reset as one G-code program.
+
+    Every piece's moves (magnet on, path, overshoot, magnet off) are compiled
+    up front and streamed back to back, so GRBL never sits waiting for the
+    next piece to be sent. The M9 at the end of each piece only gets its "ok"
+    once that piece is down, which is what the progress callback hangs off.
+
+    The program runs at a reduced acceleration so dragged pieces don't slip
+    off the magnet, the gantry's own acceleration is put back at the end.
+    """
+    def __init__(self, gantry, acceleration=RESET_ACCELERATION):
+        self.gantry = gantry
+        self.acceleration = acceleration
+        self.progress = (0, 0)
+        self.estimate = 0.0
+
+    def compile(self, steps, occupancy=None):
+        """
+        G-code for each step, in order: [(step, commands, seconds), ...].
+        With the starting occupancy, each path can cut corners around the
+        pieces that are on the board at that point of the reset.
+        """
+        program = []
+        with reset_limits(self.gantry, self.acceleration):
+            for step in steps:
+                occupied = int(occupancy) if occupancy is not None else None
+                commands = self.gantry.movement_to_gcode(list(step.path), occupied)
+                program.append((step, commands, self.gantry.last_path_time))
+                if occupancy is not None:
+                    if isinstance(step.start, str):
+                        occupancy = occupancy.vacate(step.start)
+                    if isinstance(step.final_square, str):
+                        occupancy = occupancy.occupy(step.final_square)
+        return program
+
+    def run(self, steps, occupancy=None, on_progress=None, wait=True):
+        """
+        Stream every step. on_progress(done, total, step) is called as each
+        piece is put down. Returns the future for the whole program.
+        """
+        program = self.compile(steps, occupancy)
+        total = len(program)
+        self.estimate = sum(seconds for _, _, seconds in program)
+        self.progress = (0, total)
+        print(f"[Reset] {total} pieces, about {self.estimate:.1f}s")
+        if not program:
+            return None
+
+        lock = threading.Lock()
+        start = time.time()
+
+        def placed(step):
+            with lock:
+                done = self.progress[0] + 1
+                self.progress = (done, total)
+            print(f"[Reset] {done}/{total} {step.piece} to {step.final_square} ({time.time() - start:.1f}s)")
+            if on_progress is not None:
+                on_progress(done, total, step)
+
+        planner = getattr(self.gantry, "planner", None)
+        previous = planner.acceleration if planner is not None else None
+
+        with self.gantry.batch_motion():
+            self.gantry.send_commands(acceleration_commands(self.acceleration))
+            for step, commands, _ in program:
+                future = self.gantry.send_commands(commands, on_ack=lambda step=step: placed(step))
+            if previous is not None:
+                future = self.gantry.send_commands(acceleration_commands(previous))
+
+        if wait and future is not None:
+            future.result()
+        return future
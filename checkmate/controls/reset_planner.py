@@ -0,0 +1,377 @@
+import math
+import collections
+
+try:
+    from move_plans import square_to_coord
+    from path_planner import MAX_RATE, ACCELERATION, segment_time
+except:
+    from checkmate.controls.move_plans import square_to_coord
+    from checkmate.controls.path_planner import MAX_RATE, ACCELERATION, segment_time
+
+# Where every piece starts a game
+HOME_SQUARES = {
+    "K": ["e1"],
+    "Q": ["d1"],
+    "R": ["a1", "h1"],
+    "B": ["c1", "f1"],
+    "N": ["b1", "g1"],
+    "P": ["a2", "b2", "c2", "d2", "e2", "f2", "g2", "h2"],
+    "k": ["e8"],
+    "q": ["d8"],
+    "r": ["a8", "h8"],
+    "b": ["c8", "f8"],
+    "n": ["b8", "g8"],
+    "p": ["a7", "b7", "c7", "d7", "e7", "f7", "g7", "h7"],
+}
+ALL_HOME_SQUARES = frozenset(square for squares in HOME_SQUARES.values() for square in squares)
+
+# The middle of the board, where pieces can wait without being in anyone's way
+PARKING_SQUARES = tuple(f"{file}{rank}" for rank in "3456" for file in "abcdefgh")
+
+# Deadzone slots on the outer row are behind the ones on this row
+INNER_DEADZONE_Y = 410
+
+# A piece to move. start is a square name, or an (x, y) deadzone slot for a
+# captured piece; final_square None means "out of the way", for a spare
+# piece (a second queen) sitting on someone's home square.
+ResetMove = collections.namedtuple("ResetMove", ["piece", "start", "final_square"])
+
+
+def location_coord(location):
+    """Square name or deadzone (x, y) to gantry mm."""
+    if isinstance(location, str):
+        return square_to_coord(location)
+    return tuple(location)
+
+
+def inner_slot(location):
+    """The deadzone slot a piece at location has to pass through, if any."""
+    if isinstance(location, str) or location[1] <= INNER_DEADZONE_Y:
+        return None
+    return (location[0], INNER_DEADZONE_Y)
+
+
+def hungarian(cost):
+    """
+    Minimum cost assignment for a rows x cols matrix with rows <= cols.
+    Returns the column for each row. O(rows^2 * cols), the Kuhn-Munkres
+    algorithm with potentials.
+    """
+    n = len(cost)
+    if n == 0:
+        return []
+    m = len(cost[0])
+    u = [0.0] * (n + 1)
+    v = [0.0] * (m + 1)
+    match = [0] * (m + 1)     # row matched to each column, 1-based, 0 is none
+    way = [0] * (m + 1)
+    for i in range(1, n + 1):
+        match[0] = i
+        j0 = 0
+        minv = [math.inf] * (m + 1)
+        used = [False] * (m + 1)
+        while True:
+            used[j0] = True
+            i0 = match[j0]
+            delta = math.inf
+            j1 = 0
+            for j in range(1, m + 1):
+                if used[j]:
+                    continue
+                cur = cost[i0 - 1][j - 1] - u[i0] - v[j]
+                if cur < minv[j]:
+                    minv[j] = cur
+                    way[j] = j0
+                if minv[j] < delta:
+                    delta = minv[j]
+                    j1 = j
+            for j in range(m + 1):
+                if used[j]:
+                    u[match[j]] += delta
+                    v[j] -= delta
+                else:
+                    minv[j] -= delta
+            j0 = j1
+            if match[j0] == 0:
+                break
+        while j0:
+            j1 = way[j0]
+            match[j0] = match[j1]
+            j0 = j1
+    result = [None] * n
+    for j in range(1, m + 1):
+        if match[j]:
+            result[match[j] - 1] = j - 1
+    return result
+
+
+class MoveGraph:
+    """
+    Which reset moves have to wait for which: a move waits for the move
+    that takes the piece off its destination (and, out of an outer deadzone
+    slot, the one that clears the slot in front). A move out of a buffer
+    waits for the one that put the piece there. Every location is the start
+    of at most one move and the end of at most one, so each move waits on at
+    most three others.
+    """
+    def __init__(self, moves, blockers, occupied):
+        self.moves = list(moves)
+        self.blockers = blockers
+        self.occupied = occupied
+        self.by_start = {move.start: move for move in self.moves}
+        self.by_final = {move.final_square: move for move in self.moves}
+
+    def waits_for(self, move):
+        before = [self.by_start[location] for location in self.blockers(move)
+                  if location in self.occupied and location in self.by_start]
+        if move.start not in self.occupied and move.start in self.by_final:
+            before.append(self.by_final[move.start])
+        return [other for other in before if other is not move]
+
+    def topological_order(self, choose=None):
+        """
+        Kahn's algorithm. choose(ready) picks the next move out of those
+        with nothing left to wait for (the first by default). Returns
+        (order, left), left being the moves stuck in or behind a cycle.
+        """
+        waiting = {move: len(self.waits_for(move)) for move in self.moves}
+        unblocks = collections.defaultdict(list)
+        for move in self.moves:
+            for before in self.waits_for(move):
+                unblocks[before].append(move)
+
+        ready = [move for move in self.moves if waiting[move] == 0]
+        order = []
+        while ready:
+            move = choose(ready) if choose is not None else ready[0]
+            ready.remove(move)
+            order.append(move)
+            for after in unblocks[move]:
+                waiting[after] -= 1
+                if waiting[after] == 0:
+                    ready.append(after)
+        done = set(order)
+        return order, [move for move in self.moves if move not in done]
+
+    def find_cycle(self, left):
+        """A cycle among the moves left over by topological_order()."""
+        left = set(left)
+        move = next(iter(left))
+        seen = []
+        while move not in seen:
+            seen.append(move)
+            move = next(before for before in self.waits_for(move) if before in left)
+        return seen[seen.index(move):]
+
+
+class ResetPlanner:
+    """
+    Works out which piece goes to which home square and in what order.
+
+    Pieces of each kind are matched to that kind's home squares with the
+    Hungarian algorithm, so the total distance carried is as small as it can
+    be. The moves then go in a graph of which has to wait for which; every
+    cycle in it is broken up front by sending one piece to the nearest free
+    buffer cell first (a middle square or an empty deadzone slot), so the
+    whole reset comes out of one pass. The graph is sorted nearest ready move
+    first and the order polished with 2-opt to cut empty travel.
+    """
+    def __init__(self, max_rate=MAX_RATE, acceleration=ACCELERATION, max_rounds=100):
+        self.max_rate = max_rate
+        self.acceleration = acceleration
+        self.max_rounds = max_rounds
+
+    def travel(self, a, b):
+        """Seconds of empty travel between two points in mm."""
+        return segment_time(math.hypot(a[0] - b[0], a[1] - b[1]), self.max_rate, self.acceleration)
+
+    def plan(self, pieces, obstacles=(), start_point=(0, 0), targets=None, buffers=PARKING_SQUARES):
+        """
+        pieces is [(symbol, location), ...] for everything that has to end up
+        on its target square, on the board or in the deadzone. targets maps
+        each symbol to its squares (the home squares by default). obstacles
+        are squares taken by something that isn't one of the pieces, buffers
+        the places a piece may wait. Returns ResetMoves in order.
+        """
+        moves = self.assign(pieces, targets)
+        occupied = set(location for _, location in pieces) | set(obstacles)
+        order = self.order(moves, occupied, start_point, buffers)
+        return self.improve(order, occupied, start_point)
+
+    def assign(self, pieces, targets=None):
+        """Match pieces to target squares per kind, returns the ResetMoves that actually move something."""
+        targets = HOME_SQUARES if targets is None else targets
+        all_targets = set(square for squares in targets.values() for square in squares)
+        by_symbol = collections.defaultdict(list)
+        for symbol, location in pieces:
+            by_symbol[symbol].append(location)
+
+        moves = []
+        for symbol, locations in by_symbol.items():
+            homes = list(targets.get(symbol, []))
+            home_coords = [square_to_coord(home) for home in homes]
+            coords = [location_coord(location) for location in locations]
+            if len(locations) <= len(homes):
+                cost = [[math.dist(c, h) for h in home_coords] for c in coords]
+                pairs = [(k, col) for k, col in enumerate(hungarian(cost))]
+            else:
+                # More of this piece than target squares, the extras stay put
+                # unless they're in the way
+                cost = [[math.dist(c, h) for c in coords] for h in home_coords]
+                pairs = [(k, col) for col, k in enumerate(hungarian(cost))]
+                spare = set(range(len(locations))) - set(k for k, _ in pairs)
+                for k in sorted(spare):
+                    if locations[k] in all_targets:
+                        moves.append(ResetMove(symbol, locations[k], None))
+            for k, col in pairs:
+                if locations[k] != homes[col]:
+                    moves.append(ResetMove(symbol, locations[k], homes[col]))
+        return moves
+
+    def blockers(self, move):
+        """Locations that have to be empty before this move can happen."""
+        blocking = []
+        if move.final_square is not None:
+            blocking.append(move.final_square)
+        inner = inner_slot(move.start)
+        if inner is not None:
+            blocking.append(inner)
+        return blocking
+
+    def order(self, moves, occupied, start_point=(0, 0), buffers=PARKING_SQUARES):
+        """
+        Moves in an order where each one's destination is empty by the time
+        it runs: cycles are broken through buffers, then the dependency graph
+        is sorted nearest ready move first.
+        """
+        moves = self.without_stuck(moves, occupied)
+        moves = self.break_cycles(moves, occupied, buffers)
+        here = start_point
+
+        def nearest(ready):
+            nonlocal here
+            move = min(ready, key=lambda m: self.travel(here, location_coord(m.start)))
+            here = location_coord(move.final_square)
+            return move
+
+        order, left = MoveGraph(moves, self.blockers, occupied).topological_order(nearest)
+        for move in left:
+            print(f"[ResetPlanner] No order found for {move.piece} on {move.start}")
+        return order
+
+    def without_stuck(self, moves, occupied):
+        """Drop moves waiting on a square taken by something that never moves."""
+        moves = list(moves)
+        while True:
+            sources = set(move.start for move in moves)
+            stuck = [move for move in moves
+                     if any(b in occupied and b not in sources for b in self.blockers(move))]
+            if not stuck:
+                return moves
+            for move in stuck:
+                print(f"[ResetPlanner] {move.piece} on {move.start} can't get to {move.final_square}")
+                moves.remove(move)
+
+    def break_cycles(self, moves, occupied, buffers):
+        """
+        Give every spare piece a buffer to go to and split one move of every
+        cycle into start -> buffer -> destination. Buffers are only used once
+        and never on a square anything else starts from or goes to, so the
+        graph stays right as it is.
+        """
+        taken = set(occupied) | set(move.final_square for move in moves if move.final_square)
+        free = [location for location in buffers if location not in taken]
+
+        def nearest_buffer(location):
+            if not free:
+                return None
+            coord = location_coord(location)
+            buffer = min(free, key=lambda b: math.dist(coord, location_coord(b)))
+            free.remove(buffer)
+            return buffer
+
+        resolved = []
+        for move in moves:
+            if move.final_square is not None:
+                resolved.append(move)
+                continue
+            buffer = nearest_buffer(move.start)
+            if buffer is None:
+                print(f"[ResetPlanner] Nowhere to put the spare {move.piece} from {move.start}")
+                continue
+            resolved.append(move._replace(final_square=buffer))
+
+        graph = MoveGraph(resolved, self.blockers, occupied)
+        _, left = graph.topological_order()
+        while left:
+            cycle = graph.find_cycle(left)
+            move = min(cycle, key=lambda m: min((math.dist(location_coord(m.start), location_coord(b)) for b in free),
+                                                default=0))
+            buffer = nearest_buffer(move.start)
+            if buffer is None:
+                print("[ResetPlanner] No free buffer to break a cycle, leaving", cycle)
+                for stuck in cycle:
+                    resolved.remove(stuck)
+            else:
+                resolved.remove(move)
+                resolved.append(ResetMove(move.piece, move.start, buffer))
+                resolved.append(ResetMove(move.piece, buffer, move.final_square))
+            graph = MoveGraph(resolved, self.blockers, occupied)
+            _, left = graph.topological_order()
+        return resolved
+
+    def empty_travel(self, moves, start_point=(0, 0)):
+        total = 0.0
+        here = start_point
+        for move in moves:
+            total += self.travel(here, location_coord(move.start))
+            here = location_coord(move.final_square)
+        return total
+
+    def valid(self, moves, occupied):
+        """True if every piece is there when it's moved and never lands on or passes one that hasn't left yet."""
+        occupied = set(occupied)
+        for move in moves:
+            if move.start not in occupied or any(b in occupied for b in self.blockers(move)):
+                return False
+            occupied.discard(move.start)
+            occupied.add(move.final_square)
+        return True
+
+    def improve(self, moves, occupied, start_point=(0, 0)):
+        """
+        2-opt on the move order: reverse runs of moves while it cuts empty
+        travel and stays valid. The moves themselves keep their direction, so
+        reversing a run changes every link inside it; those are summed up as
+        the run grows to keep each try O(1).
+        """
+        best = list(moves)
+        n = len(best)
+        for _ in range(self.max_rounds):
+            improved = False
+            starts = [location_coord(move.start) for move in best]
+            finals = [start_point] + [location_coord(move.final_square) for move in best]
+            # links[k] is the empty travel into move k, finals is shifted by one
+            links = [self.travel(finals[k], starts[k]) for k in range(n)]
+            for i in range(n - 1):
+                old_inside = 0.0
+                new_inside = 0.0
+                for j in range(i + 1, n):
+                    old_inside += links[j]
+                    new_inside += self.travel(finals[j + 1], starts[j - 1])
+                    old = links[i] + old_inside
+                    new = self.travel(finals[i], starts[j]) + new_inside
+                    if j + 1 < n:
+                        old += links[j + 1]
+                        new += self.travel(finals[i + 1], starts[j + 1])
+                    if new < old - 1e-9:
+                        candidate = best[:i] + best[i:j + 1][::-1] + best[j + 1:]
+                        if self.valid(candidate, occupied):
+                            best = candidate
+                            improved = True
+                            break
+                if improved:
+                    break
+            if not improved:
+                break
+        return best
@@ -1,98 +1,119 @@
 import lgpio
 import time
 import threading
+from concurrent.futures import ThreadPoolExecutor
 
 class Rocker():
+    """
+    The rocker servo and its end switch.
+
+    Every command returns a Future straight away and runs in order on one
+    worker thread, so a turn can fire a toggle and carry on. The servo PWM is
+    programmed once per move rather than refreshed from a loop, and the end
+    switch is watched with an lgpio alert, so waiting for it doesn't spin.
+    """
     def __init__(self):
         self.servo_pin = 18
         self.switch_pin = 23
         self.handle = lgpio.gpiochip_open(0)
         lgpio.gpio_claim_output(self.handle, self.servo_pin)
-        lgpio.gpio_claim_input(self.handle, self.switch_pin, lgpio.SET_PULL_UP)
-        
+        self.DEBOUNCE_US = 5000
+        lgpio.gpio_claim_alert(self.handle, self.switch_pin, lgpio.BOTH_EDGES, lgpio.SET_PULL_UP)
+        lgpio.gpio_set_debounce_micros(self.handle, self.switch_pin, self.DEBOUNCE_US)
+
         # Servo PWM configuration
         self.PWM_FREQ = 50
         self.CENTER_DUTY = 7.5
         self.OPEN_DUTY = 8.7
         self.CLOSE_DUTY = 6.5
         self.MAX_WAIT_TIME = 2.0
-        
-        # Threading related attributes
-        self.pwm_thread = None
-        self.thread_lock = threading.Lock()
-        self.running = False
+        self.HOME_TIME = 0.3
+
+        # Switch state kept up to date by the alert callback
+        self.switch_state = lgpio.gpio_read(self.handle, self.switch_pin)
+        self.switch_changed = threading.Condition()
+        self.switch_callback = lgpio.callback(self.handle, self.switch_pin, lgpio.BOTH_EDGES, self._on_switch_edge)
+
+        # Commands run one after another, never on the caller's thread
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rocker")
         self.current_duty = 0
-        self.start_pwm_thread()
-
-    def start_pwm_thread(self):
-        """Start the PWM control thread"""
-        if self.pwm_thread is None or not self.pwm_thread.is_alive():
-            self.running = True
-            self.pwm_thread = threading.Thread(target=self._pwm_control_loop)
-            self.pwm_thread.daemon = True  # Thread will close when main program exits
-            self.pwm_thread.start()
-    
-    def _pwm_control_loop(self):
-        """Main PWM control loop that runs in the thread"""
-        while self.running:
-            with self.thread_lock:
-                if self.current_duty > 0:
-                    lgpio.tx_pwm(self.handle, self.servo_pin, self.PWM_FREQ, self.current_duty)
-            time.sleep(0.02)  # Small delay to prevent CPU hogging
+
+    def _on_switch_edge(self, chip, gpio, level, tick):
+        # level 2 is a watchdog timeout, not an edge
+        if level == 2:
+            return
+        with self.switch_changed:
+            self.switch_state = level
+            self.switch_changed.notify_all()
 
     def reset(self):
+        return self.worker.submit(self._reset)
+
+    def _reset(self):
         if self.get_switch_state():
-            self.to_white()
+            self._to_white()
         else:
-            self.home()
+            self._home()
 
     def get_switch_state(self):
-        return lgpio.gpio_read(self.handle, self.switch_pin)
+        return self.switch_state
 
     def home(self):
+        return self.worker.submit(self._home)
+
+    def _home(self):
         self._move_servo(self.CENTER_DUTY)
-        time.sleep(0.3)  
-        self._stop_servo()  
-    
+        time.sleep(self.HOME_TIME)
+        self._stop_servo()
+
     def to_white(self):
+        return self.worker.submit(self._to_white)
+
+    def _to_white(self):
+        initial_state = self.get_switch_state()
         self._move_servo(self.OPEN_DUTY)
-        self._wait_for_switch_change()
-        self.home()
-    
+        self._wait_for_switch_change(initial_state)
+        self._home()
+
     def to_black(self):
+        return self.worker.submit(self._to_black)
+
+    def _to_black(self):
+        initial_state = self.get_switch_state()
         self._move_servo(self.CLOSE_DUTY)
-        self._wait_for_switch_change()
-        self.home()
-    
+        self._wait_for_switch_change(initial_state)
+        self._home()
+
     def _move_servo(self, duty_cycle):
-        """Thread-safe way to update the duty cycle"""
-        with self.thread_lock:
+        """Set the PWM once, lgpio's software PWM keeps running it from there."""
+        if duty_cycle != self.current_duty:
+            lgpio.tx_pwm(self.handle, self.servo_pin, self.PWM_FREQ, duty_cycle)
             self.current_duty = duty_cycle
-    
-    def _wait_for_switch_change(self):
-        initial_state = self.get_switch_state()
-        start_time = time.time()
-        while time.time() - start_time <= self.MAX_WAIT_TIME:
-            if self.get_switch_state() != initial_state:
-                break
+
+    def _wait_for_switch_change(self, initial_state):
+        """Sleep until the switch flips or MAX_WAIT_TIME passes. True if it flipped."""
+        with self.switch_changed:
+            return self.switch_changed.wait_for(lambda: self.switch_state != initial_state, self.MAX_WAIT_TIME)
 
     def _stop_servo(self):
         """Stop sending PWM signals to reduce jitter"""
-        with self.thread_lock:
-            self.current_duty = 0
-            lgpio.tx_pwm(self.handle, self.servo_pin, 0, 0)
-    
+        lgpio.tx_pwm(self.handle, self.servo_pin, 0, 0)
+        self.current_duty = 0
+
     def toggle(self):
+        """Rock to the other side. Returns a Future, done once the rocker is home again."""
+        return self.worker.submit(self._toggle)
+
+    def _toggle(self):
         if self.get_switch_state():
-            self.to_white()
+            self._to_white()
         else:
-            self.to_black()
+            self._to_black()
 
     def cleanup(self):
-        """Clean up resources including the PWM thread"""
-        self.running = False
-        if self.pwm_thread and self.pwm_thread.is_alive():
-            self.pwm_thread.join(1.0)  # Wait up to 1 second for thread to finish
+        """Finish queued moves, then release the servo and switch"""
+        self.worker.shutdown(wait=True)
+        self.switch_callback.cancel()
         lgpio.tx_pwm(self.handle, self.servo_pin, 0, 0)
         lgpio.gpiochip_close(self.handle)
 
@@ -102,12 +123,8 @@ if __name__ == "__main__":
     try:
         while True:
             input("Press Enter to toggle...")
-            rocker.toggle()
+            rocker.toggle().result()
     except KeyboardInterrupt:
         pass
     finally:
         rocker.cleanup()
-
-
-
-
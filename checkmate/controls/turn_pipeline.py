@@ -0,0 +1,45 @@
+from concurrent.futures import ThreadPoolExecutor, wait
+
+
+class TurnPipeline:
+    """
+    Runs the parts of a turn that don't depend on each other at the same
+    time, like the gantry motion and the work for the next turn.
+    A turn then takes about as long as its slowest part instead of the sum.
+
+    Workers are started once and reused, so there's no thread per move.
+    """
+    def __init__(self, workers=3):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="turn")
+
+    def submit(self, name, fn, *args, **kwargs):
+        """Start one stage, returns its Future. Errors are printed, not raised."""
+        def stage():
+            try:
+                return fn(*args, **kwargs)
+            except Exception as e:
+                print(f"[Turn] {name} failed: {e}")
+                return None
+        return self.executor.submit(stage)
+
+    def run(self, stages, timeout=None):
+        """
+        Run {name: callable} together and wait for all of them.
+        Returns {name: result}, None for a stage that failed or didn't finish.
+        """
+        futures = {name: self.submit(name, fn) for name, fn in stages.items()}
+        return self.join(futures, timeout)
+
+    def join(self, futures, timeout=None):
+        done, _ = wait(futures.values(), timeout)
+        results = {}
+        for name, future in futures.items():
+            if future in done:
+                results[name] = future.result()
+            else:
+                print(f"[Turn] {name} still running after {timeout}s")
+                results[name] = None
+        return results
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
@@ -1,6 +1,7 @@
 
 from kivy.uix.widget import Widget
-from kivy.graphics import Color, Rectangle
+from kivy.graphics import Color, Rectangle, InstructionGroup
+from kivy.core.text import Label as CoreLabel
 from kivy.uix.button import Button
 from kivy.uix.image import Image
 from kivy.uix.behaviors import ButtonBehavior
@@ -12,6 +13,15 @@ from kivy.uix.togglebutton import ToggleButton
 import chess
 import math
 
+try:
+    from checkmate.screens.piece_textures import textures
+    from checkmate.controls.change_bus import POSITION, CLOCK, SELECTION
+    from checkmate.controls.move_list import MoveList
+except:
+    from piece_textures import textures
+    from change_bus import POSITION, CLOCK, SELECTION
+    from move_list import MoveList
+
 
 
 from kivy.lang import Builder
@@ -229,6 +239,8 @@ from kivy.uix.boxlayout import BoxLayout
 from kivy.uix.gridlayout import GridLayout
 from kivy.graphics import Color, Rectangle
 from kivy.uix.scrollview import ScrollView
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.clock import Clock
 
 # External game logic (assumed to be defined in control_system.py)
@@ -264,6 +276,8 @@ class ChessPiece(Image):
         self.chess_square = chess_square  # chess square index (0-63)
         self.piece_symbol = piece_symbol
         self.control_system = control_system
+        # Image path from piece_images the texture was taken from
+        self.image_key = None
         self.selected = False
         self.allow_stretch = True
         self.keep_ratio = True
@@ -276,11 +290,21 @@ class ChessPiece(Image):
 # • The central 8×8 cells form the chessboard.
 # • The left column displays row labels.
 # • The bottom row displays column labels.
-# • The board background is drawn via canvas.before.
-# • Chess pieces are added as children and positioned absolutely.
-# • Legal move highlights are drawn via canvas.after.
+# • Squares and labels are built once per resize into one instruction group.
+# • A fixed pool of 32 ChessPiece sprites is reused, only the squares that
+#   changed since the last update are touched.
+# • Legal move and last move highlights are pre-made rectangles that are
+#   switched on and off through their colour.
 # • Touch handling is built in (and can be disabled via a constructor argument).
 # ------------------------------------------------------------
+LIGHT_SQUARE = (247/255, 182/255, 114/255, 1)
+DARK_SQUARE = (189/255, 100/255, 6/255, 1)
+MOVE_HIGHLIGHT = (0, 1, 0, 0.5)
+CAPTURE_HIGHLIGHT = (1, 0, 0, 0.5)
+LAST_MOVE_HIGHLIGHT = (191/255, 128/255, 1, 0.5)
+HIDDEN = (0, 0, 0, 0)
+
+
 class ChessBoard(Widget):
 
     def __init__(self, bottom_colour_white=True, control_system=None, touch_enabled_white=True, touch_enabled_black=True, **kwargs):
@@ -290,220 +314,164 @@ class ChessBoard(Widget):
         self.touch_enabled_black=touch_enabled_black
 
         # External game logic
-        #self.control_system = control_system if control_system is not None else GameLogic()
-        # self.control_system = control_system
         self.control_system = control_system
         self.board = self.control_system.board
 
         self.font_size = self.control_system.font_size
 
-        self.control_system.register_observer(self.update_board)
-
-        # self.control_system.register_observer(self.update_board)
+        self.control_system.register_observer(self.update_board, (POSITION, SELECTION))
 
         # For tracking selected piece and legal moves.
-        self.selected_piece = self.control_system.selected_piece
+        # Square index of the piece picked by touch. Sprites are reused for
+        # other squares, so the square is kept rather than the sprite.
+        self.selected_square = None
         self.legal_moves = []
-        self.highlight_rects = []  # to store (Color, Rectangle) tuples
-
-        # New: Store last move highlight instructions.
-        self.last_move_rects = []
-
-        # We'll store references to label widgets for row and column labels.
-        self.row_labels = []
-        self.col_labels = []
 
-        # Bind changes so that our canvas (background, labels, pieces, highlights) updates.
+        # Geometry of the last layout, the static layer is only rebuilt when it changes.
+        self.cell_size = 0
+        self.board_origin = (0, 0)
+        self.layout_key = None
+
+        # Squares and coordinate labels, drawn once per resize.
+        self.static_layer = InstructionGroup()
+        self.label_textures = {}
+
+        # One (Color, Rectangle) per square for each highlight layer, hidden until needed.
+        self.last_move_layer = InstructionGroup()
+        self.highlight_layer = InstructionGroup()
+        self.last_move_rects = self._make_highlight_rects(self.last_move_layer)
+        self.highlight_rects = self._make_highlight_rects(self.highlight_layer)
+        self.lit_last_move = set()
+        self.lit_moves = {}
+
+        self.canvas.before.add(self.static_layer)
+        self.canvas.before.add(self.last_move_layer)
+        self.canvas.before.add(self.highlight_layer)
+
+        # Piece sprites: square -> ChessPiece on the board, plus the unused ones.
+        self.sprites = {}
+        self.free_sprites = []
+        for _ in range(32):
+            sprite = ChessPiece(chess_square=None, piece_symbol=None, control_system=self.control_system)
+            sprite.opacity = 0
+            self.add_widget(sprite)
+            self.free_sprites.append(sprite)
+
+        # Bind changes so that the static layer and sprite positions follow the layout.
         self.bind(pos=self._update_canvas, size=self._update_canvas)
 
         # Delay initial board update until layout is done.
         Clock.schedule_once(lambda dt: self.update_board(), 0.1)
 
-    def _update_canvas(self, *args):
-        # Clear the background canvas.
-        self.canvas.before.clear()
+    def _make_highlight_rects(self, layer):
+        rects = []
+        for sq in range(64):
+            col_inst = Color(*HIDDEN)
+            rect_inst = Rectangle(pos=(0, 0), size=(0, 0))
+            layer.add(col_inst)
+            layer.add(rect_inst)
+            rects.append((col_inst, rect_inst))
+        return rects
+
+    def square_pos(self, sq):
+        """Bottom left corner of a square, from this board's point of view."""
+        file = sq % 8
+        rank = sq // 8
+        if not self.bottom_colour_white:
+            file = 7 - file
+            rank = 7 - rank
+        return (self.board_origin[0] + file * self.cell_size, self.board_origin[1] + rank * self.cell_size)
+
+    def square_at(self, x, y):
+        """Square under a point, or None when it is off the board."""
+        file = int((x - self.board_origin[0]) // self.cell_size)
+        rank = int((y - self.board_origin[1]) // self.cell_size)
+        if not (0 <= file < 8 and 0 <= rank < 8):
+            return None
+        if not self.bottom_colour_white:
+            file = 7 - file
+            rank = 7 - rank
+        return file + rank * 8
+
+    def _label_texture(self, text):
+        # Label text never changes, so each one is only ever rendered once.
+        if text not in self.label_textures:
+            label = CoreLabel(text=text, font_size=self.font_size)
+            label.refresh()
+            self.label_textures[text] = label.texture
+        return self.label_textures[text]
 
+    def _update_canvas(self, *args):
         # Compute cell size using a 10x10 grid.
         cell_size = min(self.width, self.height) / 10.0
 
         # The central 8x8 chessboard is offset by one cell from the left and bottom.
         board_origin = (self.x + cell_size, self.y + cell_size)
-        board_size = cell_size * 8
-
-        # Draw the chessboard squares (the 8x8 area) in canvas.before.
-        with self.canvas.before:
-            for file in range(8):
-                for rank in range(8):
-                    # Use alternating colors.
-                    # if (file + rank) % 2 == 0:
-                    #     col = (189/255, 100/255, 6/255, 1) if self.bottom_colour_white else (247/255, 182/255, 114/255, 1)
-                    # else:
-                    #     col = (247/255, 182/255, 114/255, 1) if self.bottom_colour_white else (189/255, 100/255, 6/255, 1)
-                    # Color(*col)
-
-                    if (file + rank) % 2 == 0:
-                        col = (189/255, 100/255, 6/255, 1) if self.bottom_colour_white else (247/255, 182/255, 114/255, 1)
-                    else:
-                        col = (247/255, 182/255, 114/255, 1) if self.bottom_colour_white else (189/255, 100/255, 6/255, 1)
-                    Color(*col)
-
-                    # Adjust rank for perspective.
-                    if self.bottom_colour_white:
-                        pos_y = board_origin[1] + rank * cell_size
-                        #pos_x = board_origin[0] + file * cell_size
-                    else:
-                        pos_y = board_origin[1] + (7 - rank) * cell_size
-                    pos_x = board_origin[0] + file * cell_size
-                    Rectangle(pos=(pos_x, pos_y), size=(cell_size, cell_size))
+        if (cell_size, board_origin) == self.layout_key:
+            return
+        self.layout_key = (cell_size, board_origin)
+        self.cell_size = cell_size
+        self.board_origin = board_origin
 
-        # Clear and re-add the labels.
-        for label in self.row_labels + self.col_labels:
-            if label.parent:
-                self.remove_widget(label)
-        self.row_labels = []
-        self.col_labels = []
+        self.static_layer.clear()
+        for sq in range(64):
+            # a1 is a dark square whichever way round the board is.
+            self.static_layer.add(Color(*(DARK_SQUARE if (sq % 8 + sq // 8) % 2 == 0 else LIGHT_SQUARE)))
+            self.static_layer.add(Rectangle(pos=self.square_pos(sq), size=(cell_size, cell_size)))
 
-        # Add row labels in the left margin.
+        # Rank labels in the left margin, file labels along the bottom.
         for i in range(8):
-            if self.bottom_colour_white:
-                label_text = str(i + 1)
-            else:
-                label_text = str(8-i)
-            label = Label(text=label_text, halign="center", valign="middle", font_size = self.font_size)
-            # label.bind(size=lambda inst, val: setattr(inst, 'text_size', val))
-            # if self.bottom_colour_white:
-            pos_y = board_origin[1] + i * cell_size
-            # else:
-            #     pos_y = board_origin[1] + (7 - i) * cell_size
-            label.pos = (self.x, pos_y)
-            label.size = (cell_size, cell_size)
-            self.add_widget(label)
-            self.row_labels.append(label)
-
-        # Add column labels in the bottom margin.
-        for i in range(8):
-            if self.bottom_colour_white:
-
-                label_text = chr(ord('a') + i)
-            else:
-                label_text = chr(ord('h') - i)
-            label = Label(text=label_text, halign="center", valign="middle", font_size = self.font_size)
-            # label.bind(size=lambda inst, val: setattr(inst, 'text_size', val))
-            label.pos = (board_origin[0] + i * cell_size, self.y)
-            label.size = (cell_size, cell_size)
-            self.add_widget(label)
-            self.col_labels.append(label)
-
-        # # Redraw legal move highlights (if any).
-        # self._redraw_highlights(cell_size, board_origin)
-
-        # Update positions and sizes of chess piece widgets.
-        for child in self.children:
-            if isinstance(child, ChessPiece):
-                sq = child.chess_square
-                file = sq % 8
-                rank = sq // 8
-                if self.bottom_colour_white:
-                    pos_y = board_origin[1] + rank * cell_size
-                    pos_x = board_origin[0] + file * cell_size
-                else:
-                    pos_y = board_origin[1] + (7 - rank) * cell_size
-                    pos_x = board_origin[0] + (7 - file) * cell_size
-                    #pos_y = board_origin[1] + (7 - rank) * cell_size
-                #pos_x = board_origin[0] + file * cell_size
-                child.pos = (pos_x, pos_y)
-                child.size = (cell_size, cell_size)
-
-        # Redraw legal move highlights (if any).
-        self._redraw_highlights(cell_size, board_origin)
-
-    def _redraw_highlights(self, cell_size, board_origin):
-        # Clear existing highlight instructions.
-        self.clear_highlights()
-        self.clear_last_move_highlights()
-        # Draw new highlights for each legal move.
+            rank_text = str(i + 1) if self.bottom_colour_white else str(8 - i)
+            file_text = chr(ord('a') + i) if self.bottom_colour_white else chr(ord('h') - i)
+            for text, cell_x, cell_y in ((rank_text, self.x, board_origin[1] + i * cell_size),
+                                         (file_text, board_origin[0] + i * cell_size, self.y)):
+                texture = self._label_texture(text)
+                self.static_layer.add(Color(1, 1, 1, 1))
+                self.static_layer.add(Rectangle(texture=texture, size=texture.size,
+                                                pos=(cell_x + (cell_size - texture.width) / 2,
+                                                     cell_y + (cell_size - texture.height) / 2)))
+
+        # Highlights stay lit or unlit, they only need moving.
+        for sq in range(64):
+            for _, rect_inst in (self.highlight_rects[sq], self.last_move_rects[sq]):
+                rect_inst.pos = self.square_pos(sq)
+                rect_inst.size = (cell_size, cell_size)
+
+        for sq, sprite in self.sprites.items():
+            sprite.pos = self.square_pos(sq)
+            sprite.size = (cell_size, cell_size)
+
+    def _redraw_highlights(self, *args):
+        # Legal moves: red if capture, else green.
+        wanted = {}
         for move in self.legal_moves:
-            file = move.to_square % 8
-            rank = move.to_square // 8
-            if self.bottom_colour_white:
-                # pos_y = board_origin[1] + rank * cell_size
-                pos_y = board_origin[1] + rank * cell_size
-                pos_x = board_origin[0] + file * cell_size
-            else:
-                # pos_y = board_origin[1] + (7 - rank) * cell_size
-                pos_y = board_origin[1] + (7 - rank) * cell_size
-                pos_x = board_origin[0] + (7 - file) * cell_size
-            pos_x = board_origin[0] + file * cell_size
-            # Choose color: red if capture, else green.
-            if self.board.is_capture(move):
-                col = (1, 0, 0, 0.5)
-            else:
-                col = (0, 1, 0, 0.5)
-            # Create highlight instructions in canvas.after.
-            col_inst = Color(*col)
-            rect_inst = Rectangle(pos=(pos_x, pos_y), size=(cell_size, cell_size))
-            self.canvas.before.add(col_inst)
-            self.canvas.before.add(rect_inst)
-            self.highlight_rects.append((col_inst, rect_inst))
-
+            wanted[move.to_square] = CAPTURE_HIGHLIGHT if self.board.is_capture(move) else MOVE_HIGHLIGHT
+        for sq in set(self.lit_moves) - set(wanted):
+            self.highlight_rects[sq][0].rgba = HIDDEN
+        for sq, col in wanted.items():
+            if self.lit_moves.get(sq) != col:
+                self.highlight_rects[sq][0].rgba = col
+        self.lit_moves = wanted
+
+        last_move = set()
         if self.control_system.move_history:
             last_move_str = self.control_system.move_history[-1]  # e.g., "e2e4"
-            # Extract the two squares from the move string.
-            squares = [last_move_str[:2], last_move_str[2:4]]
-            for square in squares:
-                index = self.notation_to_index(square)
-                file = index % 8
-                rank = index // 8
-                if self.bottom_colour_white:
-                    pos_y = board_origin[1] + rank * cell_size
-                    pos_x = board_origin[0] + file * cell_size
-                else:
-                    pos_y = board_origin[1] + (7 - rank) * cell_size
-                    pos_x = board_origin[0] + (7 - file) * cell_size
-                    #pos_y = board_origin[1] + (7 - rank) * cell_size
-                #pos_x = board_origin[0] + file * cell_size
-                # Use blue for last move highlighting.
-                col = (191/255, 128/255, 1, 0.5) 
-                col_inst = Color(*col)
-                rect_inst = Rectangle(pos=(pos_x, pos_y), size=(cell_size, cell_size))
-                self.canvas.before.add(col_inst)
-                self.canvas.before.add(rect_inst)
-                self.last_move_rects.append((col_inst, rect_inst))
-
-    # def clear_highlights(self):
-    #     # Remove previously added highlight instructions.
-    #     for (col_inst, rect_inst) in self.highlight_rects:
-    #         if col_inst in self.canvas.after.children:
-    #             self.canvas.before.remove(col_inst)
-    #         if rect_inst in self.canvas.after.children:
-    #             self.canvas.before.remove(rect_inst)
-    #     self.highlight_rects = []
-
-    # def clear_last_move_highlights(self):
-    #     for (col_inst, rect_inst) in self.last_move_rects:
-    #         if col_inst in self.canvas.after.children:
-    #             self.canvas.before.remove(col_inst)
-    #         if rect_inst in self.canvas.after.children:
-    #             self.canvas.before.remove(rect_inst)
-    #     self.last_move_rects = []
+            last_move = {self.notation_to_index(last_move_str[:2]), self.notation_to_index(last_move_str[2:4])}
+        for sq in self.lit_last_move - last_move:
+            self.last_move_rects[sq][0].rgba = HIDDEN
+        for sq in last_move - self.lit_last_move:
+            self.last_move_rects[sq][0].rgba = LAST_MOVE_HIGHLIGHT
+        self.lit_last_move = last_move
 
     def clear_highlights(self):
-        # Remove previously added highlight instructions from canvas.before.
-        for (col_inst, rect_inst) in self.highlight_rects:
-            if col_inst in self.canvas.before.children:
-                self.canvas.before.remove(col_inst)
-            if rect_inst in self.canvas.before.children:
-                self.canvas.before.remove(rect_inst)
-        self.highlight_rects = []
+        for sq in self.lit_moves:
+            self.highlight_rects[sq][0].rgba = HIDDEN
+        self.lit_moves = {}
 
     def clear_last_move_highlights(self):
-        for (col_inst, rect_inst) in self.last_move_rects:
-            if col_inst in self.canvas.before.children:
-                self.canvas.before.remove(col_inst)
-            if rect_inst in self.canvas.before.children:
-                self.canvas.before.remove(rect_inst)
-        self.last_move_rects = []
-
+        for sq in self.lit_last_move:
+            self.last_move_rects[sq][0].rgba = HIDDEN
+        self.lit_last_move = set()
 
     def notation_to_index(self, square_str):
         """
@@ -513,105 +481,97 @@ class ChessBoard(Widget):
         file = ord(square_str[0]) - ord('a')
         rank = int(square_str[1]) - 1
         return file + rank * 8
-    
+
     def highlight_legal_moves_from_notation(self, square_str):
         """
         Highlights legal moves for a given selected square specified in algebraic notation (e.g., 'a2').
-
-        This function:
-        1. Converts the provided notation (like 'a2') to a board index.
-        2. Retrieves the legal moves for that square from the control system.
-        3. Updates the widget's internal list of legal moves.
-        4. Calls the canvas update method to redraw the highlights.
         """
-
-        print(f"trying to hightlight {square_str}")
         if square_str is not None:
             self.legal_moves = self.control_system.select_piece(self.notation_to_index(square_str))
-
-            # Convert algebraic notation (e.g., 'a2') to a board index.
-            # square_index = self.notation_to_index(square_str)
-            
-            # Retrieve legal moves from the control system using this index.
-            # self.legal_moves = self.control_system.select_piece(square_str)
-            
-            # Optionally set the selected piece in the control system.
-            # self.control_system.selected_piece = square_str
-
-            # Refresh the canvas to update the highlights.
-            self._update_canvas()
         else:
             self.legal_moves = []
-            self._update_canvas()
-
-        
-
+        self._redraw_highlights()
 
     def update_board(self, *args):
-        self.highlight_legal_moves_from_notation(self.control_system.selected_piece)
-
-        # Remove old chess pieces.
-        pieces_to_remove = [child for child in self.children if isinstance(child, ChessPiece)]
-        for piece in pieces_to_remove:
-            self.remove_widget(piece)
-        # Add new chess pieces based on external game logic.
-        for sq in self.control_system.SQUARES:
-            piece = self.board.piece_at(sq)
-            if piece is not None:
-                symbol = piece.symbol()
-                if symbol in self.control_system.piece_images:
-                    source = self.control_system.piece_images[symbol]
-                    piece_widget = ChessPiece(chess_square=sq,
-                                              piece_symbol=symbol,
-                                              control_system=self.control_system,
-                                              source=source)
-                    piece_widget.size_hint = (None, None)
-                    self.add_widget(piece_widget)
-        # Force a canvas update.
         self._update_canvas()
+        self.update_pieces()
+        self.highlight_legal_moves_from_notation(self.control_system.selected_piece)
 
-        #self.highlight_last_move()
+    def update_pieces(self):
+        """
+        Bring the sprites in line with the board. Only squares whose piece (or
+        its image, the kings change when in check) differs from what is shown
+        are touched, a normal move re-uses the sprite that just left its square.
+        """
+        wanted = {}
+        for sq, piece in self.board.piece_map().items():
+            symbol = piece.symbol()
+            if symbol in self.control_system.piece_images:
+                wanted[sq] = (symbol, self.control_system.piece_images[symbol])
+
+        shown = {sq: (sprite.piece_symbol, sprite.image_key) for sq, sprite in self.sprites.items()}
+        if shown == wanted:
+            return
 
+        # Take back the sprites that are no longer right, keyed by image so a
+        # moved piece lands on a sprite that already has its texture.
+        spare = {}
+        for sq, look in shown.items():
+            if wanted.get(sq) != look:
+                spare.setdefault(look[1], []).append(self.sprites.pop(sq))
+
+        for sq, (symbol, source) in wanted.items():
+            if sq in self.sprites:
+                continue
+            if spare.get(source):
+                sprite = spare[source].pop()
+            else:
+                sprite = next((s for sprites in spare.values() for s in sprites), None)
+                if sprite is not None:
+                    spare[sprite.image_key].remove(sprite)
+                else:
+                    sprite = self.free_sprites.pop()
+                # Shared texture, nothing is decoded or uploaded here
+                sprite.image_key = source
+                sprite.texture = textures.for_source(source)
+            sprite.chess_square = sq
+            sprite.piece_symbol = symbol
+            sprite.pos = self.square_pos(sq)
+            sprite.size = (self.cell_size, self.cell_size)
+            sprite.opacity = 1
+            self.sprites[sq] = sprite
+
+        for sprites in spare.values():
+            for sprite in sprites:
+                sprite.chess_square = None
+                sprite.piece_symbol = None
+                sprite.opacity = 0
+                self.free_sprites.append(sprite)
 
     def on_touch_down(self, touch):
         # Check overall touch enablement (optional; if you want a global override you could keep this)
         if not (self.touch_enabled_white or self.touch_enabled_black):
             return super(ChessBoard, self).on_touch_down(touch)
-        # Compute cell size and board origin.
-        cell_size = min(self.width, self.height) / 10.0
-        board_origin = (self.x + cell_size, self.y + cell_size)
-        board_area = (board_origin[0], board_origin[1], cell_size * 8, cell_size * 8)
-        # If touch is outside board, ignore.
-        if not (board_area[0] <= touch.x <= board_area[0] + board_area[2] and
-                board_area[1] <= touch.y <= board_area[1] + board_area[3]):
+        # Map touch to chess square, ignore it if it is outside the board.
+        sq = self.square_at(touch.x, touch.y) if self.cell_size else None
+        if sq is None:
             return super(ChessBoard, self).on_touch_down(touch)
-        # Map touch to chess square.
-        file = int((touch.x - board_origin[0]) / cell_size)
-        rank = int((touch.y - board_origin[1]) / cell_size)
-        if not self.bottom_colour_white:
-            rank = 7 - rank
-        sq = file + rank * 8
 
         # If a piece is already selected and this square is a legal move destination, execute the move.
-        if self.selected_piece and self.legal_moves:
+        if self.selected_square is not None and self.legal_moves:
             for move in self.legal_moves:
                 if move.to_square == sq:
                     move = move.uci()
                     print("Move: ", move)
                     self.handle_touch_move(move)
-                    #self.control_system.push_move(chess.Move.from_uci(move))
-                    self.selected_piece = None
+                    self.selected_square = None
                     self.legal_moves = []
                     self.clear_highlights()
                     self.update_board()
                     return True
-        
+
         # Otherwise, select a piece if one exists at this square.
-        piece_widget = None
-        for child in self.children:
-            if isinstance(child, ChessPiece) and (child.chess_square == sq):
-                piece_widget = child
-                break
+        piece_widget = self.sprites.get(sq)
         if piece_widget:
             # Check if selection is allowed based on piece colour.
             # Uppercase -> white; lowercase -> black.
@@ -620,28 +580,23 @@ class ChessBoard(Widget):
             if piece_widget.piece_symbol.islower() and not self.touch_enabled_black:
                 return True
 
-            if self.selected_piece == piece_widget:
-                self.selected_piece = None
+            if self.selected_square == sq:
+                self.selected_square = None
                 self.legal_moves = []
                 self.clear_highlights()
             else:
-                self.selected_piece = piece_widget
-                # You might call control_system.select_piece to update legal moves.
+                self.selected_square = sq
                 self.legal_moves = self.control_system.select_piece(piece_widget.chess_square)
-                self.clear_highlights()
-
-                # if self.control_system.legal_moves is not None:
                 self.highlight_legal_moves(self.legal_moves)
-                    
+
             return True
 
         return super(ChessBoard, self).on_touch_down(touch)
 
     def highlight_legal_moves(self, legal_moves):
-
-        # Set our legal moves and trigger a canvas update to draw highlights.
+        # Set our legal moves and switch the matching highlights on.
         self.legal_moves = legal_moves
-        self._update_canvas()
+        self._redraw_highlights()
 
     def handle_touch_move(self, move_uci):
         self.control_system.handle_ui_move(move_uci)  # triggers state transition
@@ -670,45 +625,53 @@ class ChessBoard(Widget):
 #             self.layout.add_widget(move_label)
 #         self.scroll_y = 0
 
-class MovesHistory(ScrollView):
+class MovesHistory(RecycleView):
     """
-    A scrollable view that displays past moves with spacing between elements.
+    A scrollable view that displays past moves, one row per move pair (1. e4 e5).
+
+    Rows live in the RecycleView data and are only ever appended or trimmed
+    from the first ply that changed, the SAN for each ply is worked out once
+    by MoveList. Only the rows on screen have Label widgets.
     """
     def __init__(self, control_system, **kwargs):
         super().__init__(**kwargs)
         self.control_system = control_system
         self.font_size = control_system.font_size
-        
+        self.move_list = MoveList()
+
         # Ensure vertical scrolling is enabled and allow dragging on content.
+        self.do_scroll_x = False
         self.do_scroll_y = True
         self.scroll_type = ['bars', 'content']  # Allows dragging on the content
-        
-        # Register the observer for updating moves.
-        self.control_system.register_observer(self.update_moves)
-        
-        # Create a BoxLayout with added spacing between elements and optional padding.
-        self.layout = BoxLayout(orientation='vertical', spacing=10, padding=[0, 10, 0, 10])
+
+        self.viewclass = 'Label'
+        self.layout = RecycleBoxLayout(orientation='vertical', spacing=10, padding=[0, 10, 0, 10],
+                                       default_size=(None, 30), default_size_hint=(1, None), size_hint_y=None)
         self.layout.bind(minimum_height=self.layout.setter('height'))
         self.add_widget(self.layout)
 
+        # Register the observer for updating moves.
+        self.control_system.register_observer(self.update_moves, (POSITION,))
+
     def update_moves(self, *args):
-        self.layout.clear_widgets()
-        # Assume control_system.move_history is a list of UCI move strings.
-        for move in self.control_system.move_history:
-            move_label = Label(text=move, font_size=self.font_size,
-                               size_hint_y=None, height=30)
-            self.layout.add_widget(move_label)
-        # Scroll to the top.
-        self.scroll_y = 1
+        first = self.move_list.sync(self.control_system.board)
+        if first is None:
+            return
+        row = self.move_list.row_of(first)
+        del self.data[row:]
+        self.data.extend({'text': text, 'font_size': self.font_size} for text in self.move_list.rows(row))
+        # Newest move at the bottom, keep it in view.
+        self.scroll_y = 0
 
 class CapturedPieces(Widget):
     def __init__(self, control_system=None, rows=2, **kwargs):
         super(CapturedPieces, self).__init__(**kwargs)
         self.rows = rows  # Number of rows in each side's grid
         self.control_system = control_system
-        self.control_system.register_observer(self.update_captured)
+        self.control_system.register_observer(self.update_captured, (POSITION,))
         # This will hold the list of captured piece symbols.
         self.captured_list = []
+        self.captured_layout = None
         # Redraw the background whenever position or size changes.
         self.bind(pos=self.draw_board, size=self.draw_board)
 
@@ -737,13 +700,19 @@ class CapturedPieces(Widget):
           - For black: first piece at the bottom-right corner, next above it,
             then moving to the next column to the left.
         """
-        self.captured_list = self.control_system.captured_pieces
+        tracker = self.control_system.material_tracker
+        # Nothing taken or given back and the same size, the images are still right
+        layout = (tuple(tracker.captured), tuple(self.pos), tuple(self.size))
+        if layout == self.captured_layout:
+            return
+        self.captured_layout = layout
+        self.captured_list = list(tracker.captured)
         # Remove any previously added images.
         self.clear_widgets()
 
-        # Separate the captured pieces by color:
-        white_captures = [p for p in self.captured_list if p.isupper()]
-        black_captures = [p for p in self.captured_list if p.islower()]
+        # Already split by color by the tracker:
+        white_captures = tracker.white_captures
+        black_captures = tracker.black_captures
 
         # --- White Captures (Left Half) ---
         white_area_x = self.x
@@ -762,8 +731,8 @@ class CapturedPieces(Widget):
             # Place first capture in the far left (bottom-left corner).
             piece_x = white_area_x + col * white_cell_width
             piece_y = white_area_y + row * white_cell_height
-            source = self.control_system.piece_images.get(piece, '')
-            img = Image(source=source, allow_stretch=True, keep_ratio=True)
+            img = Image(allow_stretch=True, keep_ratio=True)
+            img.texture = textures.for_source(self.control_system.piece_images.get(piece, ''))
             img.size = (white_cell_width, white_cell_height)
             img.pos = (piece_x, piece_y)
             self.add_widget(img)
@@ -783,8 +752,8 @@ class CapturedPieces(Widget):
             # For black captures, start at the far right: subtract columns from the right edge.
             piece_x = black_area_x + black_area_width - (col + 1) * black_cell_width
             piece_y = black_area_y + row * black_cell_height
-            source = self.control_system.piece_images.get(piece, '')
-            img = Image(source=source, allow_stretch=True, keep_ratio=True)
+            img = Image(allow_stretch=True, keep_ratio=True)
+            img.texture = textures.for_source(self.control_system.piece_images.get(piece, ''))
             img.size = (black_cell_width, black_cell_height)
             img.pos = (piece_x, piece_y)
             self.add_widget(img)
@@ -898,7 +867,7 @@ class MaterialBar(BoxLayout):
         self.white_score = ""
         self.control_system = control_system
         self.font_size = self.control_system.font_size
-        self.control_system.register_observer(self.update_percentages)
+        self.control_system.register_observer(self.update_percentages, (POSITION,))
 
         self.bind(pos=self.update_canvas, size=self.update_canvas)
 
@@ -939,7 +908,9 @@ class MaterialBar(BoxLayout):
         self.white_label.pos = (self.right - self.white_label.width, self.top + 5)
 
     def update_percentages(self, *args):
-        self.white_value, self.black_value = self.calculate_material(self.control_system.board)
+        # Kept up to date move by move, no board scan
+        tracker = self.control_system.material_tracker
+        self.white_value, self.black_value = tracker.white, tracker.black
 
         if self.white_value < self.black_value:
             self.white_score = ""
@@ -953,40 +924,11 @@ class MaterialBar(BoxLayout):
             self.white_score = ""
             self.black_score = ""
 
-        print(self.white_value, self.black_value)
-
         total = self.black_value + self.white_value
-        self.black_percentage = self.black_value / total * 100
-        self.white_percentage = self.white_value / total * 100
+        self.black_percentage = self.black_value / total * 100 if total else 50
+        self.white_percentage = self.white_value / total * 100 if total else 50
         self.update_canvas()
 
-    def calculate_material(self, board):
-        # Standard piece values: pawn=1, knight=3, bishop=3, rook=5, queen=9, king=0
-        values = {
-            chess.PAWN: 1,
-            chess.KNIGHT: 3,
-            chess.BISHOP: 3,
-            chess.ROOK: 5,
-            chess.QUEEN: 9,
-            chess.KING: 0
-        }
-        white_score = 0
-        black_score = 0
-
-        if board is None:
-            board = self.board
-
-        for square, piece in board.piece_map().items():
-            if piece.color == chess.WHITE:
-                white_score += values[piece.piece_type]
-            else:
-                black_score += values[piece.piece_type]
-
-        print(f"White: {white_score}, Black: {black_score}")
-        
-        # A positive result indicates a material advantage for White,
-        # while a negative result indicates an advantage for Black.
-        return white_score, black_score
 
 
 from kivy.uix.widget import Widget
@@ -1011,7 +953,8 @@ class PlayerClock(Widget):
         self.clock_logic = self.control_system.clock_logic
         self.timer_enabled = self.control_system.timer_enabled
 
-        self.control_system.register_observer(self.update_clock)
+        # Observers get the board, not a time step, so just redraw
+        self.control_system.register_observer(lambda *args: self.update_clock(0), (CLOCK, POSITION))
 
         # Create a label for time display.
         self.label = Label(text=self.get_initial_text(), font_size="40sp",
@@ -1021,7 +964,8 @@ class PlayerClock(Widget):
         # Create an Image widget for the arrow.
         # Use "left_arrow.png" for white clock, "right_arrow.png" for black clock.
         arrow_source = "assets/left_arrow.png" if self.side == "black" else "assets/right_arrow.png"
-        self.arrow = Image(source=arrow_source, allow_stretch=True, keep_ratio=True, size_hint=(1,1))
+        self.arrow = Image(allow_stretch=True, keep_ratio=True, size_hint=(1,1))
+        self.arrow.texture = textures.for_source(arrow_source)
         # Start with the arrow hidden.
         self.arrow.opacity = 0
         self.add_widget(self.arrow)
@@ -9,6 +9,7 @@ import serial
 import time
 import threading
 import sys
+import chess
 
 from kivy.uix.screenmanager import Screen
 
@@ -104,7 +105,8 @@ class GantryTargetWidget(Widget):
     
     def update_canvas(self, *args):
         self.canvas.clear()
-        self.board_occupancy = self.hall.sense_layer.get_squares_gantry()
+        # Latest frame from the hall sampler thread, no scan on the UI thread
+        self.board_occupancy = self.hall.latest_occupancy()
         # transposed_board = list(map(list, zip(*self.board_occupancy)))
         # rotated_board = [list(row) for row in list(zip(*transposed_board))[::-1]]
 
@@ -152,7 +154,7 @@ class GantryTargetWidget(Widget):
                     # - Files (columns) are labeled from 'a' to 'h' (left to right).
                     # - Ranks (rows) are labeled from 8 to 1 (top to bottom).
                     
-                    square_occupancy = self.board_occupancy[7-col][row-2]
+                    square_occupancy = self.board_occupancy[chess.square(row - 2, 7 - col)]
 
                     # print(f"Square {square_label} is {square_occupancy}")
 
@@ -504,7 +506,12 @@ class GantryControlScreen(Screen):
     
     def update_label(self, dt):
         mm_coord = self.target_board.get_current_mm()
-        self.coord_label.text = f"Target: {mm_coord[0]} mm, {mm_coord[1]} mm"
+        text = f"Target: {mm_coord[0]} mm, {mm_coord[1]} mm"
+        # Cached by the gantry's status poller, no serial traffic here
+        status = None if self.gantry.simulate else self.gantry.reader.status
+        if status is not None and status.wpos is not None:
+            text += f"  Gantry: {status.wpos[0]:.0f} mm, {status.wpos[1]:.0f} mm ({status.state})"
+        self.coord_label.text = text
 
     def on_move_entered(self, move):
         # When a move is entered via the text input, force trail mode so the moves leave a trail.
@@ -630,7 +637,8 @@ class GoButton(Button):
         dot_location = self.target_board.get_current_mm()
         print(f"Sending command: {dot_location}")
         if not self.gantry.simulate:
-            self.gantry.send_coordinates_command(dot_location)
+            # Don't block the UI while the gantry moves
+            self.gantry.send_coordinates_command(dot_location, wait=False)
     
     
 
@@ -661,7 +669,7 @@ class SendCommandButton(Button):
         print(f"Sending commands: {commands}")
 
         if not self.gantry.simulate:
-            self.gantry.send_commands(commands)
+            self.gantry.send_commands(commands, wait=False)
 
         self.target_widget.clear_trail()
         self.target_widget.trail_enabled = False
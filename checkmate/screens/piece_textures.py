@@ -0,0 +1,103 @@
+import glob
+import os
+
+from kivy.atlas import Atlas
+from kivy.core.image import Image as CoreImage
+
+ASSETS_DIR = "assets"
+ATLAS_NAME = "pieces"
+ATLAS_SIZE = 512
+# Loaded up front besides the pieces, the rest of assets/ is left to the screens
+EXTRA_ASSETS = ("left_arrow", "right_arrow")
+
+# Asset name for each piece symbol, states add a suffix (white_king_check)
+PIECE_NAMES = {
+    'P': 'white_pawn', 'R': 'white_rook', 'N': 'white_knight',
+    'B': 'white_bishop', 'Q': 'white_queen', 'K': 'white_king',
+    'p': 'black_pawn', 'r': 'black_rook', 'n': 'black_knight',
+    'b': 'black_bishop', 'q': 'black_queen', 'k': 'black_king',
+}
+
+
+def asset_name(source):
+    """'assets/white_king_check.png' -> 'white_king_check'"""
+    return os.path.splitext(os.path.basename(source))[0]
+
+
+def piece_asset(symbol, state=""):
+    """Asset name for a piece, state is '', 'check' or 'mate'."""
+    name = PIECE_NAMES[symbol]
+    return f"{name}_{state}" if state else name
+
+
+class TextureRegistry:
+    """
+    The piece, king state and clock arrow images, decoded and sent to the
+    GPU once at startup.
+
+    The piece images are packed into one atlas texture (assets/pieces.atlas,
+    rebuilt when a png is newer than it, git ignores it), the arrows get their
+    own textures. Widgets ask for textures by piece symbol/state or by the old
+    source path and all share the same ones, so nothing is decoded mid game.
+    """
+    def __init__(self, assets_dir=ASSETS_DIR):
+        self.assets_dir = assets_dir
+        self.textures = {}
+        self.atlas = None
+
+    def load(self):
+        if self.textures:
+            return self
+        paths = sorted(glob.glob(os.path.join(self.assets_dir, "*.png")))
+        pieces = [path for path in paths if asset_name(path).startswith(("white_", "black_"))]
+        paths = pieces + [path for path in paths if asset_name(path) in EXTRA_ASSETS]
+
+        self.atlas = self.build_atlas(pieces)
+        if self.atlas is not None:
+            self.textures.update(self.atlas.textures)
+
+        for path in paths:
+            name = asset_name(path)
+            if name not in self.textures:
+                self.textures[name] = CoreImage(path).texture
+        print(f"[Textures] {len(self.textures)} textures loaded, atlas: {self.atlas is not None}")
+        return self
+
+    def build_atlas(self, paths):
+        if not paths:
+            return None
+        atlas_path = os.path.join(self.assets_dir, ATLAS_NAME + ".atlas")
+        if not os.path.exists(atlas_path) or \
+                any(os.path.getmtime(path) > os.path.getmtime(atlas_path) for path in paths):
+            try:
+                # Needs Pillow, without it every piece just gets its own texture
+                Atlas.create(os.path.join(self.assets_dir, ATLAS_NAME), paths, ATLAS_SIZE)
+            except Exception as e:
+                print(f"[Textures] Could not build the atlas: {e}")
+                return None
+        try:
+            return Atlas(atlas_path)
+        except Exception as e:
+            print(f"[Textures] Could not load the atlas: {e}")
+            return None
+
+    def get(self, name):
+        if not self.textures:
+            self.load()
+        return self.textures.get(name)
+
+    def piece(self, symbol, state=""):
+        return self.get(piece_asset(symbol, state))
+
+    def for_source(self, source):
+        """Texture for an image path, for the code that still deals in paths."""
+        if not source:
+            return None
+        texture = self.get(asset_name(source))
+        if texture is None and os.path.exists(source):
+            texture = self.textures[asset_name(source)] = CoreImage(source).texture
+        return texture
+
+
+# Shared by every screen
+textures = TextureRegistry()
@@ -0,0 +1,62 @@
+from checkmate.controls.change_bus import ChangeBus, CLOCK, MESSAGES, POSITION, SELECTION
+
+
+class FakeClock:
+    """Holds scheduled callbacks until the test runs the next frame."""
+    def __init__(self):
+        self.queue = []
+
+    def schedule(self, callback):
+        self.queue.append(callback)
+
+    def frame(self):
+        queue, self.queue = self.queue, []
+        for callback in queue:
+            callback(0)
+
+
+def test_one_flush_per_frame():
+    clock = FakeClock()
+    flushed = []
+    bus = ChangeBus(clock.schedule, payload=lambda: "board", on_flush=flushed.append)
+    calls = []
+    bus.subscribe(calls.append)
+    bus.notify(POSITION)
+    bus.notify(CLOCK)
+    bus.notify()
+    assert len(clock.queue) == 1
+    clock.frame()
+    assert calls == ["board"]
+    assert flushed == [{POSITION, CLOCK, MESSAGES, SELECTION}]
+
+
+def test_only_interested_subscribers_run():
+    clock = FakeClock()
+    bus = ChangeBus(clock.schedule)
+    board, clocks = [], []
+    bus.subscribe(lambda payload: board.append(1), (POSITION, SELECTION))
+    bus.subscribe(lambda payload: clocks.append(1), (CLOCK,))
+    bus.notify(CLOCK)
+    clock.frame()
+    assert (board, clocks) == ([], [1])
+    bus.notify(SELECTION, MESSAGES)
+    clock.frame()
+    assert (board, clocks) == ([1], [1])
+
+
+def test_notify_during_flush_goes_to_the_next_frame():
+    clock = FakeClock()
+    bus = ChangeBus(clock.schedule)
+    calls = []
+
+    def observer(payload):
+        calls.append(1)
+        if len(calls) == 1:
+            bus.notify(POSITION)
+
+    bus.subscribe(observer)
+    bus.notify(POSITION)
+    clock.frame()
+    assert calls == [1]
+    clock.frame()
+    assert calls == [1, 1]
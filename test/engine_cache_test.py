@@ -0,0 +1,68 @@
+import os
+import tempfile
+
+import chess
+
+from checkmate.controls.engine_cache import EngineCache
+
+
+def test_round_trip_and_persistence():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "cache.sqlite")
+        board = chess.Board()
+        cache = EngineCache(path)
+        assert cache.get(board, 1400, 0.1) is None
+        cache.put(board, 1400, 0.1, chess.Move.from_uci("e2e4"), 30)
+        assert cache.get(board, 1400, 0.1) == (chess.Move.from_uci("e2e4"), 30)
+        # Different strength or time limit searches again
+        assert cache.get(board, 2000, 0.1) is None
+        assert cache.get(board, 1400, 0.5) is None
+        cache.close()
+
+        cache = EngineCache(path)
+        assert cache.get(board, 1400, 0.1) == (chess.Move.from_uci("e2e4"), 30)
+        cache.close()
+
+
+def test_transpositions_share_an_entry():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EngineCache(os.path.join(tmp, "cache.sqlite"))
+        a = chess.Board()
+        for uci in ["g1f3", "g8f6", "b1c3"]:
+            a.push_uci(uci)
+        b = chess.Board()
+        for uci in ["b1c3", "g8f6", "g1f3"]:
+            b.push_uci(uci)
+        cache.put(a, 1400, 0.1, chess.Move.from_uci("e7e5"))
+        assert cache.get(b, 1400, 0.1)[0] == chess.Move.from_uci("e7e5")
+        cache.close()
+
+
+def test_least_recently_used_are_evicted():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EngineCache(os.path.join(tmp, "cache.sqlite"), max_entries=2)
+        boards = []
+        for uci in ["e2e4", "d2d4", "c2c4"]:
+            board = chess.Board()
+            board.push_uci(uci)
+            boards.append(board)
+
+        cache.put(boards[0], 1400, 0.1, chess.Move.from_uci("e7e5"))
+        cache.put(boards[1], 1400, 0.1, chess.Move.from_uci("d7d5"))
+        cache.get(boards[0], 1400, 0.1)
+        cache.put(boards[2], 1400, 0.1, chess.Move.from_uci("e7e5"))
+        cache.trim()
+
+        assert len(cache) == 2
+        assert cache.get(boards[1], 1400, 0.1) is None
+        assert cache.get(boards[0], 1400, 0.1) is not None
+        cache.close()
+
+
+def test_unusable_path_disables_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        blocker = os.path.join(tmp, "file")
+        open(blocker, "w").close()
+        cache = EngineCache(os.path.join(blocker, "cache.sqlite"))
+        cache.put(chess.Board(), 1400, 0.1, chess.Move.from_uci("e2e4"))
+        assert cache.get(chess.Board(), 1400, 0.1) is None
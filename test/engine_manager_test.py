@@ -0,0 +1,132 @@
+import os
+import sys
+import time
+import tempfile
+
+import chess
+
+from checkmate.controls.engine_manager import EngineManager
+from checkmate.controls.engine_cache import EngineCache
+
+
+# A tiny UCI engine: always plays the first legal move (by uci) and predicts
+# the first reply, searching until stopped or for movetime.
+FAKE_ENGINE = r'''
+import sys, threading, chess
+board = chess.Board()
+stop = threading.Event()
+search = None
+def out(s):
+    sys.stdout.write(s + "\n"); sys.stdout.flush()
+def first(b):
+    return sorted(b.legal_moves, key=lambda m: m.uci())[0]
+def go(infinite, movetime):
+    best = first(board)
+    after = board.copy(); after.push(best)
+    ponder = first(after) if not after.is_game_over() else None
+    line = best.uci() + (" " + ponder.uci() if ponder else "")
+    out("info depth 1 score cp 0 pv " + line)
+    stop.wait(None if infinite else movetime)
+    out("bestmove " + best.uci() + (" ponder " + ponder.uci() if ponder else ""))
+for line in sys.stdin:
+    parts = line.split()
+    if not parts:
+        continue
+    if parts[0] == "uci":
+        out("option name UCI_Elo type spin default 1500 min 1000 max 3000")
+        out("option name UCI_LimitStrength type check default false")
+        out("uciok")
+    elif parts[0] == "isready":
+        out("readyok")
+    elif parts[0] == "position":
+        board = chess.Board()
+        if "moves" in parts:
+            for move in parts[parts.index("moves") + 1:]:
+                board.push_uci(move)
+    elif parts[0] == "go":
+        stop.clear()
+        movetime = float(parts[parts.index("movetime") + 1]) / 1000 if "movetime" in parts else 0.05
+        search = threading.Thread(target=go, args=("infinite" in parts, movetime))
+        search.start()
+    elif parts[0] == "stop":
+        stop.set()
+        if search:
+            search.join()
+    elif parts[0] == "quit":
+        break
+'''
+
+
+def start_engine(tmp, cache=None):
+    path = os.path.join(tmp, "fake_engine.py")
+    with open(path, "w") as f:
+        f.write(FAKE_ENGINE)
+    manager = EngineManager([sys.executable, path], cache=cache)
+    assert manager.configure(elo=1400, time_limit=0.05)
+    return manager
+
+
+def test_search_and_ponder_hit():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = start_engine(tmp)
+        try:
+            board = chess.Board()
+            results = []
+            move = manager.search(board, on_result=results.append).result(5)
+            assert move == chess.Move.from_uci("a2a3")
+            assert results == [move]
+
+            # The player makes the predicted reply, the pondered search is used
+            board.push(move)
+            board.push_uci("a7a5")
+            assert manager.ponder_key == chess.polyglot.zobrist_hash(board)
+            time.sleep(0.1)
+            start = time.time()
+            assert manager.play(board) == chess.Move.from_uci("a1a2")
+            assert time.time() - start < 0.05
+        finally:
+            manager.quit()
+
+
+def test_stop_and_cancel():
+    with tempfile.TemporaryDirectory() as tmp:
+        manager = start_engine(tmp)
+        try:
+            future = manager.search(chess.Board(), time_limit=10)
+            time.sleep(0.1)
+            manager.stop()
+            assert future.result(2) == chess.Move.from_uci("a2a3")
+
+            results = []
+            future = manager.search(chess.Board(), on_result=results.append, time_limit=10)
+            time.sleep(0.1)
+            manager.cancel(future)
+            time.sleep(0.1)
+            assert future.cancelled() and results == []
+
+            # The engine is still usable afterwards
+            assert manager.play(chess.Board()) == chess.Move.from_uci("a2a3")
+        finally:
+            manager.quit()
+
+
+def test_cached_move_skips_the_search():
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = EngineCache(os.path.join(tmp, "cache.sqlite"))
+        manager = start_engine(tmp, cache)
+        try:
+            board = chess.Board()
+            board.push_uci("e2e4")
+            assert manager.play(board, time_limit=0.5) == chess.Move.from_uci("a7a5")
+            start = time.time()
+            assert manager.play(board, time_limit=0.5) == chess.Move.from_uci("a7a5")
+            assert time.time() - start < 0.1
+            assert cache.hits == 1
+        finally:
+            manager.quit()
+
+
+def test_no_engine():
+    manager = EngineManager(None)
+    assert not manager.wait_ready(1)
+    assert manager.search(chess.Board()) is None
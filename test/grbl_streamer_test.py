@@ -0,0 +1,281 @@
+import collections
+import queue
+import threading
+import time
+
+import pytest
+
+from checkmate.controls.gantry_control import GantryControl, GrblError, GrblEvent, GrblReader, GrblStatus, GrblStreamer
+
+
+IDLE = "<Idle|MPos:0.000,0.000,0.000|FS:0,0>"
+
+
+class FakeSerial:
+    """GRBL stand-in, replies are fed in by the test, '?' is answered with status (if any)."""
+    def __init__(self, status=IDLE):
+        self.written = []
+        self.lines = queue.Queue()
+        self.status = status
+
+    def write(self, data):
+        self.written.append(data.decode())
+        if data == b"?" and self.status:
+            self.lines.put(self.status)
+
+    def readline(self):
+        try:
+            return (self.lines.get(timeout=0.05) + "\n").encode()
+        except queue.Empty:
+            return b""
+
+    def reply(self, line):
+        self.lines.put(line)
+
+
+class ConsumingSerial(FakeSerial):
+    """Holds written lines in an RX buffer and answers "ok" as it works through them."""
+    def __init__(self):
+        super().__init__()
+        self.rx = collections.deque()
+        self.buffered = 0
+        self.max_buffered = 0
+        self.running = True
+        threading.Thread(target=self.consume, daemon=True).start()
+
+    def write(self, data):
+        super().write(data)
+        if data != b"?":
+            self.rx.append(len(data))
+            self.buffered += len(data)
+            self.max_buffered = max(self.max_buffered, self.buffered)
+
+    def consume(self):
+        while self.running:
+            if self.rx:
+                self.buffered -= self.rx.popleft()
+                self.reply("ok")
+            time.sleep(0.001)
+
+
+def wait_for(condition, timeout=2):
+    end = time.time() + timeout
+    while not condition():
+        assert time.time() < end
+        time.sleep(0.01)
+
+
+def test_new_job_after_an_alarm_ignores_stale_replies():
+    ser = FakeSerial()
+    lock = threading.Lock()
+    reader = GrblReader(ser, lock, poll_rate=0)
+    streamer = GrblStreamer(ser, lock, reader)
+    try:
+        first = streamer.submit(["G1X10"])
+        wait_for(lambda: "G1X10\n" in ser.written)
+        # The alarm, then the "ok" GRBL still sends for the line it had buffered
+        ser.reply("ALARM:1")
+        ser.reply("ok")
+        with pytest.raises(GrblError):
+            first.result(2)
+        time.sleep(0.2)
+        # An alarm with nothing in flight belongs to no job
+        ser.reply("ALARM:2")
+        time.sleep(0.2)
+
+        second = streamer.submit(["G1X20"])
+        wait_for(lambda: "G1X20\n" in ser.written)
+        time.sleep(0.3)
+        assert not second.done()
+        ser.reply("ok")
+        assert second.result(2) is True
+    finally:
+        streamer.stop()
+        reader.stop()
+
+
+def make_streamer(ser):
+    lock = threading.Lock()
+    reader = GrblReader(ser, lock, poll_rate=0)
+    return reader, GrblStreamer(ser, lock, reader)
+
+
+def test_rx_buffer_never_overfills():
+    ser = ConsumingSerial()
+    reader, streamer = make_streamer(ser)
+    try:
+        first = streamer.submit([f"G1X{i}Y{i * 7}F{1000 + i}" for i in range(100)])
+        second = streamer.submit([f"G1X{i * 3}Y{i}" for i in range(100)])
+        assert first.result(5) is True and second.result(5) is True
+        assert ser.max_buffered <= streamer.rx_buffer_size
+        # More than one line at a time, or it's just stop-and-wait
+        assert ser.max_buffered > streamer.rx_buffer_size // 2
+        assert streamer.buffered == 0
+    finally:
+        ser.running = False
+        streamer.stop()
+        reader.stop()
+
+
+def test_settings_wait_for_everything_before_them():
+    ser = FakeSerial()
+    reader, streamer = make_streamer(ser)
+    try:
+        job = streamer.submit(["G1X1", "G1X2", "$120=400", "G1X3"])
+        wait_for(lambda: "G1X2\n" in ser.written)
+        time.sleep(0.2)
+        assert "$120=400\n" not in ser.written
+        ser.reply("ok")
+        time.sleep(0.2)
+        assert "$120=400\n" not in ser.written
+        ser.reply("ok")
+        wait_for(lambda: "$120=400\n" in ser.written)
+        # Nothing follows a settings line until it is answered either
+        time.sleep(0.2)
+        assert "G1X3\n" not in ser.written
+        ser.reply("ok")
+        wait_for(lambda: "G1X3\n" in ser.written)
+        ser.reply("ok")
+        assert job.result(2) is True
+    finally:
+        streamer.stop()
+        reader.stop()
+
+
+def test_jobs_stream_back_to_back():
+    ser = FakeSerial()
+    reader, streamer = make_streamer(ser)
+    acked, done = [], []
+    try:
+        first = streamer.submit(["G1X1", "G1X2"], on_ack=lambda: acked.append(1))
+        second = streamer.submit(["G1X3"], on_ack=lambda: acked.append(2))
+        first.add_done_callback(lambda future: done.append(1))
+        second.add_done_callback(lambda future: done.append(2))
+        # The second job goes out before the first one is answered
+        wait_for(lambda: "G1X3\n" in ser.written)
+        assert not first.done()
+        for _ in range(3):
+            ser.reply("ok")
+        assert first.result(2) is True and second.result(2) is True
+        assert acked == [1, 2]
+        assert done == [1, 2]
+    finally:
+        streamer.stop()
+        reader.stop()
+
+
+def test_reader_routes_every_kind_of_line():
+    ser = FakeSerial()
+    reader = GrblReader(ser, threading.Lock(), poll_rate=0)
+    events, statuses = [], []
+    reader.subscribe(events.append)
+    reader.subscribe(statuses.append, kinds=(GrblEvent.STATUS,))
+    try:
+        for line in ["ok", "error:9", "ALARM:1", "<Alarm|MPos:1.000,2.000,0.000|FS:0,0>",
+                     "[MSG:Reset to continue]"]:
+            ser.reply(line)
+        wait_for(lambda: len(events) == 5)
+
+        responses = [reader.responses.get_nowait() for _ in range(3)]
+        assert [(event.kind, event.code) for event in responses] == \
+            [(GrblEvent.OK, None), (GrblEvent.ERROR, "9"), (GrblEvent.ALARM, "1")]
+        assert reader.responses.empty()
+        assert reader.alarm.code == "1"
+        assert reader.status.state == "Alarm" and reader.status.mpos == (1.0, 2.0, 0.0)
+        assert [event.kind for event in events] == [GrblEvent.OK, GrblEvent.ERROR, GrblEvent.ALARM,
+                                                    GrblEvent.STATUS, GrblEvent.MESSAGE]
+        assert [event.raw for event in statuses] == ["<Alarm|MPos:1.000,2.000,0.000|FS:0,0>"]
+
+        # Leaving the Alarm state clears it
+        ser.reply("<Idle|MPos:1.000,2.000,0.000|FS:0,0>")
+        wait_for(lambda: len(statuses) == 2)
+        assert reader.alarm is None and reader.status.state == "Idle"
+    finally:
+        reader.stop()
+
+
+def test_status_report_parsing():
+    status = GrblStatus("<Run|MPos:1.000,2.500,0.000|FS:500,0|Ov:100,100,100>")
+    assert status.state == "Run"
+    assert status.mpos == (1.0, 2.5, 0.0) and status.wpos is None
+    assert status.position == status.mpos
+    assert status.fields["FS"] == "500,0"
+
+    status = GrblStatus("<Hold:0|WPos:-3.000,4.000,0.000|FS:0,0>")
+    assert status.state == "Hold"
+    assert status.mpos is None and status.position == (-3.0, 4.0, 0.0)
+
+
+def test_reader_works_out_wpos_from_the_offset():
+    ser = FakeSerial()
+    reader = GrblReader(ser, threading.Lock(), poll_rate=0)
+    try:
+        ser.reply("<Idle|MPos:10.000,20.000,0.000|FS:0,0|WCO:1.000,2.000,0.000>")
+        ser.reply("<Idle|MPos:15.000,25.000,0.000|FS:0,0>")
+        wait_for(lambda: reader.status is not None and reader.status.mpos[0] == 15)
+        assert reader.wco == (1.0, 2.0, 0.0)
+        assert reader.status.wpos == (14.0, 23.0, 0.0)
+    finally:
+        reader.stop()
+
+
+def test_watch_resolves_on_the_first_matching_report():
+    ser = FakeSerial()
+    reader = GrblReader(ser, threading.Lock(), poll_rate=0)
+    try:
+        running = reader.watch(lambda status: status.state == "Run")
+        idle = reader.watch(lambda status: status.state == "Idle")
+        ser.reply("<Run|MPos:1.000,0.000,0.000|FS:500,0>")
+        assert running.result(2).mpos == (1.0, 0.0, 0.0)
+        with pytest.raises(TimeoutError):
+            idle.result(0.2)
+        ser.reply(IDLE)
+        assert idle.result(2).state == "Idle"
+        # The cached report counts straight away
+        assert reader.watch(lambda status: status.state == "Idle").done()
+
+        # A cancelled watch is dropped on the next report
+        stale = reader.watch(lambda status: status.state == "Jog")
+        stale.cancel()
+        ser.reply(IDLE)
+        wait_for(lambda: not reader.watchers)
+    finally:
+        reader.stop()
+
+
+def test_gantry_waits_on_cached_status():
+    ser = FakeSerial()
+    gantry = GantryControl.__new__(GantryControl)
+    gantry.reader = GrblReader(ser, threading.Lock(), poll_rate=0)
+    gantry.last_motion_future = None
+    try:
+        ser.reply("<Idle|WPos:10.000,20.000,0.000|FS:0,0>")
+        wait_for(lambda: gantry.reader.status is not None)
+        assert gantry.wait_for_position(10.2, 19.9, timeout=1).wpos == (10.0, 20.0, 0.0)
+        assert gantry.wait_for_position(50, 50, timeout=0.2) is None
+
+        # The cached Idle is older than the call, only a new one counts
+        assert gantry.wait_for_idle(timeout=0.2) is None
+        threading.Timer(0.1, ser.reply, [IDLE]).start()
+        assert gantry.wait_for_idle(timeout=2).state == "Idle"
+    finally:
+        gantry.reader.stop()
+
+
+def test_idle_from_before_the_last_ack_does_not_finish_a_job():
+    ser = FakeSerial(status=None)
+    reader, streamer = make_streamer(ser)
+    try:
+        ser.reply(IDLE)
+        wait_for(lambda: reader.status is not None)
+        job = streamer.submit(["G1X10"])
+        wait_for(lambda: "G1X10\n" in ser.written)
+        ser.reply("ok")
+        time.sleep(0.4)
+        assert reader.status.state == "Idle"
+        assert not job.done()
+        ser.reply(IDLE)
+        assert job.result(2) is True
+    finally:
+        streamer.stop()
+        reader.stop()
@@ -0,0 +1,145 @@
+import random
+import sys
+import threading
+import types
+
+# Only the fake below talks to the pins, lgpio just has to import
+sys.modules.setdefault("lgpio", types.ModuleType("lgpio"))
+
+from checkmate.controls import hall_control
+from checkmate.controls.hall_control import HallSampler, SenseLayer
+from checkmate.controls.occupancy import Occupancy
+
+
+class FakeLgpio:
+    """The mux as lgpio sees it, outputs[i] is the nibble read back on address i."""
+    SET_PULL_DOWN = 0
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.selected = 0
+        self.addresses = {gray: i for i, gray in enumerate(SenseLayer.GRAY_CODES)}
+
+    def gpiochip_open(self, chip):
+        return 1
+
+    def gpiochip_close(self, handle):
+        pass
+
+    def group_claim_output(self, handle, pins, levels):
+        pass
+
+    def group_claim_input(self, handle, pins, flags):
+        pass
+
+    def group_write(self, handle, gpio, nibble):
+        self.selected = nibble
+
+    def group_read(self, handle, gpio):
+        return self.outputs[self.addresses[self.selected]]
+
+
+def baseline_squares(outputs):
+    """The old per-pin get_squares() loop, board[row][col]."""
+    board = [[0] * 8 for _ in range(8)]
+    for i in range(16):
+        for j in range(4):
+            col, row = SenseLayer.hall_to_board_mapping[i][j]
+            board[row][col] = 0 if (outputs[i] >> j) & 1 else 1
+    return board
+
+
+def scan(monkeypatch, outputs):
+    monkeypatch.setattr(hall_control, "lgpio", FakeLgpio(outputs))
+    return SenseLayer()
+
+
+def test_decode_matches_the_per_pin_mapping(monkeypatch):
+    rng = random.Random(5)
+    readings = [[0xF] * 16, [0] * 16] + [[rng.randrange(16) for _ in range(16)] for _ in range(20)]
+    for outputs in readings:
+        layer = scan(monkeypatch, outputs)
+        squares = baseline_squares(outputs)
+        assert layer.get_squares() == squares
+        assert layer.get_squares_game() == [list(row) for row in zip(*squares)]
+        assert layer.get_occupancy() == Occupancy.from_rows(zip(*squares))
+
+
+def test_one_sensor_is_one_square(monkeypatch):
+    # HALL 12 q2 (address 15, Y2) sits under a1, pulled low by a magnet
+    outputs = [0xF] * 16
+    outputs[15] = 0xF & ~0b0010
+    layer = scan(monkeypatch, outputs)
+    assert layer.get_occupancy().square_names() == ["a1"]
+    assert layer.get_square_from_notation("a1") == 1
+
+
+class ScriptedSenseLayer:
+    """Returns the scripted readings in turn, then keeps repeating the last one."""
+    def __init__(self, readings):
+        self.readings = list(readings)
+        self.scans = 0
+        self.finished = threading.Event()
+
+    def get_occupancy(self):
+        self.scans += 1
+        if len(self.readings) > 1:
+            return self.readings.pop(0)
+        self.finished.set()
+        return self.readings[0]
+
+
+A, B, C = Occupancy.from_squares(["e2"]), Occupancy.from_squares(["e4"]), Occupancy.from_squares(["e4", "d5"])
+
+
+def run_sampler(sampler):
+    sampler.start()
+    assert sampler.sense_layer.finished.wait(2)
+    sampler.stop()
+
+
+def test_latest_scans_once_when_nothing_is_buffered():
+    layer = ScriptedSenseLayer([A, B])
+    sampler = HallSampler(layer)
+    timestamp, occupancy = sampler.latest()
+    assert occupancy == A and layer.scans == 1
+    # Kept in the buffer, so the next call doesn't scan again
+    assert sampler.latest() == (timestamp, A) and layer.scans == 1
+
+
+def test_changes_only_and_every_frame_subscribers():
+    sampler = HallSampler(ScriptedSenseLayer([A, A, B, B, C]), rate=500, history=1000)
+    changes, frames = [], []
+    sampler.subscribe(lambda t, occupancy, previous: changes.append((occupancy, previous)))
+    sampler.subscribe(lambda t, occupancy, previous: frames.append((t, occupancy)), changes_only=False)
+    run_sampler(sampler)
+
+    assert changes == [(B, A), (C, B)]
+    assert frames == list(sampler.frames)
+    assert [occupancy for _, occupancy in frames[:5]] == [A, A, B, B, C]
+
+
+def test_unsubscribe_from_inside_a_callback():
+    sampler = HallSampler(ScriptedSenseLayer([A, B, C, A]), rate=500)
+    once, every = [], []
+
+    def first_change(t, occupancy, previous):
+        once.append(occupancy)
+        sampler.unsubscribe(first_change)
+
+    sampler.subscribe(first_change)
+    sampler.subscribe(lambda t, occupancy, previous: every.append(occupancy))
+    run_sampler(sampler)
+
+    assert once == [B]
+    assert every == [B, C, A]
+    assert len(sampler.subscribers) == 1
+
+
+def test_frames_since():
+    sampler = HallSampler(ScriptedSenseLayer([A]))
+    for offset, occupancy in enumerate([A, B, C]):
+        sampler.frames.append((100.0 + offset, occupancy))
+    assert sampler.frames_since(100.5) == [(101.0, B), (102.0, C)]
+    assert sampler.frames_since(102.0) == []
+    assert sampler.frames_since(0) == list(sampler.frames)
@@ -0,0 +1,70 @@
+import random
+
+import chess
+
+from checkmate.controls.material_tracker import MaterialTracker, material
+
+
+def test_material():
+    assert material(chess.Board()) == (39, 39)
+    board = chess.Board("4k3/8/8/8/8/8/PPP5/RN2K3 w - - 0 1")
+    assert material(board) == (11, 0)
+
+
+def test_capture_and_takeback():
+    board = chess.Board()
+    tracker = MaterialTracker(board)
+    for move in ["e4", "d5"]:
+        tracker.push(board, board.parse_san(move))
+    assert tracker.push(board, board.parse_san("exd5")) == "p"
+    assert (tracker.white, tracker.black) == (39, 38)
+    assert tracker.captured == ["p"] and tracker.black_captures == ["p"]
+    assert tracker.counts["p"] == 7
+    tracker.pop(board)
+    assert (tracker.white, tracker.black) == (39, 39)
+    assert tracker.captured == [] and tracker.counts["p"] == 8
+
+
+def test_en_passant_and_promotion():
+    board = chess.Board("4k3/8/8/3pP3/8/8/1p6/4K3 w - d6 0 1")
+    tracker = MaterialTracker(board)
+    assert tracker.push(board, chess.Move.from_uci("e5d6")) == "p"
+    assert tracker.push(board, chess.Move.from_uci("b2b1q")) is None
+    assert (tracker.white, tracker.black) == material(board) == (1, 9)
+    assert tracker.counts["q"] == 1 and tracker.counts["p"] == 0
+
+
+def test_castling_is_not_a_capture():
+    board = chess.Board("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    tracker = MaterialTracker(board)
+    assert tracker.push(board, chess.Move.from_uci("e1g1")) is None
+    assert tracker.captured == []
+
+
+def test_matches_a_full_count_over_a_random_game():
+    rng = random.Random(3)
+    board = chess.Board()
+    tracker = MaterialTracker(board)
+    for _ in range(150):
+        moves = list(board.legal_moves)
+        if not moves:
+            break
+        tracker.push(board, rng.choice(moves))
+        if rng.random() < 0.2:
+            tracker.pop(board)
+        assert (tracker.white, tracker.black) == material(board)
+    for symbol, count in tracker.counts.items():
+        piece = chess.Piece.from_symbol(symbol)
+        assert count == len(board.pieces(piece.piece_type, piece.color))
+    assert len(tracker.captured) == 32 - len(board.piece_map())
+
+
+def test_reset_takes_the_captures_from_the_tracker():
+    from checkmate.controls.reset_control import BoardReset
+    board = chess.Board()
+    tracker = MaterialTracker(board)
+    for move in ["e4", "d5", "exd5", "Qxd5"]:
+        tracker.push(board, board.parse_san(move))
+    reset = BoardReset(board, None, None, tracker)
+    assert reset.game_captures() == ["p", "P"]
+    assert reset.game_captures([]) == []
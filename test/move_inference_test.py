@@ -0,0 +1,172 @@
+import chess
+
+from checkmate.controls.occupancy import Occupancy
+from checkmate.controls.move_inference import MoveInference, MoveIndex, SquareDebouncer
+
+
+class Player:
+    """Moves pieces on a simulated sensor board, a few frames per step."""
+    def __init__(self, board, inference, frames=3):
+        self.occ = Occupancy.from_board(board)
+        self.inference = inference
+        self.frames = frames
+        self.time = 0.0
+        self.found = None
+        inference.reset(board, self.occ)
+
+    def step(self, frames=None):
+        for _ in range(frames or self.frames):
+            self.time += 0.02
+            move = self.inference.feed(self.time, self.occ)
+            if move is not None:
+                self.found = move
+
+    def lift(self, square):
+        self.occ = self.occ.vacate(square)
+        self.step()
+
+    def place(self, square):
+        self.occ = self.occ.occupy(square)
+        self.step()
+
+    def wait(self, seconds):
+        self.step(int(seconds / 0.02) + 1)
+
+
+def test_debouncer_ignores_glitches():
+    debouncer = SquareDebouncer(Occupancy.from_squares(["e2"]))
+    assert debouncer.feed(Occupancy()) == chess.BB_E2
+    assert debouncer.feed(Occupancy.from_squares(["e2"])) == chess.BB_E2
+    debouncer.feed(Occupancy())
+    assert debouncer.feed(Occupancy()) == 0
+
+
+def test_plain_move():
+    player = Player(chess.Board(), MoveInference())
+    player.lift("e2")
+    assert player.found is None
+    player.place("e4")
+    assert player.found == chess.Move.from_uci("e2e4")
+
+
+def test_capture():
+    board = chess.Board("rnbqkbnr/ppp1pppp/8/3p4/4P3/8/PPPP1PPP/RNBQKBNR w KQkq - 0 2")
+    player = Player(board, MoveInference())
+    player.lift("d5")
+    player.lift("e4")
+    assert player.found is None
+    player.place("d5")
+    assert player.found == chess.Move.from_uci("e4d5")
+
+
+def test_castling_king_first():
+    board = chess.Board("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    player = Player(board, MoveInference())
+    player.lift("e1")
+    player.place("g1")
+    assert player.found is None
+    player.lift("h1")
+    player.place("f1")
+    assert player.found == chess.Move.from_uci("e1g1")
+
+
+def test_castling_rook_first_waits_for_king():
+    board = chess.Board("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    player = Player(board, MoveInference(ambiguity_timeout=1.0))
+    player.lift("h1")
+    player.place("f1")
+    # Could still be castling
+    assert player.found is None
+    player.lift("e1")
+    player.place("g1")
+    assert player.found == chess.Move.from_uci("e1g1")
+
+
+def test_rook_move_confirmed_after_timeout():
+    board = chess.Board("r3k2r/8/8/8/8/8/8/R3K2R w KQkq - 0 1")
+    player = Player(board, MoveInference(ambiguity_timeout=0.5))
+    player.lift("h1")
+    player.place("f1")
+    player.wait(0.6)
+    assert player.found == chess.Move.from_uci("h1f1")
+
+
+def test_en_passant():
+    board = chess.Board("rnbqkbnr/ppp1p1pp/8/3pPp2/8/8/PPPP1PPP/RNBQKBNR w KQkq f6 0 3")
+    player = Player(board, MoveInference())
+    player.lift("e5")
+    player.place("f6")
+    player.lift("f5")
+    assert player.found == chess.Move.from_uci("e5f6")
+
+
+def test_promotion_defaults_to_queen():
+    board = chess.Board("8/4P3/8/8/8/8/k7/7K w - - 0 1")
+    player = Player(board, MoveInference())
+    player.lift("e7")
+    player.place("e8")
+    assert player.found == chess.Move.from_uci("e7e8q")
+
+
+def test_piece_put_back_resets():
+    resets = []
+    player = Player(chess.Board(), MoveInference(on_reset=lambda: resets.append(True)))
+    player.lift("g1")
+    player.place("g1")
+    assert resets == [True]
+    player.lift("e2")
+    player.place("e3")
+    assert player.found == chess.Move.from_uci("e2e3")
+
+
+def test_illegal_move_reported():
+    illegal = []
+    player = Player(chess.Board(), MoveInference(on_illegal=lambda a, b: illegal.append(a + b), illegal_timeout=0.5))
+    player.lift("e2")
+    player.place("e5")
+    player.wait(0.6)
+    assert player.found is None
+    assert illegal == ["e2e5"]
+
+
+def test_move_index_lookups():
+    index = MoveIndex()
+    board = chess.Board()
+    assert index.find(board, "e2e4") == chess.Move.from_uci("e2e4")
+    assert index.find(board, "e2e5") is None
+    assert index.moves_for_squares(board, "e4", "e2") == [chess.Move.from_uci("e2e4")]
+    delta = chess.BB_E2 | chess.BB_E4
+    assert index.moves_for_delta(board, delta) == [chess.Move.from_uci("e2e4")]
+
+
+def test_move_index_promotion_defaults_to_queen():
+    index = MoveIndex()
+    board = chess.Board("8/4P3/8/8/8/8/8/k6K w - - 0 1")
+    assert index.find(board, "e7e8") == chess.Move.from_uci("e7e8q")
+    assert index.find(board, "e7e8n") == chess.Move.from_uci("e7e8n")
+
+
+def test_move_index_prefetch_and_eviction():
+    index = MoveIndex(size=2)
+    board = chess.Board()
+    future = index.prefetch(board)
+    assert future.result() is index.get(board)
+
+    for move in ("e2e4", "e7e5", "g1f3"):
+        board.push_uci(move)
+        index.get(board)
+    assert len(index.entries) == 2
+    assert MoveIndex.key(board) in index.entries
+
+
+def test_illegal_capture_reported():
+    illegal = []
+    board = chess.Board("4k3/8/8/8/8/1p6/8/R3K3 w - - 0 1")
+    player = Player(board, MoveInference(on_illegal=lambda a, b: illegal.append(a + b), illegal_timeout=0.5))
+    # The rook can't take on b3, only a1 ends up empty
+    player.lift("b3")
+    player.lift("a1")
+    player.place("b3")
+    player.wait(0.6)
+    assert player.found is None
+    assert illegal == ["a1b3"]
@@ -0,0 +1,64 @@
+import chess
+
+from checkmate.controls.move_list import MoveList
+
+
+def play(board, *moves):
+    for move in moves:
+        board.push_san(move)
+
+
+def test_rows_are_move_pairs():
+    board = chess.Board()
+    moves = MoveList()
+    assert moves.sync(board) == 0
+    assert moves.rows() == []
+    play(board, "e4", "e5", "Nf3")
+    assert moves.sync(board) == 0
+    assert moves.rows() == ["1. e4 e5", "2. Nf3"]
+
+
+def test_only_new_plies_are_worked_out():
+    board = chess.Board()
+    moves = MoveList()
+    play(board, "e4", "e5")
+    moves.sync(board)
+    assert moves.sync(board) is None
+    play(board, "Nf3")
+    assert moves.sync(board) == 2
+    assert moves.row_of(2) == 1
+    assert moves.rows(1) == ["2. Nf3"]
+
+
+def test_takeback_and_new_game():
+    board = chess.Board()
+    moves = MoveList()
+    play(board, "e4", "e5", "Nf3")
+    moves.sync(board)
+    board.pop()
+    board.pop()
+    play(board, "c5")
+    assert moves.sync(board) == 1
+    assert moves.rows() == ["1. e4 c5"]
+    assert moves.sync(chess.Board()) == 0
+    assert moves.rows() == []
+
+
+def test_black_to_move_first():
+    board = chess.Board("rnbqkbnr/pppppppp/8/8/4P3/8/PPPP1PPP/RNBQKBNR b KQkq - 0 1")
+    moves = MoveList()
+    play(board, "e5", "Nf3", "Nc6")
+    moves.sync(board)
+    assert moves.rows() == ["1... e5", "2. Nf3 Nc6"]
+
+
+def test_takeback_to_the_same_length():
+    board = chess.Board()
+    moves = MoveList()
+    play(board, "Nf3", "Nf6")
+    moves.sync(board)
+    board.pop()
+    board.pop()
+    play(board, "Nc3", "Nf6")
+    assert moves.sync(board) == 0
+    assert moves.rows() == ["1. Nc3 Nf6"]
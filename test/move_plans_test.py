@@ -0,0 +1,80 @@
+import os
+import tempfile
+
+from checkmate.controls.move_plans import MovePlanTable, compile_move, square_to_coord, PATH, DEADZONE
+
+
+table = MovePlanTable()
+
+
+def test_square_to_coord():
+    assert square_to_coord("h1") == (0, 0)
+    assert square_to_coord("a1") == (0, 350)
+    assert square_to_coord("h8") == (350, 0)
+    assert square_to_coord("e2") == (50, 150)
+
+
+def test_plain_move():
+    plan = table.lookup("e2e4", False, False, False)
+    assert plan.segments == ((PATH, ((50, 150), (100, 0))),)
+    assert plan.path == ((50, 150), (100, 0))
+
+
+def test_knight_goes_between_pieces():
+    plan = table.lookup("g1f3", False, False, False)
+    assert plan.path == ((0, 50), (25, 25), (50, 0), (25, 25))
+
+
+def test_castling_moves_rook_first():
+    plan = table.lookup("e1g1", False, True, False)
+    rook, king = plan.segments
+    assert rook == (PATH, ((0, 0), (0, 100)))
+    assert king == (PATH, ((0, 150), (25, -25), (0, -50), (-25, -25)))
+
+
+def test_capture_sends_captured_piece_to_deadzone():
+    plan = table.lookup("e4d5", True, False, False)
+    kinds = [kind for kind, _ in plan.segments]
+    assert kinds == [PATH, PATH, PATH, DEADZONE]
+    approach, nudge, back, dead = [value for _, value in plan.segments]
+    # Stop half a square short, push the captured piece on, then step in
+    assert approach == ((150, 150), (25, 25))
+    assert nudge == ((200, 200), (25, 25))
+    assert back == ((175, 175), (25, 25))
+    assert dead == (225, 225)
+
+
+def test_en_passant():
+    plan = table.lookup("e5d6", True, False, True)
+    assert plan.segments[-1] == (DEADZONE, (225, 225))
+
+
+def test_every_capture_ends_in_deadzone():
+    for (move, is_capture, is_castling, is_en_passant), plan in table.plans.items():
+        kinds = [kind for kind, _ in plan.segments]
+        assert kinds.count(DEADZONE) <= 1
+        if DEADZONE in kinds:
+            assert is_capture and kinds[-1] == DEADZONE
+
+
+def test_every_plan_stays_on_the_gantry():
+    for key, plan in table.plans.items():
+        for kind, value in plan.segments:
+            if kind != PATH:
+                continue
+            x, y = value[0]
+            for dx, dy in value[1:]:
+                x, y = x + dx, y + dy
+                assert -25 <= x <= 375 and -25 <= y <= 375, key
+
+
+def test_lookup_matches_compile():
+    assert table.lookup("b7a8q", True, False, False) == compile_move("b7a8", True, False, False)
+
+
+def test_cache_round_trip():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "plans.pickle")
+        MovePlanTable(path)
+        cached = MovePlanTable(path)
+        assert cached.plans == table.plans
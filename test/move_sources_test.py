@@ -0,0 +1,112 @@
+import os
+import random
+import struct
+import tempfile
+
+import chess
+import chess.polyglot
+
+from checkmate.controls.move_sources import EloPolicy, MoveSources, OpeningBook, Tablebase
+
+
+def write_book(path, entries):
+    """Polyglot book from (board, uci, weight) entries."""
+    rows = []
+    for board, uci, weight in entries:
+        move = chess.Move.from_uci(uci)
+        raw = (chess.square_file(move.to_square) | chess.square_rank(move.to_square) << 3 |
+               chess.square_file(move.from_square) << 6 | chess.square_rank(move.from_square) << 9)
+        rows.append((chess.polyglot.zobrist_hash(board), raw, weight))
+    with open(path, "wb") as f:
+        for key, raw, weight in sorted(rows):
+            f.write(struct.pack(">QHHI", key, raw, weight, 0))
+
+
+def test_book_move_before_engine():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "book.bin")
+        start = chess.Board()
+        write_book(path, [(start, "e2e4", 100), (start, "d2d4", 1)])
+
+        sources = MoveSources(path, os.path.join(tmp, "syzygy"), seed=1)
+        strong = [sources.lookup(start, 2600) for _ in range(50)]
+        assert set(strong) <= {chess.Move.from_uci("e2e4"), chess.Move.from_uci("d2d4")}
+        assert strong.count(chess.Move.from_uci("e2e4")) > 45
+
+        # Not in the book, and no tablebases, so it's up to the engine
+        start.push_uci("g2g4")
+        assert sources.lookup(start, 2600) is None
+        sources.close()
+
+
+def test_weak_players_leave_the_book_early():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "book.bin")
+        board = chess.Board()
+        for uci in ["g1f3", "g8f6", "b1c3", "b8c6", "f3g1", "f6g8", "c3b1", "c6b8"] * 2:
+            board.push_uci(uci)
+        write_book(path, [(board, "e2e4", 10)])
+
+        book = OpeningBook(path)
+        rng = random.Random(0)
+        assert book.choose(board, EloPolicy(800), rng) is None
+        assert book.choose(board, EloPolicy(2000), rng) == chess.Move.from_uci("e2e4")
+        book.close()
+
+
+class FakeTablebase:
+    """Scores by the move just played, anything not listed is a draw."""
+    def __init__(self, scores):
+        self.scores = scores
+
+    def probe_wdl(self, board):
+        return self.scores.get(board.peek().uci(), (0, 0))[0]
+
+    def probe_dtz(self, board):
+        return self.scores.get(board.peek().uci(), (0, 0))[1]
+
+    def close(self):
+        pass
+
+
+def fake_tablebase(tablebase, scores):
+    tablebase.tablebase = FakeTablebase(scores)
+    tablebase.max_pieces = 5
+    return tablebase
+
+
+# Opponent's view after the move: -2 is a loss for them, so a win for us
+KQK_SCORES = {"b1b8": (-2, -5), "b1g6": (-2, -3), "b1b2": (-2, -9)}
+
+
+def test_tablebase_picks_the_best_move():
+    board = chess.Board("7k/8/8/8/8/8/8/KQ6 w - - 0 1")
+    tablebase = fake_tablebase(Tablebase(None), KQK_SCORES)
+    rng = random.Random(0)
+    # Exact: the win with the opponent's dtz closest to 0
+    assert tablebase.choose(board, EloPolicy(2600), rng) == chess.Move.from_uci("b1g6")
+    # Otherwise any move that keeps the win
+    weak = {tablebase.choose(board, EloPolicy(1200), rng) for _ in range(30)}
+    assert weak <= {chess.Move.from_uci(uci) for uci in KQK_SCORES}
+    assert len(weak) > 1
+    # The board is left as it was
+    assert board.fen() == "7k/8/8/8/8/8/8/KQ6 w - - 0 1"
+
+    # Too many pieces for the tables
+    assert tablebase.choose(chess.Board(), EloPolicy(2600), rng) is None
+
+
+def test_tablebase_move_from_move_sources():
+    board = chess.Board("7k/8/8/8/8/8/8/KQ6 w - - 0 1")
+    sources = MoveSources(seed=1)
+    fake_tablebase(sources.tablebase, KQK_SCORES)
+    assert sources.lookup(board, 2600) == chess.Move.from_uci("b1g6")
+    sources.close()
+
+
+def test_elo_policy():
+    weak, strong = EloPolicy(800), EloPolicy(2800)
+    assert weak.book_plies < strong.book_plies
+    assert weak.book_sharpness == 0 and strong.book_sharpness == 2
+    assert weak.tablebase_skip > 0 and strong.tablebase_skip == 0
+    assert strong.tablebase_exact and not weak.tablebase_exact
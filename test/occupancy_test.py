@@ -0,0 +1,50 @@
+import chess
+
+from checkmate.controls.occupancy import Occupancy
+
+
+def test_square_access_by_index_and_name():
+    occ = Occupancy.from_squares(["e4", chess.A1])
+    assert "e4" in occ and chess.E4 in occ
+    assert occ["a1"] == 1 and occ["h8"] == 0
+    assert occ.get("d5", 0) == 0
+    assert len(occ) == 2
+    assert list(occ) == [chess.A1, chess.E4]
+
+
+def test_matches_squareset_numbering():
+    board = chess.Board()
+    occ = Occupancy.from_board(board)
+    assert occ.squareset() == chess.SquareSet(board.occupied)
+    assert len(occ) == 32
+
+
+def test_rows_round_trip():
+    occ = Occupancy.from_board(chess.Board())
+    rows = occ.rows()
+    assert rows[0] == [1] * 8 and rows[2] == [0] * 8
+    assert Occupancy.from_rows(rows) == occ
+    # columns() is the transpose of rows()
+    assert occ.columns() == [list(col) for col in zip(*rows)]
+
+
+def test_diff():
+    before = Occupancy.from_board(chess.Board())
+    lifted = before.vacate("e2")
+    assert lifted.changed_square(before) == "e2"
+    placed = lifted.occupy("e4")
+    assert placed.changed_square(before) is None
+    assert (placed ^ before).square_names() == ["e2", "e4"]
+    assert placed.changed_square(placed) is None
+
+
+def test_immutable():
+    occ = Occupancy()
+    occ.occupy("e4")
+    assert not occ
+    try:
+        occ.mask = 1
+    except AttributeError:
+        pass
+    else:
+        assert False, "Occupancy should be immutable"
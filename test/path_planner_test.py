@@ -0,0 +1,93 @@
+import chess
+
+from checkmate.controls.move_plans import square_to_coord
+from checkmate.controls.path_planner import PathPlanner, path_time, segment_time, simplify_path
+
+
+def end_of(path):
+    x, y = path[0]
+    for dx, dy in path[1:]:
+        x += dx
+        y += dy
+    return (x, y)
+
+
+def test_straight_move_on_empty_lane():
+    planner = PathPlanner()
+    path = planner.plan_path(square_to_coord("e2"), square_to_coord("e4"), chess.Board().occupied)
+    assert path == [(50, 150), (100, 0)]
+
+
+def test_knight_goes_between_the_pawns():
+    planner = PathPlanner()
+    path = planner.plan_path(square_to_coord("g1"), square_to_coord("f3"), chess.Board().occupied)
+    assert path[0] == (0, 50)
+    assert end_of(path) == square_to_coord("f3")
+    # Never through the centre of an occupied square
+    blocked = planner.blocked_points(chess.Board().occupied, path[0], end_of(path))
+    x, y = path[0]
+    for dx, dy in path[1:]:
+        x += dx
+        y += dy
+        assert (x, y) not in blocked
+
+
+def test_blocked_rook_goes_around():
+    planner = PathPlanner()
+    # a2 is still there, so the rook has to leave the a file
+    path = planner.plan_path(square_to_coord("a1"), square_to_coord("a4"), chess.Board().occupied)
+    assert end_of(path) == square_to_coord("a4")
+    assert len(path) > 2
+
+
+def test_into_the_deadzone():
+    planner = PathPlanner()
+    path = planner.plan_path((0, 0), (0, 435), chess.BB_EMPTY)
+    assert path is not None
+    assert end_of(path) == (0, 435)
+
+
+def test_no_way_through():
+    planner = PathPlanner()
+    boxed_in = [(25, 0), (0, 25), (25, 25)]
+    assert planner.plan((0, 0), (350, 350), extra=boxed_in) is None
+    assert planner.plan((0, 0), (12, 0)) is None
+
+
+def test_plans_are_cached():
+    planner = PathPlanner()
+    first = planner.plan((0, 0), (350, 350), chess.Board().occupied)
+    assert planner.plan((0, 0), (350, 350), chess.Board().occupied) is first
+    planner.set_limits(acceleration=1000)
+    assert planner.cache == {}
+
+
+def test_segment_time():
+    # Short moves never reach full speed
+    assert abs(segment_time(50, 250, 700) - 2 * (50 / 700) ** 0.5) < 1e-9
+    assert abs(segment_time(350, 250, 700) - (350 / 250 + 250 / 700)) < 1e-9
+    assert path_time([(0, 0), (350, 0)], 250, 700) == segment_time(350, 250, 700)
+
+
+def test_simplify_merges_and_drops_empty_moves():
+    path = [(0, 0), (0, 25), (0, 25), (0, 0), (25, 0), (50, 0), (25, 25)]
+    assert simplify_path(path) == [(0, 0), (0, 50), (75, 0), (25, 25)]
+
+
+def test_dog_leg_becomes_a_diagonal():
+    planner = PathPlanner()
+    # Around the corner on an empty board, nothing in the way
+    path = [(0, 0), (100, 0), (0, 100)]
+    fast, seconds = planner.optimise(path, occupied=chess.BB_EMPTY)
+    assert fast == [(0, 0), (100, 100)]
+    assert seconds < planner.estimate(path)
+
+
+def test_shortcut_keeps_clear_of_pieces():
+    planner = PathPlanner()
+    # g2 sits right on the diagonal from h1 to f3
+    path = [(0, 0), (100, 0), (0, 100)]
+    fast, _ = planner.optimise(path, occupied=chess.BB_G2)
+    assert fast == path
+    # Without the occupancy only merging is allowed
+    assert planner.optimise(path)[0] == path
@@ -0,0 +1,77 @@
+import contextlib
+from concurrent.futures import Future
+
+from checkmate.controls.occupancy import Occupancy
+from checkmate.controls.path_planner import PathPlanner
+from checkmate.controls.reset_executor import ResetExecutor, ResetStep
+
+
+class FakeGantry:
+    """Records what would be streamed, every job is acknowledged straight away."""
+    def __init__(self):
+        self.sent = []
+        self.occupied = []
+        self.batched = 0
+        self.last_path_time = 0.0
+        self.planner = PathPlanner(acceleration=700)
+        self.planned_with = []
+
+    def movement_to_gcode(self, path, occupied=None):
+        self.occupied.append(occupied)
+        self.planned_with.append(self.planner.acceleration)
+        self.last_path_time = 1.5
+        return [f"G90X{path[0][0]}Y{path[0][1]}", "M8", "M9"]
+
+    @contextlib.contextmanager
+    def batch_motion(self):
+        self.batched += 1
+        yield
+
+    def send_commands(self, commands, wait=None, on_ack=None):
+        self.sent.append(commands)
+        if on_ack is not None:
+            on_ack()
+        future = Future()
+        future.set_result(True)
+        return future
+
+
+STEPS = [
+    ResetStep("P", "e4", "e2", [(150, 150), (-100, 0)]),
+    ResetStep("n", (0, 435), "g8", [(0, 435), (0, -60)]),
+]
+
+
+def test_whole_reset_is_one_batch():
+    gantry = FakeGantry()
+    progress = []
+    ResetExecutor(gantry).run(STEPS, on_progress=lambda done, total, step: progress.append((done, total, step.piece)))
+    assert gantry.batched == 1
+    assert gantry.sent[1][0] == "G90X150Y150"
+    assert progress == [(1, 2, "P"), (2, 2, "n")]
+
+
+def test_estimate_and_occupancy_follow_the_plan():
+    gantry = FakeGantry()
+    executor = ResetExecutor(gantry)
+    board = Occupancy.from_squares(["e4"])
+    executor.run(STEPS, board)
+    assert executor.estimate == 3.0
+    assert executor.progress == (2, 2)
+    # The knight is planned around the pawn already back on e2
+    assert gantry.occupied == [int(board), int(Occupancy.from_squares(["e2"]))]
+
+
+def test_nothing_to_do():
+    gantry = FakeGantry()
+    assert ResetExecutor(gantry).run([]) is None
+    assert gantry.sent == []
+
+
+def test_pieces_are_dragged_at_the_reset_acceleration():
+    gantry = FakeGantry()
+    ResetExecutor(gantry).run(STEPS)
+    assert gantry.planned_with == [400, 400]
+    assert gantry.planner.acceleration == 700
+    assert gantry.sent[0] == ["$120=400", "$121=400"]
+    assert gantry.sent[-1] == ["$120=700", "$121=700"]
@@ -0,0 +1,107 @@
+import time
+import types
+
+import chess
+
+from checkmate.controls.occupancy import Occupancy
+from checkmate.controls.path_planner import PathPlanner
+from checkmate.controls.reset_control import BoardReset
+from checkmate.controls.reset_planner import HOME_SQUARES, MoveGraph, ResetMove, ResetPlanner, hungarian
+
+
+def fake_gantry():
+    return types.SimpleNamespace(planner=PathPlanner(), nextdead_white=(0, 435), nextdead_black=(350, 435),
+                                 estimate_path_time=lambda path: 1.0)
+
+
+START = [(symbol, square) for symbol, squares in HOME_SQUARES.items() for square in squares]
+
+
+def test_hungarian():
+    cost = [[4, 1, 3],
+            [2, 0, 5],
+            [3, 2, 2]]
+    assert hungarian(cost) == [1, 0, 2]
+    # Fewer rows than columns
+    assert hungarian([[5, 1, 9]]) == [1]
+
+
+def test_nothing_to_do_from_the_start_position():
+    assert ResetPlanner().plan(START) == []
+
+
+def test_pieces_go_to_the_nearest_home_square():
+    pieces = [piece for piece in START if piece[0] != "P"]
+    pieces += [("P", square) for square in ["a3", "b3", "c3", "d3", "e3", "f3", "g3", "h3"]]
+    moves = ResetPlanner().plan(pieces)
+    assert sorted(moves) == sorted(ResetMove("P", f"{f}3", f"{f}2") for f in "abcdefgh")
+
+
+def test_swapped_pieces_get_parked():
+    # Rooks and knights swapped, every move waits on another
+    pieces = [({"R": "N", "N": "R"}.get(symbol, symbol), square) for symbol, square in START]
+    moves = ResetPlanner().plan(pieces)
+    assert len(moves) == 6
+    board = dict((square, symbol) for symbol, square in pieces)
+    for move in moves:
+        assert move.final_square not in board
+        board[move.final_square] = board.pop(move.start)
+    assert board == dict((square, symbol) for symbol, square in START)
+
+
+def test_inner_deadzone_slot_goes_first():
+    pieces = [piece for piece in START if piece[1] not in ("b1", "g1")]
+    pieces += [("N", (350, 435)), ("N", (350, 410))]
+    moves = ResetPlanner().plan(pieces)
+    assert [move.start for move in moves] == [(350, 410), (350, 435)]
+
+
+def test_planning_is_quick():
+    board = chess.Board("r3k2r/1b3ppp/p1n5/1p1pP3/3P4/P1N2N2/1P3PPP/R1B2RK1 w kq - 0 1")
+    pieces = [(piece.symbol(), chess.square_name(square)) for square, piece in board.piece_map().items()]
+    pieces += [("Q", (350, 435)), ("B", (350, 410)), ("P", (325, 435)), ("q", (0, 435)), ("n", (0, 410))]
+    start = time.time()
+    moves = ResetPlanner().plan(pieces)
+    assert time.time() - start < 0.5
+    assert len(moves) >= 10
+
+
+def test_plan_reset_paths_start_where_the_pieces_are():
+    reset = BoardReset(chess.Board(), fake_gantry(), None)
+    fen = "rnbqkbnr/pppp1ppp/8/4p3/4P3/8/PPPP1PPP/RNBQKBNR"
+    occupancy = Occupancy.from_board(chess.Board(fen + " w KQkq - 0 1"))
+    steps = reset.plan_reset(fen, [], occupancy)
+    assert sorted((step.start, step.final_square) for step in steps) == [("e4", "e2"), ("e5", "e7")]
+    for step in steps:
+        assert step.path[0] == reset.square_to_coords_ry(step.start)
+
+
+def test_move_graph_finds_the_cycle():
+    planner = ResetPlanner()
+    moves = [ResetMove("R", "a1", "b1"), ResetMove("N", "b1", "a1"), ResetMove("P", "a3", "a2")]
+    graph = MoveGraph(moves, planner.blockers, {"a1", "b1", "a3"})
+    order, left = graph.topological_order()
+    assert order == [moves[2]]
+    assert sorted(graph.find_cycle(left)) == sorted(moves[:2])
+
+
+def test_cycle_broken_through_the_deadzone():
+    pieces = [({"R": "N", "N": "R"}.get(symbol, symbol), square) for symbol, square in START]
+    buffers = [(25, 410), (325, 410)]
+    moves = ResetPlanner().plan(pieces, buffers=buffers)
+    assert len(moves) == 6
+    for buffer in buffers:
+        parked = [k for k, move in enumerate(moves) if move.final_square == buffer]
+        left = [k for k, move in enumerate(moves) if move.start == buffer]
+        assert len(parked) == 1 and len(left) == 1
+        assert parked[0] < left[0]
+
+
+def test_simple_reset_to_home_in_one_pass():
+    board = chess.Board("rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/NRBQKBRN w - - 0 1")
+    hall = types.SimpleNamespace(sense_layer=types.SimpleNamespace(get_occupancy=lambda: Occupancy.from_board(board)))
+    reset = BoardReset(board, fake_gantry(), hall)
+    plans = reset.simple_reset_to_home(board.fen())
+    finals = [plan["final_square"] for plan in plans.values()]
+    assert sorted(square for square in finals if square in ("a1", "b1", "g1", "h1")) == ["a1", "b1", "g1", "h1"]
+    assert len(plans) == 6
@@ -0,0 +1,28 @@
+import time
+
+from checkmate.controls.turn_pipeline import TurnPipeline
+
+
+def test_stages_run_side_by_side():
+    pipeline = TurnPipeline()
+    start = time.time()
+    results = pipeline.run({
+        "motion": lambda: time.sleep(0.2) or "moved",
+        "rocker": lambda: time.sleep(0.2) or "rocked",
+        "precompute": lambda: 42,
+    })
+    elapsed = time.time() - start
+    assert results == {"motion": "moved", "rocker": "rocked", "precompute": 42}
+    assert elapsed < 0.35
+    pipeline.shutdown()
+
+
+def test_failed_stage_does_not_stop_the_others():
+    pipeline = TurnPipeline()
+
+    def broken():
+        raise RuntimeError("servo jammed")
+
+    results = pipeline.run({"rocker": broken, "motion": lambda: "moved"})
+    assert results == {"rocker": None, "motion": "moved"}
+    pipeline.shutdown()